@@ -1,120 +1,588 @@
 # -*- coding: utf-8 -*-
-from collections import OrderedDict
-
-import dash
-import dash_core_components as dcc
-import dash_html_components as html
-from dash.dependencies import Input, Output
-from sqlalchemy import sql
-
-from database_utils import get_session
-from models import Court
-from tabs.counts_tab import update_line_graph
-from tabs.wait_time_tab import update_wait_time_graph
-
-
-with get_session() as session:
-    court_type_name = OrderedDict(
-        (x[0], x[1]) for x in
-        session
-        .query(Court.court_type, sql.func.array_agg(Court.court_name))
-        .group_by(Court.court_type)
-        .order_by(Court.court_type)
-    )
+from startup import StartupTimings
+
+# Before anything heavy is imported, so the report covers the whole cold start
+startup_timings = StartupTimings()
+
+import datetime  # noqa: E402
+import logging  # noqa: E402
+import threading  # noqa: E402
+from concurrent.futures import ThreadPoolExecutor  # noqa: E402
+
+import dash  # noqa: E402
+import dash_core_components as dcc  # noqa: E402
+import dash_html_components as html  # noqa: E402
+from dash.dependencies import ClientsideFunction, Input, Output, State  # noqa: E402
+
+from config import app_cfg  # noqa: E402
+from data_version import DataVersionWatcher, VersionedValue  # noqa: E402
+from figure_cache import FigureCache  # noqa: E402
+from figure_store import FigureStore, figure_key  # noqa: E402
+from metrics import (  # noqa: E402
+    METRICS_DIR,
+    merge_process_metrics,
+    render_counters,
+    render_gauges,
+    render_metrics,
+    timed_callback,
+    write_process_metrics,
+)
+from snapshot import query_court_type_name, read_snapshot  # noqa: E402
+
+startup_timings.mark('import dash')
+
+# Nothing below touches the database or imports sqlalchemy and plotly while the snapshot
+# `load_data` wrote is current, they are only loaded by the first value missing from it
+
+
+def get_from_snapshot(key, load):
+    """A loader for `VersionedValue` that reads `key` from the snapshot when it was written for
+    the current data version and falls back to `load` otherwise.
+    """
+    def _load():
+        current_snapshot = snapshot.get()
+        # Snapshots written before `key` was added are loaded from the database
+        if (current_snapshot is not None
+                and current_snapshot['data_version'] == data_version_watcher.current()
+                and key in current_snapshot):
+            return current_snapshot[key]
+        return load()
+    return _load
+
+
+def load_court_type_name():
+    from database_utils import get_request_session
+
+    with get_request_session() as session:
+        return query_court_type_name(session)
+
+
+def load_count_cube():
+    from count_cube import CountCube
+    from database_utils import get_request_session
+
+    with get_request_session() as session:
+        return CountCube.from_session(session)
+
+
+def load_appointment_bitmaps():
+    from bitmap_index import AppointmentBitmaps
+    from database_utils import get_request_session
+
+    with get_request_session() as session:
+        return AppointmentBitmaps.from_session(session)
+
+
+def load_interval_index():
+    from database_utils import get_request_session
+    from interval_index import AppointmentIntervalIndex
+
+    with get_request_session() as session:
+        return AppointmentIntervalIndex.from_session(session)
+
+
+def load_clientside_data():
+    from clientside_data import get_clientside_data
+    from database_utils import get_request_session
+
+    with get_request_session() as session:
+        return get_clientside_data(session, count_cube.get(), court_type_name.get())
+
+
+data_version_watcher = DataVersionWatcher()
+# Re-read whenever `load_data` publishes a new data version
+snapshot = VersionedValue(read_snapshot, data_version_watcher.current)
+
+court_type_name = VersionedValue(
+    get_from_snapshot('court_type_name', load_court_type_name), data_version_watcher.current)
+# Answers the Party tab for every court filter without going back to the database
+count_cube = VersionedValue(
+    get_from_snapshot('count_cube', load_count_cube), data_version_watcher.current)
+# Answers any combination of the multi-select filters, see `render_graphs`
+appointment_bitmaps = VersionedValue(
+    get_from_snapshot('appointment_bitmaps', load_appointment_bitmaps),
+    data_version_watcher.current)
+# Answers the Serving tab, who was serving on any date
+interval_index = VersionedValue(
+    get_from_snapshot('interval_index', load_interval_index), data_version_watcher.current)
+# Only used when the browser does the filtering, see `assets/clientside.js`
+clientside_data = VersionedValue(
+    get_from_snapshot('clientside_data', load_clientside_data), data_version_watcher.current)
+
+
+
+def get_shared_data():
+    """Everything served from memory."""
+    if app_cfg['clientside_filtering']:
+        return [court_type_name, count_cube, interval_index, clientside_data]
+    return [court_type_name, count_cube, interval_index, appointment_bitmaps]
+
+
+def load_shared_data():
+    """Loads `get_shared_data`, from the database if the snapshot is not current.
+    `wsgi.create_app` calls it before the workers are forked so they share it.
+    """
+    for value in get_shared_data():
+        value.get()
+
+
+# Loads a new data version off the request path, see `readyz`
+data_reload_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='reload-data')
+_data_reload = None
+_data_reload_lock = threading.Lock()
+
+
+def reload_shared_data():
+    """Starts `load_shared_data` in the background unless it is already running."""
+    global _data_reload
+    with _data_reload_lock:
+        if _data_reload is None or _data_reload.done():
+            _data_reload = data_reload_executor.submit(_reload_shared_data)
+
+
+def _reload_shared_data():
+    try:
+        load_shared_data()
+    except Exception:
+        app.server.logger.exception('Loading the shared data failed')
+
+
+if snapshot.get() is not None:
+    load_shared_data()
+startup_timings.mark('read snapshot')
+
+# Renders the graphs of one callback concurrently, see `render_graphs`
+graph_executor = ThreadPoolExecutor(
+    max_workers=app_cfg['graph_render_workers'], thread_name_prefix='render-graph')
+# Idle executor threads, a callback finding none renders on its own thread instead of queueing
+graph_render_slots = threading.BoundedSemaphore(app_cfg['graph_render_workers'])
+
+# Repeat filter selections are served from here until the data version changes
+figure_cache = FigureCache(
+    maxsize=app_cfg['figure_cache_size'],
+    ttl=app_cfg['figure_cache_ttl'],
+    version_getter=data_version_watcher.current,
+)
+
+# Figures `scripts/prerender_figures.py` rendered for the current data version, shared by every
+# process and looked up before rendering anything
+figure_store = FigureStore()
 
 # external_stylesheets = ['https://codepen.io/chriddyp/pen/bWLwgP.css']
 # app = dash.Dash(__name__, external_stylesheets=external_stylesheets)
 app = dash.Dash(__name__)
+# Outside debug Flask's logger drops everything below warnings, like the startup timings
+app.server.logger.setLevel(logging.INFO)
+
+
+@app.server.before_first_request
+def report_startup_timings():
+    startup_timings.mark('first request')
+    app.server.logger.info(startup_timings.report())
+
+
+@app.server.route('/healthz')
+def healthz():
+    """Liveness, the process is answering requests."""
+    from flask import jsonify
+
+    return jsonify({'status': 'ok'})
+
+
+@app.server.route('/readyz')
+def readyz():
+    """Readiness, the data served from memory is loaded for the current data version and the
+    database answers, 503 otherwise. The probe only looks, a new data version is loaded in the
+    background and the worker is ready again once it is.
+    """
+    from flask import jsonify
+    from database_utils import get_request_session
+
+    checks = {}
+    try:
+        checks['data'] = all(value.is_current() for value in get_shared_data())
+        if not checks['data']:
+            reload_shared_data()
+    except Exception:
+        app.server.logger.exception('Readiness check of the shared data failed')
+        checks['data'] = False
+    try:
+        with get_request_session(statement_timeout_ms=1000) as session:
+            session.execute('SELECT 1')
+        checks['database'] = True
+    except Exception:
+        app.server.logger.exception('Readiness check of the database failed')
+        checks['database'] = False
+
+    ready = all(checks.values())
+    body = {
+        'status': 'ok' if ready else 'unavailable',
+        'data_version': data_version_watcher.current(),
+        **checks,
+    }
+    return jsonify(body), 200 if ready else 503
+
+
+def render_process_metrics():
+    """Prometheus text of this process, query and callback latency, connection pool and cold
+    start.
+    """
+    from database_utils import get_pool_counters, get_pool_gauges
+
+    return render_metrics(
+        render_counters('courts_db_pool', 'Connection pool activity.', get_pool_counters()),
+        render_gauges('courts_db_pool', 'Connection pool statistic.', get_pool_gauges()),
+        render_gauges(
+            'courts_startup_seconds', 'Seconds from process start to the end of a phase.',
+            {phase: total for phase, _, total in startup_timings.phases}, label_name='phase'),
+        render_counters(
+            'courts_figure_cache', 'Figure cache lookups.',
+            {'hits': figure_cache.hits, 'misses': figure_cache.misses}),
+    )
+
+
+@app.server.route('/metrics')
+def metrics():
+    """Prometheus text format of every worker when `METRICS_DIR` is set, see
+    `metrics.merge_process_metrics`, of this process otherwise.
+    """
+    from flask import Response
+
+    body = render_process_metrics()
+    if METRICS_DIR:
+        write_process_metrics(body)
+        body = merge_process_metrics()
+    return Response(body, mimetype='text/plain; version=0.0.4')
 
-app.layout = html.Div(
-    id='main', children=[
-        html.H1(id='header', children='Welcome to the Court Explorer'),
-        html.Div(
-            id='filters',
-            children=[
-                html.Div(
-                    dcc.Dropdown(
-                        id='court-type-dd',
-                        options=[{'label': ct, 'value': ct} for ct in court_type_name.keys()]
-                    ),
-                    style={'width': '33%', 'display': 'inline-block'}
+
+# Multi-select dropdowns filtering on appointment and judge columns, served by the bitmap index
+# so the browser does not get them when it filters
+APPOINTMENT_FILTERS = [
+    ('party-dd', 'party', 'Party'),
+    ('gender-dd', 'gender', 'Gender'),
+    ('race-ethnicity-dd', 'race_or_ethnicity', 'Race / Ethnicity'),
+    ('aba-rating-dd', 'aba_rating', 'ABA Rating'),
+]
+
+
+def serve_layout():
+    """Called on every page load so the clientside data is current."""
+    filters = html.Div(
+        id='filters',
+        children=[
+            html.Div(
+                dcc.Dropdown(
+                    id='court-type-dd',
+                    options=[{'label': ct, 'value': ct} for ct in court_type_name.get()],
+                    multi=True,
                 ),
-                html.Div(
-                    dcc.Dropdown(
-                        id='court-name-dd',
-                    ),
-                    style={'width': '33%', 'display': 'inline-block'}
+                style={'width': '33%', 'display': 'inline-block'}
+            ),
+            html.Div(
+                dcc.Dropdown(
+                    id='court-name-dd',
+                    multi=True,
                 ),
-            ]
-        ),
-        html.Div(
-            id='graphs',
-            children=[
-                dcc.Tabs(id='main-tabs', style={'width': '49%'}, children=[
-                    dcc.Tab(id='makeup-tab', label='Makeup', children=[
-                        dcc.Tabs(id='makeup-subtabs', children=[
-                            dcc.Tab(id='party-counts-tab', label='Party', children=[
-                                dcc.Graph(
-                                    id='party-counts-graph',
-                                    config={'displayModeBar': False},
-                                    style={'width': '100%'}
+                style={'width': '33%', 'display': 'inline-block'}
+            ),
+        ]
+    )
+    layout = html.Div(
+        id='main', children=[
+            html.H1(id='header', children='Welcome to the Court Explorer'),
+            filters,
+            html.Div(
+                id='graphs',
+                children=[
+                    dcc.Tabs(id='main-tabs', style={'width': '49%'}, children=[
+                        dcc.Tab(id='makeup-tab', label='Makeup', children=[
+                            dcc.Tabs(id='makeup-subtabs', children=[
+                                dcc.Tab(id='party-counts-tab', label='Party', children=[
+                                    dcc.Graph(
+                                        id='party-counts-graph',
+                                        config={'displayModeBar': False},
+                                        style={'width': '100%'}
+                                        ),
+                                    ]),
+                                dcc.Tab(id='composition-tab', label='Serving', children=[
+                                    dcc.DatePickerSingle(
+                                        id='composition-date',
+                                        date=datetime.date.today().isoformat(),
+                                        display_format='MMM D, YYYY',
                                     ),
-                                ]),
-                            dcc.Tab(id='race-ethnicity-tab', label='Race / Ethnicity', children=[
-                                dcc.Graph(
-                                    id='race-ethnicity-graph',
-                                    config={'displayModeBar': False},
-                                    style={'width': '100%'}
+                                    dcc.RadioItems(
+                                        id='composition-granularity',
+                                        options=[
+                                            {'label': 'Yearly', 'value': 'year'},
+                                            {'label': 'Monthly', 'value': 'month'},
+                                            {'label': 'Per congress', 'value': 'congress'},
+                                        ],
+                                        value='year',
+                                        labelStyle={'display': 'inline-block'},
                                     ),
-                                ]),
-                            ])
-                        ]
-                    ),
-                    dcc.Tab(id='process-tab', label='Process', children=[
-                        dcc.Tabs(id='process-subtabs', children=[
-                            dcc.Tab(id='wait-time-tab', label='Time to Confirmation', children=[
-                                dcc.Graph(id='wait-time-graph', config={'displayModeBar': False}),
-                                ]),
-                            dcc.Tab(id='unconfirmed-tab', label='Unconfirmed', children=[
-                                dcc.Graph(id='unconfirme-graph', config={'displayModeBar': False}),
+                                    dcc.Graph(
+                                        id='composition-graph',
+                                        config={'displayModeBar': False},
+                                        style={'width': '100%'}
+                                        ),
+                                    ]),
+                                dcc.Tab(
+                                    id='race-ethnicity-tab', label='Race / Ethnicity', children=[
+                                    dcc.Graph(
+                                        id='race-ethnicity-graph',
+                                        config={'displayModeBar': False},
+                                        style={'width': '100%'}
+                                        ),
+                                    ]),
                                 ])
-                            ])
-                        ]
-                    ),
-                ])
-            ],
-        ),
-        ]
-    )
+                            ]
+                        ),
+                        dcc.Tab(id='process-tab', label='Process', children=[
+                            dcc.Tabs(id='process-subtabs', children=[
+                                dcc.Tab(id='wait-time-tab', label='Time to Confirmation', children=[
+                                    dcc.Graph(
+                                        id='wait-time-graph', config={'displayModeBar': False}),
+                                    ]),
+                                dcc.Tab(id='unconfirmed-tab', label='Unconfirmed', children=[
+                                    dcc.Graph(
+                                        id='unconfirme-graph', config={'displayModeBar': False}),
+                                    ])
+                                ])
+                            ]
+                        ),
+                    ])
+                ],
+            ),
+            ]
+        )
+    if app_cfg['clientside_filtering']:
+        layout.children.append(dcc.Store(id='clientside-data', data=clientside_data.get()))
+    else:
+        bitmaps = appointment_bitmaps.get()
+        filters.children.extend(
+            html.Div(
+                dcc.Dropdown(
+                    id=dropdown_id,
+                    options=[{'label': value, 'value': value} for value in bitmaps.values(column)],
+                    placeholder=placeholder,
+                    multi=True,
+                ),
+                style={'width': '16%', 'display': 'inline-block'}
+            )
+            for dropdown_id, column, placeholder in APPOINTMENT_FILTERS
+        )
+    return layout
 
 
-@app.callback(
-    Output('court-name-dd', 'options'),
-    [Input('court-type-dd', 'value')]
-)
+app.layout = serve_layout
+
+
+def as_selection(value):
+    """A dropdown value as a sorted tuple, multi-selects give a list and None when cleared."""
+    if not value:
+        return ()
+    if isinstance(value, str):
+        return (value,)
+    return tuple(sorted(value))
+
+
+@timed_callback
 def update_court_name(court_type_select):
     court_names = []
+    court_type_name_dict = court_type_name.get()
 
-    if court_type_select:
-        court_type_list = [court_type_select]
-    else:
-        court_type_list = court_type_name.keys()
+    court_type_list = as_selection(court_type_select) or court_type_name_dict.keys()
 
     for court_type in court_type_list:
-        court_names.extend(court_type_name[court_type])
+        court_names.extend(court_type_name_dict[court_type])
     return [{'label': cn, 'value': cn} for cn in sorted(court_names)]
 
 
-@app.callback(
-    [Output('party-counts-graph', 'figure'), Output('wait-time-graph', 'figure')],
-    [Input('court-type-dd', 'value'), Input('court-name-dd', 'value')]
-)
-def update_graphs(court_type_select, court_name_select):
+@timed_callback
+def update_graphs(court_type_select, court_name_select, *appointment_selects):
+    selects = tuple(
+        as_selection(select)
+        for select in (court_type_select, court_name_select) + appointment_selects
+    )
+    return figure_cache.get_or_render(selects, lambda: render_graphs(*selects))
+
+
+def render_graphs(court_type_select, court_name_select, *appointment_selects):
+    """Every select is a tuple of values, empty for no filter. A single court type and name
+    are answered by the count cube and summary tables, anything else by the bitmap index.
+    """
+    if len(court_type_select) > 1 or len(court_name_select) > 1 or any(appointment_selects):
+        return render_bitmap_graphs(court_type_select, court_name_select, *appointment_selects)
+
+    court_type_select = single(court_type_select)
+    court_name_select = single(court_name_select)
+    line_graph = get_stored_figure('party-counts', court_type_select, court_name_select)
+    wait_time_graph = get_stored_figure('wait-time', court_type_select, court_name_select)
+    if line_graph is not None and wait_time_graph is not None:
+        return line_graph, wait_time_graph
+
+    # The wait time query runs on its own pooled connection while the line graph is drawn, so
+    # the callback takes as long as the slower of the two instead of their sum
+    if not graph_render_slots.acquire(blocking=False):
+        # Every executor thread is busy, waiting in its queue would only be slower
+        return (
+            render_line_graph(court_type_select, court_name_select),
+            render_wait_time_graph(court_type_select, court_name_select),
+        )
+    try:
+        wait_time_graph = graph_executor.submit(
+            render_wait_time_graph, court_type_select, court_name_select)
+    except Exception:
+        graph_render_slots.release()
+        raise
+    wait_time_graph.add_done_callback(lambda _: graph_render_slots.release())
+    return render_line_graph(court_type_select, court_name_select), wait_time_graph.result()
+
+
+def single(select):
+    """The value of a select of at most one value, None for no filter."""
+    return select[0] if select else None
+
+
+def get_stored_figure(graph, court_type_select, court_name_select):
+    return figure_store.get(
+        data_version_watcher.current(), figure_key(graph, court_type_select, court_name_select))
+
+
+def render_bitmap_graphs(court_type_select, court_name_select, *appointment_selects):
+    from tabs.counts_tab import get_line_graph_figure
+    from tabs.wait_time_tab import get_wait_time_figure
+
+    bitmaps = appointment_bitmaps.get()
+    filters = dict(zip(
+        ['court_type', 'court_name'] + [column for _, column, _ in APPOINTMENT_FILTERS],
+        (court_type_select, court_name_select) + appointment_selects,
+    ))
+    selection = bitmaps.select(**filters)
     return (
-        update_line_graph(session, court_type_select, court_name_select),
-        update_wait_time_graph(session, court_type_select, court_name_select)
+        get_line_graph_figure(*bitmaps.line_graph_data(selection)).to_dict(),
+        get_wait_time_figure(
+            bitmaps.wait_time_data(selection),
+            precompute_boxes=app_cfg['precompute_wait_time_boxes'],
+        ).to_dict(),
+    )
+
+
+def render_line_graph(court_type_select, court_name_select):
+    from tabs.counts_tab import update_line_graph
+
+    # Drawn from the count cube, which needs no session
+    return update_line_graph(
+        None, court_type_select, court_name_select, count_cube.get()).to_dict()
+
+
+def render_wait_time_graph(court_type_select, court_name_select):
+    from database_utils import get_request_session
+    from tabs.wait_time_tab import update_wait_time_graph
+
+    # A session per render, sessions are not shared between threads
+    with get_request_session() as session:
+        return update_wait_time_graph(
+            session, court_type_select, court_name_select,
+            precompute_boxes=app_cfg['precompute_wait_time_boxes'],
+        ).to_dict()
+
+
+@timed_callback
+def update_unconfirmed(court_type_select, court_name_select):
+    # Unsuccessful nominations have no judge, so only the court filters apply
+    court_type_select = as_selection(court_type_select)
+    court_name_select = as_selection(court_name_select)
+    return figure_cache.get_or_render(
+        ('unconfirmed', court_type_select, court_name_select),
+        lambda: render_unconfirmed_graph(court_type_select, court_name_select),
+    )
+
+
+def render_unconfirmed_graph(court_type_select, court_name_select):
+    from database_utils import get_request_session
+    from tabs.unconfirmed_tab import update_unconfirmed_graph
+
+    if len(court_type_select) <= 1 and len(court_name_select) <= 1:
+        stored = get_stored_figure(
+            'unconfirmed', single(court_type_select), single(court_name_select))
+        if stored is not None:
+            return stored
+
+    with get_request_session() as session:
+        return update_unconfirmed_graph(session, court_type_select, court_name_select).to_dict()
+
+
+@timed_callback
+def update_composition(court_type_select, court_name_select, date, granularity):
+    # Answered by the interval index, only the court filters apply
+    court_type_select = as_selection(court_type_select)
+    court_name_select = as_selection(court_name_select)
+    # The date picker sends an ISO date, with a time when it was set from a datetime
+    date = datetime.date.fromisoformat(date[:10]) if date else datetime.date.today()
+    return figure_cache.get_or_render(
+        ('composition', court_type_select, court_name_select, date, granularity),
+        lambda: render_composition_graph(court_type_select, court_name_select, date, granularity),
     )
 
 
+def render_composition_graph(court_type_select, court_name_select, date, granularity):
+    from tabs.composition_tab import update_composition_graph
+
+    return update_composition_graph(
+        interval_index.get(), date, granularity, court_type_select, court_name_select).to_dict()
+
+
+if app_cfg['clientside_filtering']:
+    # The browser filters the data in the store, changing a dropdown never reaches the server
+    app.clientside_callback(
+        ClientsideFunction(namespace='courts', function_name='update_court_name'),
+        Output('court-name-dd', 'options'),
+        [Input('court-type-dd', 'value')],
+        [State('clientside-data', 'data')],
+    )
+    app.clientside_callback(
+        ClientsideFunction(namespace='courts', function_name='update_line_graph'),
+        Output('party-counts-graph', 'figure'),
+        [Input('court-type-dd', 'value'), Input('court-name-dd', 'value')],
+        [State('clientside-data', 'data')],
+    )
+    app.clientside_callback(
+        ClientsideFunction(namespace='courts', function_name='update_wait_time_graph'),
+        Output('wait-time-graph', 'figure'),
+        [Input('court-type-dd', 'value'), Input('court-name-dd', 'value')],
+        [State('clientside-data', 'data')],
+    )
+else:
+    app.callback(
+        Output('court-name-dd', 'options'),
+        [Input('court-type-dd', 'value')]
+    )(update_court_name)
+    app.callback(
+        [Output('party-counts-graph', 'figure'), Output('wait-time-graph', 'figure')],
+        [Input('court-type-dd', 'value'), Input('court-name-dd', 'value')]
+        + [Input(dropdown_id, 'value') for dropdown_id, _, _ in APPOINTMENT_FILTERS]
+    )(update_graphs)
+
+# Served in both modes, the clientside data does not include unsuccessful nominations
+app.callback(
+    Output('unconfirme-graph', 'figure'),
+    [Input('court-type-dd', 'value'), Input('court-name-dd', 'value')]
+)(update_unconfirmed)
+
+# Also served in both modes, from the interval index
+app.callback(
+    Output('composition-graph', 'figure'),
+    [
+        Input('court-type-dd', 'value'),
+        Input('court-name-dd', 'value'),
+        Input('composition-date', 'date'),
+        Input('composition-granularity', 'value'),
+    ]
+)(update_composition)
+
+startup_timings.mark('build app')
+
+
 if __name__ == '__main__':
     app.run_server(debug=True, port=8000, host='0.0.0.0')
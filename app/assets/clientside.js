@@ -0,0 +1,117 @@
+// Clientside versions of the callbacks in app.py, used when CLIENTSIDE_FILTERING is on. They draw
+// the same figures from the columnar data `clientside_data.get_clientside_data` puts in the
+// `clientside-data` store.
+
+// The court dropdowns are multi-selects, whose value is a list, empty or null for every court
+const asList = value => (value ? [].concat(value) : []);
+
+const matchingCourts = (data, courtType, courtName) => {
+  const courtTypes = asList(courtType);
+  const courtNames = asList(courtName);
+  return data.courts.court_type.map((courtTypeIndex, i) => (
+    (!courtTypes.length || courtTypes.includes(data.court_types[courtTypeIndex])) &&
+    (!courtNames.length || courtNames.includes(data.court_names[data.courts.court_name[i]]))
+  ));
+};
+
+const updateCourtName = (courtType, data) => {
+  const selected = asList(courtType);
+  const courtTypes = selected.length ? selected : Object.keys(data.court_type_name);
+  const courtNames = [];
+  courtTypes.forEach(ct => courtNames.push(...(data.court_type_name[ct] || [])));
+  return courtNames.sort().map(cn => ({ label: cn, value: cn }));
+};
+
+const updateLineGraph = (courtType, courtName, data) => {
+  const nYears = data.years.length;
+  const matches = matchingCourts(data, courtType, courtName);
+  const totals = {};
+  ['n_judges', 'n_appointed', 'n_terminated'].forEach(column => {
+    totals[column] = new Array(data.parties.length * nYears).fill(0);
+  });
+
+  const counts = data.counts;
+  for (let i = 0; i < counts.court.length; i++) {
+    if (!matches[counts.court[i]]) continue;
+    const index = counts.party[i] * nYears + counts.year[i];
+    totals.n_judges[index] += counts.n_judges[i];
+    totals.n_appointed[index] += counts.n_appointed[i];
+    totals.n_terminated[index] += counts.n_terminated[i];
+  }
+
+  const traces = data.parties.map((party, p) => {
+    const partySlice = column => totals[column].slice(p * nYears, (p + 1) * nYears);
+    return {
+      type: 'scatter',
+      x: data.years,
+      y: partySlice('n_judges'),
+      marker: { opacity: 1, color: data.party_colors[p] },
+      text: party,
+      name: party,
+      error_y: {
+        type: 'data',
+        thickness: 0.5,
+        symmetric: false,
+        array: partySlice('n_appointed'),
+        arrayminus: partySlice('n_terminated'),
+      },
+    };
+  });
+
+  return {
+    data: traces,
+    layout: {
+      xaxis: {
+        range: [Math.min(...data.years) - 2, Math.max(...data.years) + 2],
+        showticklabels: true,
+        spikemode: 'across',
+        spikesnap: 'cursor',
+        spikecolor: 'black',
+        spikethickness: 1,
+      },
+      yaxis: { title: { text: 'Number of Judges' } },
+      hovermode: 'x',
+      spikedistance: -1,
+    },
+  };
+};
+
+const updateWaitTimeGraph = (courtType, courtName, data) => {
+  const matches = matchingCourts(data, courtType, courtName);
+  const waitTimes = data.wait_times;
+  // Rows are sorted by congress, so presidents come out in the order they first nominated
+  const boxes = new Map();
+  for (let i = 0; i < waitTimes.court.length; i++) {
+    if (!matches[waitTimes.court[i]]) continue;
+    const president = waitTimes.president[i];
+    if (!boxes.has(president)) {
+      boxes.set(president, { x: [], y: [] });
+    }
+    boxes.get(president).x.push(waitTimes.year[i]);
+    boxes.get(president).y.push(waitTimes.days_to_confirm[i]);
+  }
+
+  const traces = Array.from(boxes, ([president, box]) => ({
+    type: 'box',
+    x: box.x,
+    y: box.y,
+    name: data.presidents[president],
+    marker: { color: data.party_colors[data.president_party[president]] },
+  }));
+
+  return {
+    data: traces,
+    layout: {
+      xaxis: { showticklabels: true },
+      yaxis: { title: { text: 'Wait Times (days)' } },
+    },
+  };
+};
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+  courts: {
+    update_court_name: updateCourtName,
+    update_line_graph: updateLineGraph,
+    update_wait_time_graph: updateWaitTimeGraph,
+  },
+});
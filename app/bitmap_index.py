@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict, namedtuple
+
+from pyroaring import BitMap, FrozenBitMap
+
+# Columns the dashboard can filter appointments on, any number of values each
+FILTER_COLUMNS = (
+    'court_type', 'court_name', 'party', 'gender', 'race_or_ethnicity', 'aba_rating')
+
+AppointmentRow = namedtuple('AppointmentRow', FILTER_COLUMNS + (
+    'start_year', 'end_year', 'days_to_confirm',
+    'congress_start_year', 'congress_president', 'congress_party',
+))
+
+
+class BitmapIndex:
+    """One bitset per distinct value of every column, as compressed Roaring bitmaps holding row
+    `i` for every row with that value. Values of a column are OR'ed together and columns AND'ed,
+    so any combination of filters resolves to a row set with a handful of bitmap operations.
+    """
+
+    def __init__(self, rows, columns):
+        self.n_rows = 0
+        self.columns = columns
+        indices = {column: defaultdict(list) for column in columns}
+        for i, row in enumerate(rows):
+            for column in columns:
+                indices[column][getattr(row, column)].append(i)
+            self.n_rows = i + 1
+
+        self.all_rows = to_bitset(range(self.n_rows))
+        self.bitmaps = {
+            column: {value: to_bitset(rows) for value, rows in column_indices.items()}
+            for column, column_indices in indices.items()
+        }
+
+    def values(self, column):
+        """Distinct values of `column`, without None."""
+        return sorted(value for value in self.bitmaps[column] if value is not None)
+
+    def bitmap(self, column, values):
+        """Rows with any of `values` in `column`."""
+        return FrozenBitMap.union(
+            EMPTY_BITSET, *(self.bitmaps[column].get(value, EMPTY_BITSET) for value in values))
+
+    def select(self, filters):
+        """Rows matching every column of `filters`, a dict of column to the values it may have.
+        Columns without values are not filtered on.
+        """
+        bitset = self.all_rows
+        for column, values in filters.items():
+            if values:
+                bitset &= self.bitmap(column, values)
+        return bitset
+
+
+def to_bitset(indices):
+    bitset = BitMap(indices)
+    # Runs of consecutive rows, like every row of a court type loaded together, as one interval
+    bitset.run_optimize()
+    return FrozenBitMap(bitset)
+
+
+EMPTY_BITSET = FrozenBitMap()
+
+
+class AppointmentBitmaps:
+    """Party tab counts and wait times for any combination of multi-select filters, from a
+    `BitmapIndex` over appointments.
+
+    The `year_party` join conditions of `tabs.counts_tab` are precomputed as one bitset per
+    (year, party) for serving, appointed and terminated appointments, so every count is the
+    cardinality of the filter's rows AND'ed with one of them.
+    """
+
+    def __init__(self, years, parties, rows):
+        self.years = sorted(years)
+        self.parties = sorted(parties)
+        rows = list(rows)
+        self.rows = rows
+        self.index = BitmapIndex(rows, FILTER_COLUMNS)
+
+        measures = defaultdict(list)
+        for i, row in enumerate(rows):
+            if row.start_year is None or row.party not in self.parties:
+                continue
+            for year in self.years:
+                if row.start_year < year + 2 and (row.end_year is None or row.end_year >= year):
+                    measures[('n_judges', row.party, year)].append(i)
+                if year <= row.start_year < year + 2:
+                    measures[('n_appointed', row.party, year)].append(i)
+                if row.end_year is not None and year - 2 <= row.end_year < year:
+                    measures[('n_terminated', row.party, year)].append(i)
+        self._measures = {key: to_bitset(indices) for key, indices in measures.items()}
+
+        # Confirmed appointments by the president of the congress they were nominated in
+        confirmed = defaultdict(list)
+        for i, row in enumerate(rows):
+            if row.days_to_confirm is not None and row.congress_start_year is not None:
+                confirmed[(row.congress_president, row.congress_party)].append(i)
+        self._confirmed = {key: to_bitset(indices) for key, indices in confirmed.items()}
+
+    @classmethod
+    def from_session(cls, session):
+        from metrics import tag_query
+        from models import Appointment, Congress, Judge, YearParty
+
+        year_parties = session.query(YearParty.year, YearParty.party).all()
+        rows = tag_query(
+            session
+            .query(
+                Appointment.court_type,
+                Appointment.court_name,
+                Appointment.party_of_appointing_president,
+                Judge.gender,
+                Judge.race_or_ethnicity,
+                Appointment.aba_rating,
+                Appointment.start_year,
+                Appointment.end_year,
+                Appointment.days_to_confirm,
+                Congress.start_year,
+                Congress.president,
+                Congress.party_of_president,
+            )
+            .join(Judge, Judge.nid == Appointment.nid)
+            .outerjoin(Congress, Congress.title == Appointment.congress_title)
+            .order_by(Appointment.id),
+            'appointment_bitmaps',
+        )
+        return cls(
+            {year for year, _ in year_parties},
+            {party for _, party in year_parties},
+            (AppointmentRow(*row) for row in rows),
+        )
+
+    def values(self, column):
+        return self.index.values(column)
+
+    def select(self, **filters):
+        """Row set of the appointments matching every filter, see `BitmapIndex.select`."""
+        return self.index.select(filters)
+
+    def line_graph_data(self, selection):
+        """Same output as `tabs.counts_tab.get_line_graph_data` for the rows in `selection`."""
+        party_counts_dict = defaultdict(lambda: defaultdict(list))
+        for party in self.parties:
+            counts_dict = party_counts_dict[party]
+            for measure in ('n_judges', 'n_appointed', 'n_terminated'):
+                counts_dict[measure] = [
+                    selection.intersection_cardinality(
+                        self._measures.get((measure, party, year), EMPTY_BITSET))
+                    for year in self.years
+                ]
+        return party_counts_dict, list(self.years)
+
+    def wait_time_data(self, selection):
+        """Same rows as `tabs.wait_time_tab.get_wait_time_query` for the rows in `selection`,
+        `(president, party, start_years, days_to_confirm)` in the order presidents first
+        nominated.
+        """
+        wait_time_rows = []
+        for (president, party), confirmed in self._confirmed.items():
+            rows = [self.rows[i] for i in selection & confirmed]
+            if rows:
+                wait_time_rows.append((
+                    president,
+                    party,
+                    [row.congress_start_year for row in rows],
+                    [row.days_to_confirm for row in rows],
+                ))
+        # First nomination among the selected rows, like the `min` the query orders by
+        return sorted(wait_time_rows, key=lambda wait_time_row: min(wait_time_row[2]))
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+from constants import party_colors
+
+
+def get_clientside_data(session, count_cube, court_type_name):
+    """Everything `assets/clientside.js` needs to draw both graphs for any filter, sent once per
+    page load. Strings are dictionary encoded and rows are stored column by column:
+
+        courts:      {'court_type': [type index], 'court_name': [name index]}
+        counts:      {'court': [court index], 'party': [party index], 'year': [year index],
+                      'n_judges': [...], 'n_appointed': [...], 'n_terminated': [...]}
+        wait_times:  {'court': [...], 'president': [president index], 'year': [...],
+                      'days_to_confirm': [...]}
+
+    Courts missing their type or name are included with a null one, so every court still adds
+    up to the same totals as `CountCube.line_graph_data`.
+    """
+    from models import CongressWaitTime
+
+    court_types, court_names, courts = _Encoder(), _Encoder(), _Encoder()
+    parties, presidents = _Encoder(count_cube.parties), _Encoder()
+    years = list(count_cube.years)
+    year_index = {year: i for i, year in enumerate(years)}
+
+    counts = _columns('court', 'party', 'year', 'n_judges', 'n_appointed', 'n_terminated')
+    for court_type, court_name, party, year, *n in count_cube.court_counts():
+        _append(counts, courts.encode((court_type, court_name)), parties.encode(party),
+                year_index[year], *n)
+
+    president_party = {}
+    wait_times = _columns('court', 'president', 'year', 'days_to_confirm')
+    wait_time_query = (
+        session
+        .query(
+            CongressWaitTime.court_type,
+            CongressWaitTime.court_name,
+            CongressWaitTime.president,
+            CongressWaitTime.party,
+            CongressWaitTime.congress_start_year,
+            CongressWaitTime.days_to_confirm,
+        )
+        # Presidents are shown in the order they first nominated
+        .order_by(CongressWaitTime.congress_start_year)
+    )
+    for court_type, court_name, president, party, year, days_to_confirm in wait_time_query:
+        court = courts.encode((court_type, court_name))
+        president_index = presidents.encode(president)
+        president_party[president_index] = parties.encode(party)
+        for days in days_to_confirm:
+            _append(wait_times, court, president_index, year, days)
+
+    court_columns = {
+        'court_type': [court_types.encode(court_type) for court_type, _ in courts.values],
+        'court_name': [court_names.encode(court_name) for _, court_name in courts.values],
+    }
+    return {
+        'court_type_name': court_type_name,
+        'court_types': court_types.values,
+        'court_names': court_names.values,
+        'courts': court_columns,
+        'parties': parties.values,
+        'party_colors': [party_colors.get(party) for party in parties.values],
+        'presidents': presidents.values,
+        'president_party': [president_party[i] for i in range(len(presidents.values))],
+        'years': years,
+        'counts': counts,
+        'wait_times': wait_times,
+    }
+
+
+class _Encoder:
+    def __init__(self, values=()):
+        self.values = []
+        self._index = {}
+        for value in values:
+            self.encode(value)
+
+    def encode(self, value):
+        if value not in self._index:
+            self._index[value] = len(self.values)
+            self.values.append(value)
+        return self._index[value]
+
+
+def _columns(*names):
+    return {name: [] for name in names}
+
+
+def _append(columns, *values):
+    for column, value in zip(columns.values(), values):
+        column.append(value)
@@ -0,0 +1,16 @@
+import os
+
+
+app_cfg = {
+    'figure_cache_size': int(os.getenv('FIGURE_CACHE_SIZE', 256)),
+    # Seconds before a cached figure is rendered again, 0 keeps it until the data version changes
+    'figure_cache_ttl': float(os.getenv('FIGURE_CACHE_TTL', 0)),
+    # Sends box statistics instead of every wait time to the browser
+    'precompute_wait_time_boxes': os.getenv('PRECOMPUTE_WAIT_TIME_BOXES', 'true').lower() == 'true',
+    # Threads running graph queries, each holds a pooled connection while it renders. One per
+    # gunicorn thread by default, so every request in flight can render concurrently
+    'graph_render_workers': int(
+        os.getenv('GRAPH_RENDER_WORKERS', os.getenv('GUNICORN_THREADS', 4))),
+    # Ships the data to the browser once and filters there, see `assets/clientside.js`
+    'clientside_filtering': os.getenv('CLIENTSIDE_FILTERING', 'false').lower() == 'true',
+}
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+
+
+class CountCube:
+    """In-memory (year x party x court) cube of cumulative appointment counts.
+
+    For every (court_type, court_name, party) the cube keeps prefix sums over calendar years of
+    appointment starts and ends. The counts the Party tab needs for a two year `year_party` bucket
+    starting at `year` are then differences of those prefix sums:
+
+        n_judges     = served_starts(year + 1) - served_ends(year - 1)
+        n_appointed  = starts(year + 1) - starts(year - 1)
+        n_terminated = ends(year - 1) - ends(year - 3)
+
+    which match the join conditions in `tabs.counts_tab`. The prefix sums are also aggregated up
+    front for every court type, every court name and all courts so any filter is answered without
+    summing over courts.
+    """
+
+    def __init__(self, years, parties, appointments):
+        self.years = sorted(years)
+        self.parties = sorted(parties)
+        # Calendar year of index 0 of every prefix sum, low enough for `ends(year - 3)`
+        self.min_year = self.years[0] - 3
+        self.max_year = self.years[-1] + 1
+        self._court_cumulative, self._cumulative = self._build(appointments)
+
+    @classmethod
+    def from_session(cls, session):
+        from metrics import tag_query
+        from models import Appointment, YearParty
+
+        year_parties = session.query(YearParty.year, YearParty.party).all()
+        appointments = tag_query(
+            session
+            .query(
+                Appointment.court_type,
+                Appointment.court_name,
+                Appointment.party_of_appointing_president,
+                Appointment.start_year,
+                Appointment.end_year,
+            )
+            .filter(Appointment.start_year.isnot(None)),
+            'count_cube',
+        )
+        return cls(
+            {year for year, _ in year_parties},
+            {party for _, party in year_parties},
+            appointments,
+        )
+
+    def line_graph_data(self, court_type_select=None, court_name_select=None):
+        """Same output as `tabs.counts_tab.get_line_graph_data` without a database round trip."""
+        return self._line_graph_data(
+            self._cumulative.get((court_type_select or None, court_name_select or None)))
+
+    def court_counts(self):
+        """Non zero `(court_type, court_name, party, year, n_judges, n_appointed, n_terminated)`
+        of every single court, including those missing their type or name, which count towards
+        every filter they match like any other.
+        """
+        for (court_type, court_name), cumulative in self._court_cumulative.items():
+            party_counts_dict, years = self._line_graph_data(cumulative)
+            for party, counts_dict in party_counts_dict.items():
+                counts = zip(
+                    years,
+                    counts_dict['n_judges'],
+                    counts_dict['n_appointed'],
+                    counts_dict['n_terminated'],
+                )
+                for year, n_judges, n_appointed, n_terminated in counts:
+                    if n_judges or n_appointed or n_terminated:
+                        yield (
+                            court_type, court_name, party, year,
+                            n_judges, n_appointed, n_terminated,
+                        )
+
+    def _line_graph_data(self, cumulative):
+        party_counts_dict = defaultdict(lambda: defaultdict(list))
+        for party in self.parties:
+            if cumulative is None or party not in cumulative:
+                starts = ends = served_starts = served_ends = self._zeros()
+            else:
+                starts, ends, served_starts, served_ends = cumulative[party]
+
+            counts_dict = party_counts_dict[party]
+            for year in self.years:
+                i = year - self.min_year
+                counts_dict['n_judges'].append(served_starts[i + 1] - served_ends[i - 1])
+                counts_dict['n_appointed'].append(starts[i + 1] - starts[i - 1])
+                counts_dict['n_terminated'].append(ends[i - 1] - ends[i - 3])
+        return party_counts_dict, list(self.years)
+
+    def _zeros(self):
+        return [0] * (self.max_year - self.min_year + 1)
+
+    def _index(self, year):
+        # Anything before the cube still counts towards every prefix sum, anything after never does
+        return max(year, self.min_year) - self.min_year
+
+    def _build(self, appointments):
+        # (court_type, court_name) -> party -> [starts, ends, served_starts, served_ends] per year
+        events = defaultdict(dict)
+        for court_type, court_name, party, start_year, end_year in appointments:
+            if party not in self.parties:
+                continue
+            court_events = events[(court_type, court_name)]
+            if party not in court_events:
+                court_events[party] = [self._zeros() for _ in range(4)]
+            starts, ends, served_starts, served_ends = court_events[party]
+
+            # Bad data can end more than a year before it starts, which is never counted as serving
+            served = end_year is None or end_year >= start_year - 1
+            if start_year <= self.max_year:
+                starts[self._index(start_year)] += 1
+                if served:
+                    served_starts[self._index(start_year)] += 1
+            if end_year is not None and end_year <= self.max_year:
+                ends[self._index(end_year)] += 1
+                if served:
+                    served_ends[self._index(end_year)] += 1
+
+        # Roll the per court events up to every filter combination, then take the prefix sums.
+        # A court missing its type or name has the key of a filter, so its own are kept apart
+        court_cumulative = {
+            court: {
+                party: [list(counts) for counts in arrays]
+                for party, arrays in court_events.items()
+            }
+            for court, court_events in events.items()
+        }
+        cumulative = defaultdict(dict)
+        for (court_type, court_name), court_events in events.items():
+            for key in filter_keys(court_type, court_name):
+                for party, arrays in court_events.items():
+                    if party not in cumulative[key]:
+                        cumulative[key][party] = [self._zeros() for _ in range(4)]
+                    for total, counts in zip(cumulative[key][party], arrays):
+                        for i, count in enumerate(counts):
+                            total[i] += count
+
+        for party_arrays in list(court_cumulative.values()) + list(cumulative.values()):
+            for arrays in party_arrays.values():
+                for array in arrays:
+                    for i in range(1, len(array)):
+                        array[i] += array[i - 1]
+        return court_cumulative, dict(cumulative)
+
+
+def filter_keys(court_type, court_name):
+    """Every `(court_type_select, court_name_select)` filter a court is counted under, None for
+    no filter. A set so a court missing its type or name is not counted twice under the same key.
+    """
+    return {(None, None), (court_type, None), (None, court_name), (court_type, court_name)}
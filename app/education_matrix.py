@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+from bisect import bisect_right
+
+import numpy as np
+from scipy import sparse
+
+
+class EducationMatrix:
+    """Sparse incidence matrices answering education counts per two year `year_party` bucket.
+
+    Appointments are rows of three matrices:
+
+        serving    appointment x year, 1 if serving in the bucket starting at that year
+        judges     appointment x judge, 1 for the judge appointed
+        courts     the court type, court name and party of every appointment, for filters
+
+    and educations are judge x school and judge x degree counts. The school counts of every year
+    for any filter are then one product
+
+        serving[mask].T @ (judges @ schools)[mask]
+
+    where `mask` selects the appointments matching the filter. A judge with two appointments
+    serving in the same year counts twice, as in the `Export Data for D3` notebook.
+    """
+
+    def __init__(self, years, parties, appointments, educations):
+        self.years = sorted(years)
+        self.parties = sorted(parties)
+
+        nids = []
+        court_types = []
+        court_names = []
+        appointment_parties = []
+        serving_rows = []
+        serving_columns = []
+        for nid, court_type, court_name, party, start_year, end_year in appointments:
+            if party not in self.parties or start_year is None:
+                continue
+            # Same conditions as the serving join in `tabs.counts_tab`
+            first = bisect_right(self.years, start_year - 2)
+            last = len(self.years) if end_year is None else bisect_right(self.years, end_year)
+            serving_rows.extend([len(nids)] * max(last - first, 0))
+            serving_columns.extend(range(first, last))
+            nids.append(nid)
+            court_types.append(court_type)
+            court_names.append(court_name)
+            appointment_parties.append(party)
+
+        self.court_types = np.array(court_types, dtype=object)
+        self.court_names = np.array(court_names, dtype=object)
+        self.appointment_parties = np.array(appointment_parties, dtype=object)
+        self.serving = _incidence(
+            serving_rows, serving_columns, (len(nids), len(self.years)))
+
+        self.nids = sorted(set(nids))
+        judge_index = {nid: i for i, nid in enumerate(self.nids)}
+        self.appointment_nids = np.array(nids, dtype=np.int64)
+        self.judges = _incidence(
+            range(len(nids)), [judge_index[nid] for nid in nids], (len(nids), len(self.nids)))
+
+        schools, degrees = {}, {}
+        education_rows, school_columns, degree_columns = [], [], []
+        for nid, school, degree in educations:
+            if nid not in judge_index:
+                continue
+            education_rows.append(judge_index[nid])
+            school_columns.append(schools.setdefault(school, len(schools)))
+            degree_columns.append(degrees.setdefault(_normalize_degree(degree), len(degrees)))
+        self.schools = list(schools)
+        self.degrees = list(degrees)
+        self._education_rows = np.array(education_rows, dtype=np.int64)
+        self._school_columns = np.array(school_columns, dtype=np.int64)
+        self._degree_columns = np.array(degree_columns, dtype=np.int64)
+
+        shape = (len(self.nids), len(self.schools))
+        self.judge_schools = _incidence(self._education_rows, self._school_columns, shape)
+        self.judge_degrees = _incidence(
+            self._education_rows, self._degree_columns, (len(self.nids), len(self.degrees)))
+        # appointment x school, shared by every filter
+        self._appointment_schools = {None: (self.judges @ self.judge_schools).tocsr()}
+
+    @classmethod
+    def from_session(cls, session):
+        from models import Appointment, Education, YearParty
+
+        year_parties = session.query(YearParty.year, YearParty.party).all()
+        appointments = session.query(
+            Appointment.nid,
+            Appointment.court_type,
+            Appointment.court_name,
+            Appointment.party_of_appointing_president,
+            Appointment.start_year,
+            Appointment.end_year,
+        )
+        educations = session.query(Education.nid, Education.school, Education.degree)
+        return cls(
+            {year for year, _ in year_parties},
+            {party for _, party in year_parties},
+            appointments,
+            educations,
+        )
+
+    def mask(self, court_type=None, court_name=None, party=None):
+        """Boolean array selecting the appointments matching every given filter."""
+        mask = np.ones(len(self.appointment_nids), dtype=bool)
+        if court_type:
+            mask &= self.court_types == court_type
+        if court_name:
+            mask &= self.court_names == court_name
+        if party:
+            mask &= self.appointment_parties == party
+        return mask
+
+    def serving_counts(self, court_type=None, court_name=None, party=None):
+        """Appointments serving in every year."""
+        serving = self.serving[self.mask(court_type, court_name, party)]
+        return np.asarray(serving.sum(axis=0)).ravel()
+
+    def serving_nids(self, year, court_type=None, court_name=None, party=None):
+        """Sorted `nid` of every appointment serving in `year`, once per appointment."""
+        column = self.serving[:, self.years.index(year)].toarray().ravel().astype(bool)
+        return np.sort(
+            self.appointment_nids[column & self.mask(court_type, court_name, party)]).tolist()
+
+    def school_counts(self, court_type=None, court_name=None, party=None, degree=None):
+        """year x school matrix of educations of the serving judges, only counting `degree`
+        if given.
+        """
+        mask = self.mask(court_type, court_name, party)
+        return (self.serving[mask].T @ self._get_appointment_schools(degree)[mask]).tocsr()
+
+    def degree_counts(self, court_type=None, court_name=None, party=None):
+        """year x degree matrix of educations of the serving judges."""
+        mask = self.mask(court_type, court_name, party)
+        return (self.serving[mask].T @ (self.judges[mask] @ self.judge_degrees)).tocsr()
+
+    def school_counts_by_year(self, court_type=None, court_name=None, party=None, degree=None):
+        """`{year: [(school, count), ...]}` of the non zero school counts."""
+        counts = self.school_counts(court_type, court_name, party, degree)
+        return {
+            year: [
+                (self.schools[school], int(count)) for school, count in zip(
+                    counts.indices[counts.indptr[i]:counts.indptr[i + 1]],
+                    counts.data[counts.indptr[i]:counts.indptr[i + 1]],
+                )
+            ]
+            for i, year in enumerate(self.years)
+        }
+
+    def _get_appointment_schools(self, degree):
+        degree = _normalize_degree(degree) if degree else None
+        if degree not in self._appointment_schools:
+            if degree in self.degrees:
+                keep = self._degree_columns == self.degrees.index(degree)
+            else:
+                keep = np.zeros(len(self._degree_columns), dtype=bool)
+            judge_schools = _incidence(
+                self._education_rows[keep], self._school_columns[keep],
+                (len(self.nids), len(self.schools)))
+            self._appointment_schools[degree] = (self.judges @ judge_schools).tocsr()
+        return self._appointment_schools[degree]
+
+
+def _normalize_degree(degree):
+    return degree.lower() if degree else degree
+
+
+def _incidence(rows, columns, shape):
+    """Sparse count matrix with a 1 for every `(row, column)`, summing repeats."""
+    rows = np.asarray(rows, dtype=np.int64)
+    return sparse.coo_matrix(
+        (np.ones(len(rows), dtype=np.int64), (rows, np.asarray(columns, dtype=np.int64))),
+        shape=shape,
+    ).tocsr()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from collections import OrderedDict
+
+
+class FigureCache:
+    """Bounded LRU cache of serialized figures with an optional TTL.
+
+    Every entry belongs to the data version returned by `version_getter`, the whole cache is
+    dropped as soon as that version changes.
+    """
+
+    def __init__(self, maxsize=256, ttl=None, version_getter=None):
+        self.maxsize = maxsize
+        self.ttl = ttl or None
+        self.version_getter = version_getter or (lambda: None)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+
+    def get_or_render(self, key, render):
+        """Cached value for `key`, otherwise the result of `render()` which is then cached."""
+        version = self.version_getter()
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Rendered outside the lock so one slow render does not block every other key
+        value = render()
+        with self._lock:
+            if version == self._version:
+                self._entries[key] = (time.monotonic(), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _expired(self, entry):
+        return self.ttl is not None and time.monotonic() - entry[0] > self.ttl
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""On-disk store of figures rendered ahead of time by `scripts/prerender_figures.py`, shared by
+every app process and kept across restarts.
+"""
+import json
+import os
+import sqlite3
+import threading
+
+from config import app_cfg
+
+FIGURE_STORE_PATH = os.getenv('FIGURE_STORE_PATH', './data/figures.sqlite')
+
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS figure (
+        data_version TEXT NOT NULL,
+        key TEXT NOT NULL,
+        figure TEXT NOT NULL,
+        PRIMARY KEY (data_version, key)
+    )
+"""
+
+
+def figure_key(graph, court_type_select=None, court_name_select=None):
+    """Key of the figure of `graph` for one court type and court name, either can be None. The
+    settings the figure is drawn with are part of the key, so a figure rendered with other
+    settings is never served.
+    """
+    return json.dumps([
+        graph, court_type_select or None, court_name_select or None, get_render_options(graph)])
+
+
+def get_render_options(graph):
+    if graph == 'wait-time':
+        return {'precompute_boxes': app_cfg['precompute_wait_time_boxes']}
+    return {}
+
+
+class FigureStore:
+    """Serialized figures keyed by data version and `figure_key`, in SQLite.
+
+    Readers open the file read only, one connection per thread, so app processes and their
+    threads look figures up while a new data version is written next to the current one.
+    """
+
+    def __init__(self, path=FIGURE_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def get(self, data_version, key):
+        """The figure stored for `key` in `data_version`, as a dict, or None."""
+        if data_version is None or not os.path.exists(self.path):
+            return None
+        try:
+            row = self._get_connection().execute(
+                'SELECT figure FROM figure WHERE data_version = ? AND key = ?',
+                (data_version, key),
+            ).fetchone()
+        except sqlite3.OperationalError:
+            # Nothing committed to the store yet
+            return None
+        return None if row is None else json.loads(row[0])
+
+    def write(self, data_version, figures):
+        """Stores `(key, figure_json)` pairs for `data_version`, then drops every other data
+        version once it is committed.
+        """
+        connection = sqlite3.connect(self.path)
+        try:
+            # Readers keep reading the previous version while this one is written
+            connection.execute('PRAGMA journal_mode=WAL')
+            with connection:
+                connection.execute(CREATE_TABLE)
+                connection.executemany(
+                    'INSERT OR REPLACE INTO figure (data_version, key, figure) VALUES (?, ?, ?)',
+                    ((data_version, key, figure) for key, figure in figures),
+                )
+            with connection:
+                connection.execute('DELETE FROM figure WHERE data_version != ?', (data_version,))
+        finally:
+            connection.close()
+
+    def _get_connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+            self._local.connection = connection
+        return connection
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+import datetime
+from bisect import bisect_right
+from collections import defaultdict, namedtuple
+
+from count_cube import filter_keys
+
+# An appointment serves from `start_date` up to, not including, `end_date`
+Interval = namedtuple(
+    'Interval', ['nid', 'court_type', 'court_name', 'party', 'start_date', 'end_date'])
+
+# Congresses start on January 3rd of odd years since the 20th Amendment
+CONGRESS_START_DAY = (1, 3)
+
+
+class _Node:
+    __slots__ = ('center', 'by_start', 'by_end', 'left', 'right')
+
+
+class IntervalTree:
+    """Static centered interval tree answering which intervals contain a date in O(log n + k).
+
+    Every node keeps the intervals containing its center sorted both by start and by end, so a
+    query reports from one of the two lists until the first interval that misses, then descends
+    to the side of the center the date is on.
+    """
+
+    def __init__(self, intervals):
+        self.size = len(intervals)
+        self._root = self._build(intervals)
+
+    def _build(self, intervals):
+        if not intervals:
+            return None
+        node = _Node()
+        # The median start keeps both children at most half the size
+        node.center = sorted(interval.start_date for interval in intervals)[len(intervals) // 2]
+
+        here, left, right = [], [], []
+        for interval in intervals:
+            if _end(interval) <= node.center:
+                left.append(interval)
+            elif interval.start_date > node.center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        node.by_start = sorted(here, key=lambda interval: interval.start_date)
+        node.by_end = sorted(here, key=_end, reverse=True)
+        node.left = self._build(left)
+        node.right = self._build(right)
+        return node
+
+    def at(self, date):
+        """Every interval with `start_date <= date < end_date`."""
+        found = []
+        node = self._root
+        while node is not None:
+            if date < node.center:
+                for interval in node.by_start:
+                    if interval.start_date > date:
+                        break
+                    found.append(interval)
+                node = node.left
+            else:
+                for interval in node.by_end:
+                    if _end(interval) <= date:
+                        break
+                    found.append(interval)
+                node = node.right
+        return found
+
+
+def _end(interval):
+    return datetime.date.max if interval.end_date is None else interval.end_date
+
+
+# Filters matching no appointment
+EMPTY_TREE = IntervalTree([])
+
+
+class AppointmentIntervalIndex:
+    """Who was serving on any date, for any court filter, without a range join against the two
+    year `year_party` grid.
+
+    `composition_at` answers from an `IntervalTree` per filter. `series` sweeps the sorted start
+    and end dates of every party, so each point of a yearly, monthly or per congress timeline is
+    a binary search. Both are built for every filter up front, with the rest of the shared data,
+    so request threads only ever read them.
+    """
+
+    def __init__(self, appointments, congress_start_years=()):
+        self.parties = set()
+        self._intervals = defaultdict(list)
+        for appointment in appointments:
+            interval = Interval(*appointment)
+            # Bad data can end before it starts, which is never serving
+            if interval.start_date is None or _end(interval) <= interval.start_date:
+                continue
+            self.parties.add(interval.party)
+            for key in filter_keys(interval.court_type, interval.court_name):
+                self._intervals[key].append(interval)
+        self.parties = sorted(self.parties, key=lambda party: (party is None, party))
+        self.congress_start_years = sorted(congress_start_years)
+
+        self._trees = {key: IntervalTree(intervals) for key, intervals in self._intervals.items()}
+        self._sweeps = {key: _sweep(intervals) for key, intervals in self._intervals.items()}
+
+    @classmethod
+    def from_session(cls, session):
+        from models import Appointment, Congress
+
+        appointments = (
+            session
+            .query(
+                Appointment.nid,
+                Appointment.court_type,
+                Appointment.court_name,
+                Appointment.party_of_appointing_president,
+                Appointment.start_date,
+                Appointment.end_date,
+            )
+            .filter(Appointment.start_date.isnot(None))
+        )
+        congress_start_years = [year for year, in session.query(Congress.start_year)]
+        return cls(appointments, congress_start_years)
+
+    def composition_at(self, date, court_type_select=None, court_name_select=None):
+        """The `Interval` of every appointment serving on `date` in the selected courts."""
+        key = (court_type_select or None, court_name_select or None)
+        return self._trees.get(key, EMPTY_TREE).at(date)
+
+    def party_counts_at(self, date, court_type_select=None, court_name_select=None):
+        counts = defaultdict(int)
+        for interval in self.composition_at(date, court_type_select, court_name_select):
+            counts[interval.party] += 1
+        return counts
+
+    def series(self, granularity='year', court_type_select=None, court_name_select=None):
+        """Number of judges serving at the start of every year, month or congress, as
+        `(party_counts_dict, dates)` with `party_counts_dict[party]['n_judges']` aligned with
+        `dates`, like `CountCube.line_graph_data`.
+        """
+        sweep = self._sweeps.get((court_type_select or None, court_name_select or None), {})
+
+        dates = self.dates(granularity)
+        party_counts_dict = defaultdict(lambda: defaultdict(list))
+        for party in self.parties:
+            starts, ends = sweep.get(party, ([], []))
+            party_counts_dict[party]['n_judges'] = [
+                bisect_right(starts, date) - bisect_right(ends, date) for date in dates
+            ]
+        return party_counts_dict, dates
+
+    def dates(self, granularity='year'):
+        """The first day of every year, month or congress the appointments span."""
+        all_intervals = self._intervals.get((None, None), [])
+        if not all_intervals:
+            return []
+        first = min(interval.start_date for interval in all_intervals)
+        end_dates = [interval.end_date for interval in all_intervals if interval.end_date]
+        # Anyone still serving runs the timeline up to today
+        if len(end_dates) < len(all_intervals):
+            last = datetime.date.today()
+        else:
+            last = max(end_dates)
+
+        if granularity == 'year':
+            return [datetime.date(year, 1, 1) for year in range(first.year, last.year + 1)]
+        if granularity == 'month':
+            return [
+                datetime.date(year, month, 1)
+                for year in range(first.year, last.year + 1)
+                for month in range(1, 13)
+                if (year, month) >= (first.year, first.month)
+                and (year, month) <= (last.year, last.month)
+            ]
+        if granularity == 'congress':
+            return [
+                datetime.date(year, *CONGRESS_START_DAY) for year in self.congress_start_years
+            ]
+        raise ValueError(f'Unknown granularity {granularity!r}, use year, month or congress')
+
+
+def _sweep(intervals):
+    """party -> (sorted start dates, sorted end dates)"""
+    starts = defaultdict(list)
+    ends = defaultdict(list)
+    for interval in intervals:
+        starts[interval.party].append(interval.start_date)
+        if interval.end_date is not None:
+            ends[interval.party].append(interval.end_date)
+    return {party: (sorted(starts[party]), sorted(ends[party])) for party in starts}
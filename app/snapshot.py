@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Snapshot of everything the app needs to start serving, written by `scripts/load_data.py` for
+each data version so a new app process does not have to wait on the database.
+"""
+import os
+import pickle
+from collections import OrderedDict
+
+SNAPSHOT_PATH = os.getenv('SNAPSHOT_PATH', './data/snapshot.pickle')
+
+
+def build_snapshot(session, data_version):
+    from bitmap_index import AppointmentBitmaps
+    from clientside_data import get_clientside_data
+    from count_cube import CountCube
+    from interval_index import AppointmentIntervalIndex
+
+    court_type_name = query_court_type_name(session)
+    count_cube = CountCube.from_session(session)
+    return {
+        'data_version': data_version,
+        'court_type_name': court_type_name,
+        'count_cube': count_cube,
+        'clientside_data': get_clientside_data(session, count_cube, court_type_name),
+        'appointment_bitmaps': AppointmentBitmaps.from_session(session),
+        'interval_index': AppointmentIntervalIndex.from_session(session),
+    }
+
+
+def query_court_type_name(session):
+    from sqlalchemy import sql
+    from metrics import tag_query
+    from models import Court
+
+    return OrderedDict(
+        (x[0], x[1]) for x in tag_query(
+            session
+            .query(Court.court_type, sql.func.array_agg(Court.court_name))
+            .group_by(Court.court_type)
+            .order_by(Court.court_type),
+            'court_type_name',
+        )
+    )
+
+
+def write_snapshot(snapshot, path=SNAPSHOT_PATH):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    # Atomic so a starting app never reads a half written file
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path=SNAPSHOT_PATH):
+    """The snapshot at `path`, or None if there is none."""
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except (FileNotFoundError, EOFError):
+        # EOFError is an empty file
+        return None
+
+
+def publish_data_version():
+    """Writes the snapshot of a new data version, then the stamp that points running apps at it.
+    Call after the load has been committed.
+    """
+    from data_version import new_data_version, write_data_version
+    from database_utils import get_session
+
+    data_version = new_data_version()
+    with get_session() as session:
+        write_snapshot(build_snapshot(session, data_version))
+    write_data_version(data_version)
+    return data_version
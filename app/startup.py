@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+import time
+
+
+class StartupTimings:
+    """Seconds from process start to each named startup phase, printed once the first request
+    has been answered so cold starts can be compared between deploys.
+    """
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self._last = self._start
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last, now - self._start))
+        self._last = now
+
+    def report(self):
+        lines = ['Startup timings:']
+        for phase, seconds, total in self.phases:
+            lines.append(f'  {phase:<24} {seconds * 1000:8.1f}ms  (total {total * 1000:8.1f}ms)')
+        return '\n'.join(lines)
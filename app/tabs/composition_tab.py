@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+from itertools import product
+
+import plotly.graph_objs as go
+
+from constants import party_colors
+
+
+def update_composition_graph(
+        interval_index, date, granularity, court_type_select, court_name_select):
+    """Judges serving at the start of every year, month or congress, with the composition on
+    `date` marked. Both selects are sequences of values, matching any of them, and empty for
+    every court.
+    """
+    party_counts_dict, dates = get_composition_series(
+        interval_index, granularity, court_type_select, court_name_select)
+    party_counts = get_composition_at(
+        interval_index, date, court_type_select, court_name_select)
+    return get_composition_figure(party_counts_dict, dates, date, party_counts)
+
+
+def get_composition_figure(party_counts_dict, dates, date, party_counts):
+    fig = go.Figure()
+
+    for party, counts_dict in party_counts_dict.items():
+        fig.add_trace(
+            go.Scatter(
+                x=dates,
+                y=counts_dict['n_judges'],
+                marker={'color': party_colors.get(party)},
+                name=party or 'Unknown',
+                mode='lines',
+            )
+        )
+
+    summary = ', '.join(
+        f'{party or "Unknown"}: {count}' for party, count in sorted(
+            party_counts.items(), key=lambda party_count: -party_count[1]))
+    fig.update_layout(
+        shapes=[{
+            'type': 'line', 'xref': 'x', 'yref': 'paper',
+            'x0': date, 'x1': date, 'y0': 0, 'y1': 1,
+            'line': {'color': 'black', 'width': 1, 'dash': 'dot'},
+        }],
+        title={'text': f'Serving on {date:%B} {date.day}, {date.year}: {summary or "nobody"}'},
+        xaxis={'showticklabels': True},
+        yaxis={'title': 'Number of Judges'},
+        hovermode='x',
+    )
+    return fig
+
+
+def get_composition_series(interval_index, granularity, court_type_select, court_name_select):
+    """`AppointmentIntervalIndex.series` summed over every selected court type and court name,
+    which select disjoint appointments.
+    """
+    party_counts_dict = defaultdict(lambda: defaultdict(list))
+    dates = interval_index.dates(granularity)
+    for court_type, court_name in _court_keys(court_type_select, court_name_select):
+        court_counts_dict, _ = interval_index.series(granularity, court_type, court_name)
+        for party, counts_dict in court_counts_dict.items():
+            totals = party_counts_dict[party]['n_judges'] or [0] * len(dates)
+            party_counts_dict[party]['n_judges'] = [
+                total + count for total, count in zip(totals, counts_dict['n_judges'])]
+    return party_counts_dict, dates
+
+
+def get_composition_at(interval_index, date, court_type_select, court_name_select):
+    """`{party: n_judges}` serving on `date` in any of the selected courts."""
+    party_counts = defaultdict(int)
+    for court_type, court_name in _court_keys(court_type_select, court_name_select):
+        for party, count in interval_index.party_counts_at(date, court_type, court_name).items():
+            party_counts[party] += count
+    return party_counts
+
+
+def _court_keys(court_type_select, court_name_select):
+    return product(court_type_select or [None], court_name_select or [None])
@@ -2,15 +2,27 @@
 from collections import defaultdict
 
 import plotly.graph_objs as go
-from sqlalchemy import sql
+from sqlalchemy import Integer, sql
+from sqlalchemy.dialects.postgresql import array
 
-from constants import party_colors
-from models import Appointment, YearParty
+from constants import party_colors, start_year
+from metrics import tag_query
+from models import Appointment, CourtYearPartyCount, YearParty
 
+# Years in a `year_party` bucket, the buckets start at `constants.start_year`
+BUCKET_YEARS = 2
 
-def update_line_graph(session, court_type_select, court_name_select):
-    party_counts_dict, years = get_line_graph_data(session, court_type_select, court_name_select)
 
+def update_line_graph(session, court_type_select, court_name_select, count_cube=None):
+    if count_cube is not None:
+        party_counts_dict, years = count_cube.line_graph_data(court_type_select, court_name_select)
+    else:
+        party_counts_dict, years = get_line_graph_data(
+            session, court_type_select, court_name_select)
+    return get_line_graph_figure(party_counts_dict, years)
+
+
+def get_line_graph_figure(party_counts_dict, years):
     fig = go.Figure()
 
     for party, counts_dict in party_counts_dict.items():
@@ -48,7 +60,58 @@ def update_line_graph(session, court_type_select, court_name_select):
     return fig
 
 
-def get_line_graph_data(session, court_type_select, court_name_select):
+def get_line_graph_data(session, court_type_select, court_name_select, engine='summary'):
+    """`engine` picks the query from `LINE_GRAPH_QUERIES`, 'summary' reads the pre-aggregated
+    `court_year_party_count` table, 'joins' and 'window' aggregate `appointment` directly.
+    """
+    full_query = LINE_GRAPH_QUERIES[engine](session, court_type_select, court_name_select)
+
+    party_counts_dict = defaultdict(lambda: defaultdict(list))
+    years = set()  # set because of dups
+    for row in full_query:
+        years.add(row.year)
+        party_counts_dict[row.party]['n_judges'].append(row.n_judges)
+        party_counts_dict[row.party]['n_appointed'].append(row.n_appointed)
+        party_counts_dict[row.party]['n_terminated'].append(row.n_terminated)
+    return party_counts_dict, sorted(years)
+
+
+def get_summary_counts_query(session, court_type_select=None, court_name_select=None):
+    join_conditions = [
+        CourtYearPartyCount.year == YearParty.year,
+        CourtYearPartyCount.party == YearParty.party,
+    ]
+
+    if court_type_select:
+        join_conditions.append(CourtYearPartyCount.court_type.in_([court_type_select]))
+
+    if court_name_select:
+        join_conditions.append(CourtYearPartyCount.court_name.in_([court_name_select]))
+
+    def _total(column):
+        return sql.cast(sql.func.coalesce(sql.func.sum(column), 0), Integer)
+
+    # Outer join from `year_party` so years where a party has no judges in the court are zeros
+    return tag_query(
+        session
+        .query(
+            YearParty.year,
+            YearParty.party,
+            _total(CourtYearPartyCount.n_judges).label('n_judges'),
+            _total(CourtYearPartyCount.n_appointed).label('n_appointed'),
+            _total(CourtYearPartyCount.n_terminated).label('n_terminated'),
+        )
+        .outerjoin(
+            CourtYearPartyCount,
+            sql.and_(*join_conditions)
+        )
+        .group_by(YearParty.year, YearParty.party)
+        .order_by(YearParty.year),
+        'get_summary_counts_query',
+    )
+
+
+def get_joined_counts_query(session, court_type_select=None, court_name_select=None):
     start_query = (
         get_start_count_query(session, court_type_select, court_name_select)
         .subquery('start_query')
@@ -61,7 +124,7 @@ def get_line_graph_data(session, court_type_select, court_name_select):
         .subquery('count_query')
     )
 
-    full_query = (
+    return tag_query(
         session
         .query(
             count_query.c.year,
@@ -84,18 +147,10 @@ def get_line_graph_data(session, court_type_select, court_name_select):
                 end_query.c.party == count_query.c.party,
             )
         )
-        .order_by(count_query.c.year)
+        .order_by(count_query.c.year),
+        'get_joined_counts_query',
     )
 
-    party_counts_dict = defaultdict(lambda: defaultdict(list))
-    years = set()  # set because of dups
-    for row in full_query:
-        years.add(row.year)
-        party_counts_dict[row.party]['n_judges'].append(row.n_judges)
-        party_counts_dict[row.party]['n_appointed'].append(row.n_appointed)
-        party_counts_dict[row.party]['n_terminated'].append(row.n_terminated)
-    return party_counts_dict, sorted(years)
-
 
 def get_judge_count_query(session, court_type_select=None, court_name_select=None):
     join_conditions = [
@@ -116,7 +171,7 @@ def get_judge_count_query(session, court_type_select=None, court_name_select=Non
     if court_name_select:
         join_conditions.append(Appointment.court_name.in_([court_name_select]))
 
-    return (
+    return tag_query(
         session
         .query(
             YearParty.year,
@@ -128,7 +183,8 @@ def get_judge_count_query(session, court_type_select=None, court_name_select=Non
             sql.and_(*join_conditions)
         )
         .group_by(YearParty.year, YearParty.party)
-        .order_by(YearParty.year)
+        .order_by(YearParty.year),
+        'get_judge_count_query',
     )
 
 
@@ -148,7 +204,7 @@ def get_start_count_query(session, court_type_select=None, court_name_select=Non
     if court_name_select:
         join_conditions.append(Appointment.court_name.in_([court_name_select]))
 
-    return (
+    return tag_query(
         session
         .query(
             YearParty.year,
@@ -160,7 +216,8 @@ def get_start_count_query(session, court_type_select=None, court_name_select=Non
             sql.and_(*join_conditions)
         )
         .group_by(YearParty.year, YearParty.party)
-        .order_by(YearParty.year)
+        .order_by(YearParty.year),
+        'get_start_count_query',
     )
 
 
@@ -180,7 +237,7 @@ def get_end_count_query(session, court_type_select=None, court_name_select=None)
     if court_name_select:
         join_conditions.append(Appointment.court_name.in_([court_name_select]))
 
-    return (
+    return tag_query(
         session
         .query(
             YearParty.year,
@@ -192,5 +249,95 @@ def get_end_count_query(session, court_type_select=None, court_name_select=None)
             sql.and_(*join_conditions)
         )
         .group_by(YearParty.year, YearParty.party)
-        .order_by(YearParty.year)
+        .order_by(YearParty.year),
+        'get_end_count_query',
+    )
+
+
+def get_window_counts_query(session, court_type_select=None, court_name_select=None):
+    """Same rows as `get_joined_counts_query` from a single scan of `appointment`.
+
+    Every appointment is unnested into a start event in the bucket of its start year and an end
+    event in the bucket of `end_year + BUCKET_YEARS`, the first bucket it no longer serves in.
+    Events are counted per (party, bucket) with `FILTER` aggregates, and the number of judges
+    serving is the running sum of the start and end events, as a window over `year_party`. Events
+    before the first bucket are folded into it, so the running sum starts from everyone already
+    serving. Appointments ending more than a bucket before they start never serve, as in the
+    range join, and add nothing to the running sum.
+    """
+    filters = [Appointment.start_year.isnot(None)]
+
+    if court_type_select:
+        filters.append(Appointment.court_type.in_([court_type_select]))
+
+    if court_name_select:
+        filters.append(Appointment.court_name.in_([court_name_select]))
+
+    served = sql.or_(
+        Appointment.end_year.is_(None),
+        Appointment.end_year >= Appointment.start_year - BUCKET_YEARS,
+    )
+    # Both unnests advance together, one row per event
+    events = (
+        session
+        .query(
+            Appointment.party_of_appointing_president.label('party'),
+            sql.func.unnest(
+                array([Appointment.start_year, Appointment.end_year + BUCKET_YEARS])
+            ).label('event_year'),
+            sql.func.unnest(array([sql.true(), sql.false()])).label('is_start'),
+            served.label('served'),
+        )
+        .filter(*filters)
+        .subquery('events')
+    )
+
+    # Integer division, anything before the first bucket is clamped to it
+    bucket = sql.func.greatest(
+        start_year,
+        start_year + (events.c.event_year - start_year) / BUCKET_YEARS * BUCKET_YEARS,
+    )
+    in_buckets = events.c.event_year >= start_year
+    counts = (
+        session
+        .query(
+            events.c.party,
+            bucket.label('year'),
+            sql.func.count().filter(sql.and_(events.c.is_start, in_buckets))
+            .label('n_appointed'),
+            sql.func.count().filter(sql.and_(sql.not_(events.c.is_start), in_buckets))
+            .label('n_terminated'),
+            sql.func.sum(sql.case([(events.c.is_start, 1)], else_=-1)).filter(events.c.served)
+            .label('n_serving_change'),
+        )
+        # No end event for judges still serving
+        .filter(events.c.event_year.isnot(None))
+        .group_by(events.c.party, bucket)
+        .subquery('counts')
+    )
+
+    n_judges = sql.func.sum(sql.func.coalesce(counts.c.n_serving_change, 0)).over(
+        partition_by=YearParty.party, order_by=YearParty.year)
+    return tag_query(
+        session
+        .query(
+            YearParty.year,
+            YearParty.party,
+            sql.cast(n_judges, Integer).label('n_judges'),
+            sql.cast(sql.func.coalesce(counts.c.n_appointed, 0), Integer).label('n_appointed'),
+            sql.cast(sql.func.coalesce(counts.c.n_terminated, 0), Integer).label('n_terminated'),
+        )
+        .outerjoin(
+            counts,
+            sql.and_(counts.c.year == YearParty.year, counts.c.party == YearParty.party)
+        )
+        .order_by(YearParty.year),
+        'get_window_counts_query',
     )
+
+
+LINE_GRAPH_QUERIES = {
+    'summary': get_summary_counts_query,
+    'joins': get_joined_counts_query,
+    'window': get_window_counts_query,
+}
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import plotly.graph_objs as go
+from sqlalchemy import sql
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+from constants import party_colors, start_year
+from metrics import tag_query
+from models import UnsuccessfulNominationCount
+
+
+def update_unconfirmed_graph(session, court_type_select, court_name_select):
+    fig = go.Figure()
+
+    for president, party, years, counts in get_unconfirmed_query(
+            session, court_type_select, court_name_select):
+        fig.add_trace(
+            go.Bar(
+                x=years,
+                y=counts,
+                name=president,
+                marker_color=party_colors.get(party),
+            )
+        )
+
+    fig.update_layout(
+        barmode='stack',
+        xaxis={'showticklabels': True},
+        yaxis={'title': 'Unconfirmed Nominations'},
+    )
+    return fig
+
+
+def get_unconfirmed_query(session, court_type_select, court_name_select):
+    """Unconfirmed nominations per congress of every president, from the pre-aggregated
+    `unsuccessful_nomination_count` table. Both selects are sequences of values, matching any of
+    them, and empty for every court.
+    """
+    filters = [UnsuccessfulNominationCount.congress_start_year >= start_year]
+
+    if court_type_select:
+        filters.append(UnsuccessfulNominationCount.court_type.in_(court_type_select))
+
+    if court_name_select:
+        filters.append(UnsuccessfulNominationCount.court_name.in_(court_name_select))
+
+    counts = (
+        session
+        .query(
+            UnsuccessfulNominationCount.congress_start_year,
+            UnsuccessfulNominationCount.president,
+            UnsuccessfulNominationCount.party,
+            sql.func.sum(UnsuccessfulNominationCount.n_nominations).label('n_nominations'),
+        )
+        .filter(*filters)
+        .group_by(
+            UnsuccessfulNominationCount.congress_start_year,
+            UnsuccessfulNominationCount.president,
+            UnsuccessfulNominationCount.party,
+        )
+        .subquery('counts')
+    )
+
+    unconfirmed_query = (
+        session
+        .query(
+            counts.c.president,
+            counts.c.party,
+            sql.func.array_agg(
+                aggregate_order_by(counts.c.congress_start_year, counts.c.congress_start_year)
+            ).label('start_years'),
+            sql.func.array_agg(
+                aggregate_order_by(counts.c.n_nominations, counts.c.congress_start_year)
+            ).label('n_nominations'),
+        )
+        .group_by(counts.c.president, counts.c.party)
+        .order_by(sql.func.min(counts.c.congress_start_year))
+    )
+    return tag_query(unconfirmed_query, 'get_unconfirmed_query')
@@ -1,17 +1,34 @@
 # -*- coding: utf-8 -*-
+import numpy as np
 import plotly.graph_objs as go
 from sqlalchemy import sql
 
 from constants import party_colors
-from models import Appointment, Congress
+from metrics import tag_query
+from models import Appointment, Congress, CongressWaitTime
 
 
-def update_wait_time_graph(session, court_type_select, court_name_select):
-    wait_time_query = get_wait_time_query(session, court_type_select, court_name_select)
+def update_wait_time_graph(
+        session, court_type_select, court_name_select, engine='summary', precompute_boxes=False):
+    """With `precompute_boxes` the box statistics are computed here and only those, plus the
+    outliers, are sent to the browser instead of every wait time.
+    """
+    wait_time_query = WAIT_TIME_QUERIES[engine](session, court_type_select, court_name_select)
+    return get_wait_time_figure(wait_time_query.all(), precompute_boxes)
 
+
+def get_wait_time_figure(wait_time_rows, precompute_boxes=False):
+    """`wait_time_rows` are `(president, party, start_years, days_to_confirm)`, a box per
+    president.
+    """
     fig = go.Figure()
 
-    for president, party, years, wait_times in wait_time_query.all():
+    for president, party, years, wait_times in wait_time_rows:
+        if precompute_boxes:
+            for trace in get_precomputed_box_traces(president, party, years, wait_times):
+                fig.add_trace(trace)
+            continue
+
         fig.add_trace(
             go.Box(
                 y=wait_times,
@@ -29,13 +46,84 @@ def update_wait_time_graph(session, court_type_select, court_name_select):
     return fig
 
 
+def get_precomputed_box_traces(president, party, years, wait_times):
+    """A box per year with the statistics Plotly would compute from the raw wait times, and the
+    outliers as a scatter since a precomputed box draws no points.
+    """
+    stats = get_box_stats(years, wait_times)
+    color = party_colors.get(party)
+
+    box = go.Box(
+        x=stats['x'],
+        q1=stats['q1'],
+        median=stats['median'],
+        q3=stats['q3'],
+        lowerfence=stats['lowerfence'],
+        upperfence=stats['upperfence'],
+        mean=stats['mean'],
+        name=president,
+        legendgroup=president,
+        marker_color=color,
+    )
+    outlier_scatter = go.Scatter(
+        x=stats['outlier_x'],
+        y=stats['outliers'],
+        mode='markers',
+        name=president,
+        legendgroup=president,
+        showlegend=False,
+        marker_color=color,
+    )
+    return [box, outlier_scatter]
+
+
+def get_box_stats(groups, values):
+    """Box statistics of `values` for every distinct group, in group order, computed as Plotly
+    does by default: 'linear' quartiles interpolated at position `n * q - 0.5` of the sorted
+    values, and fences at the furthest values within 1.5 IQR of the box, never inside it.
+    """
+    groups = np.asarray(groups)
+    values = np.asarray(values, dtype=np.float64)
+    order = np.lexsort((values, groups))
+    groups = groups[order]
+    values = values[order]
+    box_groups, starts, counts = np.unique(groups, return_index=True, return_counts=True)
+
+    q1, median, q3 = (_quantile(values, starts, counts, q) for q in (0.25, 0.5, 0.75))
+    lower_limit = np.repeat(q1 - 1.5 * (q3 - q1), counts)
+    upper_limit = np.repeat(q3 + 1.5 * (q3 - q1), counts)
+    inliers = (lower_limit <= values) & (values <= upper_limit)
+    return {
+        'x': box_groups.tolist(),
+        'q1': q1.tolist(),
+        'median': median.tolist(),
+        'q3': q3.tolist(),
+        'lowerfence': np.minimum(
+            q1, np.minimum.reduceat(np.where(inliers, values, np.inf), starts)).tolist(),
+        'upperfence': np.maximum(
+            q3, np.maximum.reduceat(np.where(inliers, values, -np.inf), starts)).tolist(),
+        'mean': (np.add.reduceat(values, starts) / counts).tolist(),
+        'outlier_x': groups[~inliers].tolist(),
+        'outliers': values[~inliers].tolist(),
+    }
+
+
+def _quantile(sorted_values, starts, counts, q):
+    """Plotly's `Lib.interp` of every group of `sorted_values` at once."""
+    position = np.clip(counts * q - 0.5, 0, counts - 1)
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, counts - 1)
+    fraction = position - lower
+    return (
+        sorted_values[starts + lower] * (1 - fraction)
+        + sorted_values[starts + upper] * fraction
+    )
+
+
 def get_wait_time_query(session, court_type_select, court_name_select):
     join_conditions = [
-        # Join condition for if the judge was serving that year
-        sql.and_(
-            sql.func.date_part('year', Appointment.nomination_date) >= Congress.start_year,
-            sql.func.date_part('year', Appointment.nomination_date) < Congress.end_year,
-        )
+        # Congress the judge was nominated in, resolved when loading
+        Congress.title == Appointment.congress_title,
     ]
 
     if court_type_select:
@@ -59,4 +147,46 @@ def get_wait_time_query(session, court_type_select, court_name_select):
         .group_by(Congress.president, Congress.party_of_president)
         .order_by(sql.func.min(Congress.start_year))
     )
-    return wait_time_query
+    return tag_query(wait_time_query, 'get_wait_time_query')
+
+
+def get_summary_wait_time_query(session, court_type_select, court_name_select):
+    """Same rows as `get_wait_time_query` from the pre-aggregated `congress_wait_time` table."""
+    filters = []
+
+    if court_type_select:
+        filters.append(CongressWaitTime.court_type.in_([court_type_select]))
+
+    if court_name_select:
+        filters.append(CongressWaitTime.court_name.in_([court_name_select]))
+
+    wait_times = (
+        session
+        .query(
+            CongressWaitTime.congress_start_year,
+            CongressWaitTime.president,
+            CongressWaitTime.party,
+            sql.func.unnest(CongressWaitTime.days_to_confirm).label('days_to_confirm'),
+        )
+        .filter(*filters)
+        .subquery('wait_times')
+    )
+
+    wait_time_query = (
+        session
+        .query(
+            wait_times.c.president,
+            wait_times.c.party,
+            sql.func.array_agg(wait_times.c.congress_start_year).label('start_years'),
+            sql.func.array_agg(wait_times.c.days_to_confirm).label('days_to_confirm')
+        )
+        .group_by(wait_times.c.president, wait_times.c.party)
+        .order_by(sql.func.min(wait_times.c.congress_start_year))
+    )
+    return tag_query(wait_time_query, 'get_summary_wait_time_query')
+
+
+WAIT_TIME_QUERIES = {
+    'summary': get_summary_wait_time_query,
+    'joins': get_wait_time_query,
+}
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""WSGI entry point for gunicorn, see `gunicorn.conf.py`:
+
+    gunicorn -c gunicorn.conf.py 'wsgi:create_app()'
+"""
+import gc
+import sys
+
+
+def create_app():
+    """The Flask server of the Dash app, with everything it serves from memory already loaded.
+
+    With `preload_app` this runs once in the gunicorn master, so the court lists, count cube and
+    bitmap index are shared copy-on-write by every worker forked from it instead of being loaded
+    by each of them.
+    """
+    from app.app import app, load_shared_data, startup_timings
+
+    load_shared_data()
+    startup_timings.mark('load shared data')
+
+    # Connections opened by the master, when there was no snapshot, must not be inherited by the
+    # workers, two processes would then talk over the same socket
+    if 'database_utils' in sys.modules:
+        sys.modules['database_utils'].engine.dispose()
+
+    # Keeps the loaded objects out of the collector, whose bookkeeping writes would otherwise copy
+    # every page they are on into each worker
+    gc.freeze()
+    return app.server
@@ -0,0 +1,351 @@
+"""Checks the plans Postgres picks for the dashboard queries against a throwaway database filled
+with a synthetic export, so a schema or query change cannot quietly turn an index lookup into
+a sequential scan repeated for every row of an outer loop.
+
+    PYTHONPATH=.:app:scripts python -m benchmarks.query_plans --scale 10 --output plans.json
+
+Every query of `QUERIES` runs under `EXPLAIN (ANALYZE, BUFFERS, VERBOSE, FORMAT JSON)` for every
+filter shape of `run_benchmarks.get_filter_combinations`, and its plan is checked for:
+
+    budget       execution time and shared buffers within `BUDGETS`, scaled by `--scale`
+    index        the `appointment` rows of a court name filter, or of a court type filter that
+                 discards most of them, are read through an index
+    seq loop     no sequential scan reading more than `--max-loop-rows` rows over its loops
+    estimate     no node whose row estimate is off by more than `--max-misestimate` times
+
+Sequential scans discarding most of what they read get a composite index proposal, with the
+columns they output as `INCLUDE` so it covers them. Like `run_benchmarks`, the database is
+dropped and recreated unless `--skip-load` is given, and `--compare` with an earlier output
+flags plans reading more buffers than the tolerance allows. Exits non-zero on any violation.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+
+os.environ.setdefault('POSTGRES_DB', 'courts_bench')
+
+from sqlalchemy.dialects import postgresql  # noqa: E402
+
+from database_utils import db_cfg, get_request_session, get_session, recreate_db  # noqa: E402
+from scripts.load_data import full_load  # noqa: E402
+
+from benchmarks.run_benchmarks import get_filter_combinations  # noqa: E402
+from benchmarks.synthetic_data import write_csv  # noqa: E402
+from tabs.counts_tab import (  # noqa: E402
+    get_end_count_query,
+    get_judge_count_query,
+    get_start_count_query,
+    get_summary_counts_query,
+    get_window_counts_query,
+)
+from tabs.wait_time_tab import get_summary_wait_time_query, get_wait_time_query  # noqa: E402
+
+
+QUERIES = {
+    'get_judge_count_query': get_judge_count_query,
+    'get_start_count_query': get_start_count_query,
+    'get_end_count_query': get_end_count_query,
+    'get_wait_time_query': get_wait_time_query,
+    'get_window_counts_query': get_window_counts_query,
+    'get_summary_counts_query': get_summary_counts_query,
+    'get_summary_wait_time_query': get_summary_wait_time_query,
+}
+
+# Execution milliseconds and shared buffers at `--scale 1`, multiplied by the scale. Loose
+# enough for a laptop, the plan checks are what catches a bad plan on a small database
+BUDGETS = {
+    'get_judge_count_query': {'ms': 200, 'buffers': 5000},
+    'get_start_count_query': {'ms': 100, 'buffers': 5000},
+    'get_end_count_query': {'ms': 100, 'buffers': 5000},
+    'get_wait_time_query': {'ms': 100, 'buffers': 2000},
+    'get_window_counts_query': {'ms': 50, 'buffers': 2000},
+    'get_summary_counts_query': {'ms': 50, 'buffers': 2000},
+    'get_summary_wait_time_query': {'ms': 50, 'buffers': 1000},
+}
+
+SCAN_NODES = ('Seq Scan', 'Index Scan', 'Index Only Scan', 'Bitmap Heap Scan')
+INDEX_NODES = ('Index Scan', 'Index Only Scan', 'Bitmap Heap Scan')
+# Share of the rows read a sequential scan discards before an index is proposed for it
+SELECTIVE_FILTER = 0.9
+EQUALITY_OPERATORS = ('=', '= ANY', 'IS')
+# Keys of plan nodes holding expressions that read columns
+EXPRESSION_KEYS = (
+    'Output', 'Filter', 'Join Filter', 'Hash Cond', 'Merge Cond', 'Index Cond', 'Recheck Cond',
+    'Sort Key', 'Group Key',
+)
+
+
+def explain(session, query):
+    """The JSON plan of `query`, run with its literal values inlined."""
+    statement = str(query.statement.compile(
+        dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS, VERBOSE, FORMAT JSON) {statement}')
+        plan, = cursor.fetchone()
+    finally:
+        cursor.close()
+    # psycopg2 only decodes the json column when the type is registered
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]
+
+
+def iter_nodes(node, parent=None):
+    """`(node, parent)` of every node of the plan tree, depth first."""
+    yield node, parent
+    for child in node.get('Plans', []):
+        yield from iter_nodes(child, node)
+
+
+def rows_read(node):
+    """Rows a scan read over all its loops, before its filter."""
+    per_loop = node['Actual Rows'] + node.get('Rows Removed by Filter', 0)
+    return per_loop * node['Actual Loops']
+
+
+def is_selective(node):
+    """Whether a scan discards most of the rows it reads, see `SELECTIVE_FILTER`."""
+    read = rows_read(node)
+    kept = node['Actual Rows'] * node['Actual Loops']
+    return read > 0 and kept <= (1 - SELECTIVE_FILTER) * read
+
+
+def check_plan(name, court_type, court_name, explained, scale, max_loop_rows, max_misestimate):
+    """Lines describing everything wrong with one plan."""
+    plan = explained['Plan']
+    problems = []
+
+    budget = BUDGETS[name]
+    buffers = plan.get('Shared Hit Blocks', 0) + plan.get('Shared Read Blocks', 0)
+    if explained['Execution Time'] > budget['ms'] * scale:
+        problems.append(
+            f'budget: {explained["Execution Time"]:.1f}ms over {budget["ms"] * scale:.0f}ms')
+    if buffers > budget['buffers'] * scale:
+        problems.append(f'budget: {buffers} buffers over {budget["buffers"] * scale:.0f}')
+
+    appointment_scans = [
+        node for node, _ in iter_nodes(plan)
+        if node['Node Type'] in SCAN_NODES and node.get('Relation Name') == 'appointment'
+    ]
+    # A court is a small share of the appointments, reading them all is a missing index. A court
+    # type can be most of them, so it only counts when the scan throws most of what it read away
+    for node in appointment_scans:
+        if node['Node Type'] in INDEX_NODES:
+            continue
+        if court_name:
+            problems.append('index: appointment is read without an index for a court name filter')
+            break
+        if court_type and is_selective(node):
+            problems.append('index: appointment is read without an index for a court type filter')
+            break
+
+    for node, parent in iter_nodes(plan):
+        if node['Node Type'] == 'Seq Scan' and node['Actual Loops'] > 1:
+            if rows_read(node) > max_loop_rows:
+                problems.append(
+                    f'seq loop: {node["Relation Name"]} scanned {node["Actual Loops"]} times, '
+                    f'{rows_read(node)} rows under {parent["Node Type"]}'
+                )
+        # Scans are where the statistics decide the plan, and estimates of empty results are
+        # always off so only scans returning something are judged
+        if node['Node Type'] in SCAN_NODES and node['Actual Rows'] and node['Plan Rows']:
+            ratio = max(
+                node['Plan Rows'] / node['Actual Rows'], node['Actual Rows'] / node['Plan Rows'])
+            if ratio > max_misestimate:
+                problems.append(
+                    f'estimate: {node["Node Type"]} on {node["Relation Name"]} planned '
+                    f'{node["Plan Rows"]} rows, got {node["Actual Rows"]}'
+                )
+    return problems
+
+
+def suggest_indexes(explained):
+    """`CREATE INDEX` statements for the sequential scans that discard most of what they read,
+    keyed on the columns their filters compare, equalities first, and covering their output.
+    """
+    suggestions = []
+    nodes = list(iter_nodes(explained['Plan']))
+    for node, parent in nodes:
+        if node['Node Type'] != 'Seq Scan' or not rows_read(node):
+            continue
+        # Conditions evaluated by the scan itself, or by a nested loop for every inner row
+        conditions = [node.get('Filter', '')]
+        join_removed = 0
+        if parent is not None and parent['Node Type'] == 'Nested Loop' \
+                and parent['Plans'][-1] is node:
+            conditions.append(parent.get('Join Filter', ''))
+            join_removed = parent.get('Rows Removed by Join Filter', 0) * parent['Actual Loops']
+        kept = node['Actual Rows'] * node['Actual Loops'] - join_removed
+        if kept > (1 - SELECTIVE_FILTER) * rows_read(node):
+            continue
+
+        keys = get_compared_columns(node['Alias'], ' AND '.join(filter(None, conditions)))
+        if not keys:
+            continue
+        # Scans can output every column of the table, only the ones read above it are covered
+        used = get_columns(node['Alias'], ' '.join(
+            _get_expressions(other) for other, _ in nodes if other is not node))
+        outputs = [
+            column for column in get_columns(node['Alias'], ' '.join(node.get('Output', [])))
+            if column in used and column not in keys
+        ]
+        include = f' INCLUDE ({", ".join(outputs)})' if outputs else ''
+        suggestions.append(
+            f'CREATE INDEX ON {node["Relation Name"]} ({", ".join(keys)}){include};')
+    return suggestions
+
+
+def _get_expressions(node):
+    expressions = []
+    for key in EXPRESSION_KEYS:
+        value = node.get(key, [])
+        expressions.extend([value] if isinstance(value, str) else value)
+    return ' '.join(expressions)
+
+
+def get_columns(alias, expression):
+    columns = []
+    for column in re.findall(rf'\b{re.escape(alias)}\.(\w+)', expression):
+        if column not in columns:
+            columns.append(column)
+    return columns
+
+
+def get_compared_columns(alias, expression):
+    """Columns of `alias` compared in `expression`, the ones compared for equality first."""
+    column = rf'\b{re.escape(alias)}\.(\w+)'
+    operator = r'(= ANY|IS NOT|IS|<>|<=|>=|=|<|>)'
+    # The column is on either side, cast and parenthesized as Postgres prints it
+    left = re.finditer(rf'{column}\)?(?:::[\w ]+?)?\)?\s*{operator}', expression)
+    right = re.finditer(rf'{operator}\s*\(*{column}', expression)
+    comparisons = sorted(
+        [(match.start(), match.group(1), match.group(2)) for match in left]
+        + [(match.start(), match.group(2), match.group(1)) for match in right]
+    )
+    equalities, ranges = [], []
+    for _, column, operator in comparisons:
+        columns = equalities if operator in EQUALITY_OPERATORS else ranges
+        if column not in equalities + ranges:
+            columns.append(column)
+    return equalities + ranges
+
+
+def compare(results, baseline, tolerance):
+    """Lines describing every plan reading more buffers than `tolerance` allows over the same
+    query and filter in `baseline`. Buffers, unlike timings, only change with the plan or data.
+    """
+    def _key(result):
+        return (result['query'], result['court_type'], result['court_name'])
+
+    baseline_plans = {_key(result): result for result in baseline['plans']}
+    regressions = []
+    for result in results['plans']:
+        old = baseline_plans.get(_key(result))
+        if old and result['buffers'] > old['buffers'] * (1 + tolerance):
+            regressions.append(
+                f'{" / ".join(str(k) for k in _key(result))}: '
+                f'{old["buffers"]} -> {result["buffers"]} buffers'
+            )
+    return regressions
+
+
+def check_queries(session, scale, max_loop_rows, max_misestimate):
+    results = []
+    # Statistics as autovacuum would have them by now, not as the load left them
+    session.execute('ANALYZE')
+    for court_type, court_name in get_filter_combinations(session):
+        for name, build_query in QUERIES.items():
+            explained = explain(session, build_query(session, court_type, court_name))
+            plan = explained['Plan']
+            results.append({
+                'query': name,
+                'court_type': court_type,
+                'court_name': court_name,
+                'ms': explained['Execution Time'],
+                'buffers': plan.get('Shared Hit Blocks', 0) + plan.get('Shared Read Blocks', 0),
+                'problems': check_plan(
+                    name, court_type, court_name, explained, scale, max_loop_rows,
+                    max_misestimate),
+                'suggested_indexes': suggest_indexes(explained),
+                'plan': plan,
+            })
+    return results
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        '--scale', type=float, dest='scale', default=1.0,
+        help="Number of synthetic judges as a multiple of the real export")
+
+    parser.add_argument(
+        '--skip-load', action='store_true', dest='skip_load',
+        help="Check the plans against the database as it is")
+
+    parser.add_argument(
+        '--output', '-o', type=str, dest='output', default=None,
+        help="JSON file to write the plans and findings to")
+
+    parser.add_argument(
+        '--max-loop-rows', type=int, dest='max_loop_rows', default=10000,
+        help="Rows a sequential scan may read over all the loops of a nested loop")
+
+    parser.add_argument(
+        '--max-misestimate', type=float, dest='max_misestimate', default=10.0,
+        help="Allowed factor between planned and actual rows of a node")
+
+    parser.add_argument(
+        '--compare', type=str, dest='compare', default=None,
+        help="Earlier output to check for buffer regressions against")
+
+    parser.add_argument(
+        '--tolerance', type=float, dest='tolerance', default=0.2,
+        help="Allowed buffer increase against --compare, 0.2 is 20%%")
+
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    if not args.skip_load:
+        if db_cfg['database'] == 'courts':
+            sys.exit('Refusing to drop the `courts` database, set POSTGRES_DB to a throwaway one')
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, 'synthetic_judges.csv')
+            write_csv(file_path, args.scale)
+            recreate_db()
+            with get_session() as session:
+                full_load(session, file_path, chunk_size=1000)
+
+    with get_request_session(statement_timeout_ms=0) as session:
+        plans = check_queries(session, args.scale, args.max_loop_rows, args.max_misestimate)
+    results = {'database': db_cfg['database'], 'scale': args.scale, 'plans': plans}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    violations = []
+    for result in results['plans']:
+        label = f'{result["query"]} / {result["court_type"]} / {result["court_name"]}'
+        for problem in result['problems']:
+            violations.append(f'{label}: {problem}')
+        for suggestion in result['suggested_indexes']:
+            print(f'SUGGEST {label}: {suggestion}')
+    if args.compare:
+        with open(args.compare) as f:
+            violations.extend(compare(results, json.load(f), args.tolerance))
+
+    for violation in violations:
+        print(f'VIOLATION {violation}')
+    print(f'Checked {len(results["plans"])} plans, {len(violations)} violations')
+    if violations:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
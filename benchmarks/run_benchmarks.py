@@ -0,0 +1,226 @@
+"""Times every stage of `scripts/load_data.py` and every dashboard query against a throwaway
+database filled with a synthetic export, and writes the timings as JSON.
+
+    PYTHONPATH=.:app:scripts python -m benchmarks.run_benchmarks --scale 10 --output bench.json
+
+The database is dropped and recreated, so it defaults to `courts_bench` and refuses `courts`.
+Passing `--compare` with an earlier output exits non-zero when anything got slower than the
+tolerance allows.
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('POSTGRES_DB', 'courts_bench')
+
+from database_utils import db_cfg, get_request_session, get_session, recreate_db  # noqa: E402
+from models import Court  # noqa: E402
+from scripts.bulk_copy import CopyStats  # noqa: E402
+from scripts.load_data import full_load, iter_row_dict_chunks  # noqa: E402
+
+from benchmarks.synthetic_data import write_csv  # noqa: E402
+from count_cube import CountCube  # noqa: E402
+from tabs.counts_tab import LINE_GRAPH_QUERIES, get_line_graph_data  # noqa: E402
+from tabs.wait_time_tab import WAIT_TIME_QUERIES  # noqa: E402
+
+
+def time_stage(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def summarize(timings):
+    timings = sorted(timings)
+    return {
+        'runs': len(timings),
+        'min': timings[0],
+        'median': statistics.median(timings),
+        'p95': timings[min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))],
+        'max': timings[-1],
+    }
+
+
+def benchmark_load(file_path, chunk_size, workers, bulk):
+    stages = {}
+    copy_stats = CopyStats()
+
+    def _parse():
+        with open(file_path) as f:
+            return sum(1 for _ in csv.DictReader(f, quoting=csv.QUOTE_NONNUMERIC))
+
+    def _transform():
+        with open(file_path) as f:
+            return sum(len(chunk) for chunk in iter_row_dict_chunks(f, chunk_size, workers))
+
+    def _load():
+        recreate_db()
+        with get_session() as session:
+            full_load(session, file_path, chunk_size, workers, bulk=bulk, copy_stats=copy_stats)
+
+    stages['parse'], n_rows = time_stage(_parse)
+    stages['transform'], _ = time_stage(_transform)
+    stages['load'], _ = time_stage(_load)
+    # Part of `load`, timed around every `COPY` or flush of the rows read from the CSVs
+    stages['insert'] = sum(copy_stats.seconds.values())
+    return n_rows, {stage: {'seconds': seconds} for stage, seconds in stages.items()}
+
+
+def get_filter_combinations(session):
+    """No filter, every court type alone, and one court name per type with and without it."""
+    combinations = [(None, None)]
+    court_types = {}
+    for court_type, court_name in session.query(Court.court_type, Court.court_name):
+        court_types.setdefault(court_type, court_name)
+    for court_type, court_name in sorted(court_types.items()):
+        combinations.extend([(court_type, None), (None, court_name), (court_type, court_name)])
+    return combinations
+
+
+def benchmark_queries(repeat):
+    results = []
+    with get_request_session(statement_timeout_ms=0) as session:
+        combinations = get_filter_combinations(session)
+        cube_seconds, count_cube = time_stage(CountCube.from_session, session)
+        results.append({'query': 'count_cube_build', **summarize([cube_seconds])})
+
+        def _run(name, engine, function, court_type, court_name):
+            timings = [time_stage(function)[0] for _ in range(repeat)]
+            results.append({
+                'query': name,
+                'engine': engine,
+                'court_type': court_type,
+                'court_name': court_name,
+                **summarize(timings),
+            })
+
+        for court_type, court_name in combinations:
+            for engine in LINE_GRAPH_QUERIES:
+                _run(
+                    'get_line_graph_data', engine,
+                    lambda: get_line_graph_data(session, court_type, court_name, engine),
+                    court_type, court_name)
+            _run(
+                'get_line_graph_data', 'cube',
+                lambda: count_cube.line_graph_data(court_type, court_name),
+                court_type, court_name)
+            for engine, query in WAIT_TIME_QUERIES.items():
+                _run(
+                    'get_wait_time_query', engine,
+                    lambda: query(session, court_type, court_name).all(),
+                    court_type, court_name)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Lines describing every stage or query whose median got slower than `tolerance` allows."""
+    regressions = []
+
+    for stage, timing in results['stages'].items():
+        old = baseline['stages'].get(stage)
+        if old and timing['seconds'] > old['seconds'] * (1 + tolerance):
+            regressions.append(f'{stage}: {old["seconds"]:.3f}s -> {timing["seconds"]:.3f}s')
+
+    def _key(query):
+        return (query['query'], query.get('engine'), query.get('court_type'),
+                query.get('court_name'))
+
+    baseline_queries = {_key(query): query for query in baseline['queries']}
+    for query in results['queries']:
+        old = baseline_queries.get(_key(query))
+        if old and query['median'] > old['median'] * (1 + tolerance):
+            regressions.append(
+                f'{" / ".join(str(k) for k in _key(query))}: '
+                f'{old["median"] * 1000:.2f}ms -> {query["median"] * 1000:.2f}ms'
+            )
+    return regressions
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        '--scale', type=float, dest='scale', default=1.0,
+        help="Number of synthetic judges as a multiple of the real export")
+
+    parser.add_argument(
+        '--file_name', '-f', type=str, dest='file_name', default=None,
+        help="Existing export to load instead of generating a synthetic one")
+
+    parser.add_argument(
+        '--output', '-o', type=str, dest='output', required=True,
+        help="JSON file to write the results to")
+
+    parser.add_argument(
+        '--repeat', type=int, dest='repeat', default=20,
+        help="Runs of every query")
+
+    parser.add_argument('--chunk-size', type=int, dest='chunk_size', default=1000)
+
+    parser.add_argument('--workers', type=int, dest='workers', default=1)
+
+    parser.add_argument(
+        '--bulk', action='store_true', dest='bulk',
+        help="Load with COPY")
+
+    parser.add_argument(
+        '--compare', type=str, dest='compare', default=None,
+        help="Earlier output to check for regressions against")
+
+    parser.add_argument(
+        '--tolerance', type=float, dest='tolerance', default=0.2,
+        help="Allowed slowdown against --compare, 0.2 is 20%%")
+
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    if db_cfg['database'] == 'courts':
+        sys.exit('Refusing to drop the `courts` database, set POSTGRES_DB to a throwaway one')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = args.file_name
+        generate_seconds = None
+        if file_path is None:
+            file_path = os.path.join(tmp_dir, 'synthetic_judges.csv')
+            generate_seconds, _ = time_stage(write_csv, file_path, args.scale)
+
+        n_rows, stages = benchmark_load(file_path, args.chunk_size, args.workers, args.bulk)
+        if generate_seconds is not None:
+            stages['generate'] = {'seconds': generate_seconds}
+
+    results = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'database': db_cfg['database'],
+        'scale': None if args.file_name else args.scale,
+        'n_judges': n_rows,
+        'options': {
+            'chunk_size': args.chunk_size, 'workers': args.workers, 'bulk': args.bulk,
+            'repeat': args.repeat,
+        },
+        'stages': stages,
+        'queries': benchmark_queries(args.repeat),
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'Wrote {len(results["queries"])} query timings to {args.output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
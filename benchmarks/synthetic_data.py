@@ -0,0 +1,185 @@
+"""Synthetic exports in the format of the FJC biographical directory, for benchmarking the loader
+and the dashboard queries at larger sizes than the real data.
+"""
+import argparse
+import csv
+import random
+from datetime import date, timedelta
+
+from scripts import column_name_maps
+
+
+# Roughly the number of judges in the real export
+REAL_JUDGE_COUNT = 3800
+MAX_APPOINTMENTS = 5
+MAX_EDUCATIONS = 5
+
+PRESIDENTS = [
+    ('Theodore Roosevelt', 'Republican', 1901, 1909),
+    ('William Howard Taft', 'Republican', 1909, 1913),
+    ('Woodrow Wilson', 'Democratic', 1913, 1921),
+    ('Warren G. Harding', 'Republican', 1921, 1923),
+    ('Calvin Coolidge', 'Republican', 1923, 1929),
+    ('Herbert Hoover', 'Republican', 1929, 1933),
+    ('Franklin D. Roosevelt', 'Democratic', 1933, 1945),
+    ('Harry S Truman', 'Democratic', 1945, 1953),
+    ('Dwight D. Eisenhower', 'Republican', 1953, 1961),
+    ('John F. Kennedy', 'Democratic', 1961, 1963),
+    ('Lyndon B. Johnson', 'Democratic', 1963, 1969),
+    ('Richard M. Nixon', 'Republican', 1969, 1974),
+    ('Gerald Ford', 'Republican', 1974, 1977),
+    ('Jimmy Carter', 'Democratic', 1977, 1981),
+    ('Ronald Reagan', 'Republican', 1981, 1989),
+    ('George H.W. Bush', 'Republican', 1989, 1993),
+    ('William J. Clinton', 'Democratic', 1993, 2001),
+    ('George W. Bush', 'Republican', 2001, 2009),
+    ('Barack Obama', 'Democratic', 2009, 2017),
+    ('Donald J. Trump', 'Republican', 2017, 2021),
+]
+
+STATES = [
+    'Alabama', 'California', 'Florida', 'Georgia', 'Illinois', 'Louisiana', 'Michigan',
+    'New York', 'Ohio', 'Pennsylvania', 'Tennessee', 'Texas', 'Virginia', 'Washington',
+]
+DISTRICTS = ['Northern', 'Southern', 'Eastern', 'Western', 'Middle']
+CIRCUITS = [
+    'First', 'Second', 'Third', 'Fourth', 'Fifth', 'Sixth', 'Seventh', 'Eighth', 'Ninth',
+    'Tenth', 'Eleventh', 'District of Columbia', 'Federal',
+]
+COURTS = (
+    [('Supreme Court', 'Supreme Court of the United States')] +
+    [('U.S. Court of Appeals', f'U.S. Court of Appeals for the {circuit} Circuit')
+     for circuit in CIRCUITS] +
+    [('U.S. District Court', f'U.S. District Court for the {district} District of {state}')
+     for state in STATES for district in DISTRICTS] +
+    [('U.S. District Court', f'U.S. District Court for the District of {state}')
+     for state in STATES] +
+    [('Other', 'U.S. Court of International Trade')]
+)
+COURT_WEIGHTS = [1 if court_type == 'Supreme Court' else 10 for court_type, _ in COURTS]
+
+SCHOOLS = [
+    'Harvard Law School', 'Yale Law School', 'Columbia Law School', 'Stanford Law School',
+    'University of Michigan Law School', 'University of Virginia School of Law',
+    'Georgetown University Law Center', 'University of Texas School of Law',
+    'Harvard College', 'Yale College', 'Princeton University', 'University of Chicago',
+]
+DEGREES = ['B.A.', 'B.S.', 'J.D.', 'LL.B.', 'LL.M.']
+FIRST_NAMES = ['John', 'Mary', 'William', 'Patricia', 'James', 'Linda', 'Robert', 'Susan']
+LAST_NAMES = ['Smith', 'Johnson', 'Brown', 'Garcia', 'Miller', 'Davis', 'Wilson', 'Moore']
+RACES = ['White', 'African American', 'Hispanic', 'Asian American']
+ABA_RATINGS = ['Well Qualified', 'Qualified', 'Not Qualified', 'Exceptionally Well Qualified']
+
+
+def get_header():
+    header = list(column_name_maps.DEMOGRAPHIC_COLUMNS)
+    for i in range(1, MAX_APPOINTMENTS + 1):
+        header.extend(f'{col} ({i})' for col in column_name_maps.APPT_COLUMNS_TO_FILL)
+    for i in range(1, MAX_EDUCATIONS + 1):
+        header.extend(f'{col} ({i})' for col in column_name_maps.EDU_COLUMNS_TO_FILL)
+    return header
+
+
+def generate_rows(n_judges, seed=0):
+    rng = random.Random(seed)
+    for i in range(n_judges):
+        yield _generate_judge(rng, nid=1000000 + i)
+
+
+def write_csv(file_path, scale=1.0, seed=0):
+    """Writes `scale` times the real number of judges, returns how many were written."""
+    n_judges = max(1, int(REAL_JUDGE_COUNT * scale))
+    header = get_header()
+    with open(file_path, 'w', newline='') as f:
+        # Everything quoted, the loader reads with QUOTE_NONNUMERIC
+        writer = csv.DictWriter(f, fieldnames=header, quoting=csv.QUOTE_ALL, restval='')
+        writer.writeheader()
+        for row in generate_rows(n_judges, seed):
+            writer.writerow(row)
+    return n_judges
+
+
+def _random_date(rng, start_year, end_year):
+    start = date(start_year, 1, 1)
+    return start + timedelta(days=rng.randrange(max(1, (end_year - start_year) * 365)))
+
+
+def _generate_judge(rng, nid):
+    row = {
+        'nid': str(nid),
+        'jid': str(nid - 1000000),
+        'Last Name': rng.choice(LAST_NAMES),
+        'First Name': rng.choice(FIRST_NAMES),
+        'Gender': rng.choice(['Male', 'Female']),
+        'Race or Ethnicity': rng.choice(RACES),
+        'Birth State': rng.choice(STATES),
+    }
+
+    next_start_year = None
+    n_appointments = rng.choices([1, 2, 3], weights=[80, 15, 5])[0]
+    for i in range(1, n_appointments + 1):
+        president, party, term_start, term_end = rng.choice(
+            [p for p in PRESIDENTS if next_start_year is None or p[3] > next_start_year]
+            or PRESIDENTS[-1:]
+        )
+        nomination_date = _random_date(rng, max(term_start, next_start_year or 0), term_end)
+        confirmation_date = nomination_date + timedelta(days=rng.randint(5, 400))
+        commission_date = confirmation_date + timedelta(days=rng.randint(0, 10))
+        court_type, court_name = rng.choices(COURTS, weights=COURT_WEIGHTS)[0]
+
+        appointment = {
+            'Court Type': court_type,
+            'Court Name': court_name,
+            'Appointment Title': 'Judge',
+            'Appointing President': president,
+            'Party of Appointing President': party,
+            'ABA Rating': rng.choice(ABA_RATINGS),
+            'Nomination Date': nomination_date.isoformat(),
+            'Confirmation Date': confirmation_date.isoformat(),
+            'Commission Date': commission_date.isoformat(),
+        }
+        # Most judges before the last couple of decades have left the court
+        if commission_date.year < 2000 or rng.random() < 0.3:
+            end_date = commission_date + timedelta(days=rng.randint(365, 30 * 365))
+            if end_date < date(2021, 1, 1):
+                appointment['Termination'] = rng.choice(['Retirement', 'Death', 'Reassignment'])
+                appointment['Termination Date'] = end_date.isoformat()
+                if rng.random() < 0.4:
+                    appointment['Senior Status Date'] = (
+                        end_date - timedelta(days=rng.randint(0, 3650))).isoformat()
+                next_start_year = end_date.year
+        for col, value in appointment.items():
+            row[f'{col} ({i})'] = value
+        if 'Termination Date' not in appointment:
+            break
+
+    birth_year = nomination_date.year - rng.randint(35, 65)
+    row['Birth Year'] = str(birth_year)
+    for i in range(1, rng.randint(1, 3) + 1):
+        row[f'School ({i})'] = rng.choice(SCHOOLS)
+        row[f'Degree ({i})'] = rng.choice(DEGREES)
+        row[f'Degree Year ({i})'] = str(birth_year + 20 + i * 3)
+    return row
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        '--file_name', '-f', type=str, dest='file_name', required=True,
+        help="CSV file to write")
+
+    parser.add_argument(
+        '--scale', type=float, dest='scale', default=1.0,
+        help="Number of judges as a multiple of the real export")
+
+    parser.add_argument(
+        '--seed', type=int, dest='seed', default=0,
+        help="Random seed, the same seed and scale always give the same file")
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    print(f'Wrote {write_csv(args.file_name, args.scale, args.seed)} judges to {args.file_name}')
@@ -0,0 +1,83 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+
+# Written by `scripts/load_data.py` after every load so the app can tell its caches are stale
+DATA_VERSION_PATH = os.getenv('DATA_VERSION_PATH', './data/data_version.json')
+
+
+def new_data_version():
+    return f'{time.strftime("%Y%m%dT%H%M%S")}-{uuid.uuid4().hex[:8]}'
+
+
+def write_data_version(version=None, path=DATA_VERSION_PATH):
+    if version is None:
+        version = new_data_version()
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'version': version, 'written_at': time.time()}, f)
+    # Atomic so readers never see a half written stamp
+    os.replace(tmp_path, path)
+    return version
+
+
+def read_data_version(path=DATA_VERSION_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)['version']
+    except FileNotFoundError:
+        return None
+
+
+class DataVersionWatcher:
+    """Current data version, only re-reading the stamp file when its mtime changes so it is cheap
+    enough to check on every request.
+    """
+
+    def __init__(self, path=DATA_VERSION_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._version = None
+
+    def current(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+
+        with self._lock:
+            if mtime != self._mtime:
+                self._version = read_data_version(self.path)
+                self._mtime = mtime
+            return self._version
+
+
+class VersionedValue:
+    """Holds the result of `loader()`, calling it again whenever `version_getter()` changes."""
+
+    def __init__(self, loader, version_getter):
+        self.loader = loader
+        self.version_getter = version_getter
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._value = None
+        self._version = None
+
+    def get(self):
+        version = self.version_getter()
+        with self._lock:
+            if not self._loaded or version != self._version:
+                self._value = self.loader()
+                self._version = version
+                self._loaded = True
+            return self._value
+
+    def is_current(self):
+        """Whether `get()` would answer without calling the loader."""
+        version = self.version_getter()
+        with self._lock:
+            return self._loaded and version == self._version
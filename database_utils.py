@@ -1,11 +1,16 @@
 import os
+import threading
+import time
 from contextlib import contextmanager
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.engine.url import URL
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.orm.session import sessionmaker
 from sqlalchemy_utils import create_database, database_exists, drop_database
 
+from metrics import instrument_engine
 from models.base import Base
 
 
@@ -17,6 +22,19 @@ db_cfg = {
     'database': os.getenv('POSTGRES_DB', 'courts'),
 }
 
+pool_cfg = {
+    'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+    'max_overflow': int(os.getenv('DB_POOL_MAX_OVERFLOW', 10)),
+    # Seconds to wait for a connection before giving up
+    'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+    # Seconds before a connection is replaced, so idle ones dropped by the server are not reused
+    'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+    'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true',
+}
+
+# Applied to request sessions only, loading the data can take much longer
+request_statement_timeout_ms = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 5000))
+
 
 def get_url(host='localhost', port=5432, user='postgres', password='', database='courts'):
     return URL(
@@ -24,8 +42,85 @@ def get_url(host='localhost', port=5432, user='postgres', password='', database=
 
 
 default_url = get_url(**db_cfg)
-engine = create_engine(default_url)
+engine = create_engine(default_url, poolclass=QueuePool, **pool_cfg)
 Session = sessionmaker(bind=engine)
+# Statement latencies and row counts by origin, served on the app's `/metrics`
+instrument_engine(engine)
+
+
+class PoolMetrics:
+    """Counters for connection pool activity, shared by every thread of the process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.checkout_timeouts = 0
+        self.checkout_wait_count = 0
+        self.checkout_wait_seconds = 0.0
+        self.checkout_wait_max_seconds = 0.0
+
+    def increment(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def record_checkout_wait(self, seconds):
+        with self._lock:
+            self.checkout_wait_count += 1
+            self.checkout_wait_seconds += seconds
+            self.checkout_wait_max_seconds = max(self.checkout_wait_max_seconds, seconds)
+
+    def counters(self):
+        """Totals since the process started, which only ever go up."""
+        with self._lock:
+            return {
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'invalidations': self.invalidations,
+                'checkout_timeouts': self.checkout_timeouts,
+                'checkout_wait_count': self.checkout_wait_count,
+                'checkout_wait_seconds': self.checkout_wait_seconds,
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+@event.listens_for(engine, 'connect')
+def _on_connect(dbapi_connection, connection_record):
+    pool_metrics.increment('connects')
+
+
+@event.listens_for(engine, 'checkout')
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_metrics.increment('checkouts')
+
+
+@event.listens_for(engine, 'checkin')
+def _on_checkin(dbapi_connection, connection_record):
+    pool_metrics.increment('checkins')
+
+
+@event.listens_for(engine, 'invalidate')
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    pool_metrics.increment('invalidations')
+
+
+def get_pool_counters():
+    return pool_metrics.counters()
+
+
+def get_pool_gauges():
+    return {
+        'pool_size': engine.pool.size(),
+        'checked_in': engine.pool.checkedin(),
+        'checked_out': engine.pool.checkedout(),
+        'overflow': engine.pool.overflow(),
+        'checkout_wait_max_seconds': pool_metrics.checkout_wait_max_seconds,
+    }
 
 
 @contextmanager
@@ -43,6 +138,33 @@ def get_session():
         session.close()
 
 
+@contextmanager
+def get_request_session(statement_timeout_ms=None):
+    """Read only session for a single request, its connection goes back to the pool on exit.
+    Statements running longer than `statement_timeout_ms` are cancelled by the server.
+    """
+    if statement_timeout_ms is None:
+        statement_timeout_ms = request_statement_timeout_ms
+
+    session = Session()
+    try:
+        start = time.perf_counter()
+        try:
+            # Check the connection out now so waiting on the pool is measured on its own
+            session.connection()
+        except PoolTimeoutError:
+            pool_metrics.increment('checkout_timeouts')
+            raise
+        pool_metrics.record_checkout_wait(time.perf_counter() - start)
+
+        if statement_timeout_ms:
+            session.execute(f'SET LOCAL statement_timeout = {int(statement_timeout_ms)}')
+        yield session
+    finally:
+        # Nothing to commit, closing rolls back and also resets the SET LOCAL
+        session.close()
+
+
 def _create_db(host='localhost', port=5432, user='postgres', password='', database='courts'):
     db_url = get_url(host, port, user, password, database)
     if database_exists(db_url):
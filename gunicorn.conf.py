@@ -0,0 +1,93 @@
+"""gunicorn settings for the dashboard, `app/wsgi.py` is the application.
+
+Workers are forked from a master that has already loaded the app, see `wsgi.create_app`.
+`kill -HUP` replaces the workers gracefully with new ones forked from the same master, which
+pick up a new data version on their own. `kill -USR2` then `kill -TERM` of the old master starts
+a new master as well, for a code change or to share a new data version between workers again.
+
+Every worker has its own connection pool, so the workers together hold up to
+
+    workers * (DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW)
+
+connections to Postgres. That must stay under its `max_connections` (`DB_MAX_CONNECTIONS`, 100
+by default) less the connections kept for loading data and everything else
+(`DB_RESERVED_CONNECTIONS`, 10). Unless set, the pool is sized to what a worker can use at once
+and the default number of workers is capped to fit.
+"""
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+# Callbacks mostly wait on the database, threads let a worker serve others meanwhile
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+
+# A connection for every request thread and every graph render thread, see `app.render_graphs`,
+# and one for loading a new data version in the background
+graph_render_workers = int(os.getenv('GRAPH_RENDER_WORKERS', threads))
+os.environ.setdefault('GRAPH_RENDER_WORKERS', str(graph_render_workers))
+os.environ.setdefault('DB_POOL_SIZE', str(threads + graph_render_workers + 1))
+os.environ.setdefault('DB_POOL_MAX_OVERFLOW', '0')
+connections_per_worker = (
+    int(os.environ['DB_POOL_SIZE']) + int(os.environ['DB_POOL_MAX_OVERFLOW']))
+db_max_connections = int(os.getenv('DB_MAX_CONNECTIONS', 100))
+db_reserved_connections = int(os.getenv('DB_RESERVED_CONNECTIONS', 10))
+max_workers = max((db_max_connections - db_reserved_connections) // connections_per_worker, 1)
+
+workers = int(os.getenv(
+    'GUNICORN_WORKERS', min(multiprocessing.cpu_count() * 2 + 1, max_workers)))
+
+# Load the app in the master before forking, so the workers share its memory
+preload_app = True
+
+# Seconds a worker gets to finish its requests on reload or shutdown
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+# Replaces workers now and then, jittered so they do not all restart at once
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 0))
+
+accesslog = '-'
+errorlog = '-'
+
+# Workers write their metrics here so `/metrics` reports all of them, see `metrics.py`. Set
+# before the app is loaded, which reads it on import
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'courts-metrics'))
+
+
+def on_starting(server):
+    if workers > max_workers:
+        server.log.warning(
+            f'{workers} workers with {connections_per_worker} connections each can open more '
+            f'than the {db_max_connections - db_reserved_connections} connections Postgres has '
+            f'left, lower GUNICORN_WORKERS or DB_POOL_SIZE'
+        )
+    # Metrics of a previous master's workers would otherwise be added to this one's
+    metrics_dir = os.environ['METRICS_DIR']
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def post_fork(server, worker):
+    app_module = sys.modules.get('app.app')
+    if app_module is not None:
+        from metrics import start_metrics_writer
+
+        start_metrics_writer(app_module.render_process_metrics)
+
+
+def worker_exit(server, worker):
+    # Lets graphs already being rendered finish before the worker goes
+    app_module = sys.modules.get('app.app')
+    if app_module is not None:
+        app_module.graph_executor.shutdown(wait=True)
+
+        from metrics import write_process_metrics
+
+        # Its counters keep counting towards the totals after it is gone
+        write_process_metrics(app_module.render_process_metrics())
@@ -0,0 +1,295 @@
+import functools
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+
+
+# Seconds, from a cached lookup up to the statement timeout
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (1, 10, 100, 1000, 10000, 100000)
+
+# Directory every gunicorn worker writes its metrics to, so `/metrics` answers for all of them
+# whichever worker gets the scrape. Unset, a process only reports its own metrics
+METRICS_DIR = os.getenv('METRICS_DIR') or None
+# Seconds between the writes of a worker's metrics, see `start_metrics_writer`
+METRICS_WRITE_INTERVAL = float(os.getenv('METRICS_WRITE_INTERVAL', 5))
+METRICS_SAMPLE_PATTERN = re.compile(r'^(\w+)(?:\{(.*)\})? (\S+)$')
+
+ORIGIN_COMMENT = '/* origin:{} */'
+ORIGIN_PATTERN = re.compile(r'/\* origin:(\w+) \*/')
+UNTAGGED = 'untagged'
+
+
+class Histogram:
+    """Prometheus style cumulative histogram with one label, safe to observe from any thread."""
+
+    def __init__(self, name, help_text, label_name, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_name = label_name
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # label -> [count per bucket + one for +Inf, sum]
+        self._values = {}
+
+    def observe(self, label, value):
+        with self._lock:
+            if label not in self._values:
+                self._values[label] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts, _ = self._values[label]
+            counts[bisect_left(self.buckets, value)] += 1
+            self._values[label][1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            values = {
+                label: (list(counts), total) for label, (counts, total) in self._values.items()
+            }
+        for label, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{{{self.label_name}="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{self.label_name}="{label}"}} {total}')
+            lines.append(f'{self.name}_count{{{self.label_name}="{label}"}} {cumulative}')
+        return lines
+
+
+class Counter:
+    """Prometheus style counter with one label, safe to increment from any thread."""
+
+    def __init__(self, name, help_text, label_name):
+        self.name = name
+        self.help_text = help_text
+        self.label_name = label_name
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, label, amount=1):
+        with self._lock:
+            self._values[label] = self._values.get(label, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = dict(self._values)
+        return render_counters(self.name, self.help_text, values, self.label_name)
+
+
+query_seconds = Histogram(
+    'courts_query_seconds', 'Statement latency by the query it was built by.', 'origin',
+    LATENCY_BUCKETS)
+query_rows = Histogram(
+    'courts_query_rows', 'Rows returned by statements by the query it was built by.', 'origin',
+    ROW_BUCKETS)
+callback_seconds = Histogram(
+    'courts_callback_seconds', 'Dash callback latency.', 'callback', LATENCY_BUCKETS)
+query_errors = Counter(
+    'courts_query_errors', 'Statements that failed or timed out by the query it was built by.',
+    'origin')
+
+
+def tag_query(query, origin):
+    """Marks the statement of an ORM `query` with a comment naming `origin`, which is how its
+    executions are labelled in `query_seconds`. Tags survive `subquery()`, so a statement built
+    from several tagged queries counts towards each of them.
+    """
+    return query.prefix_with(ORIGIN_COMMENT.format(origin))
+
+
+def get_origins(statement):
+    return set(ORIGIN_PATTERN.findall(statement)) or {UNTAGGED}
+
+
+def instrument_engine(engine):
+    """Times every statement `engine` runs into `query_seconds` and `query_rows`, and counts
+    the ones that fail, a statement timeout included, into `query_errors`.
+    """
+    from sqlalchemy import event
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_times', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info['query_start_times'].pop()
+        # -1 when the driver does not know, e.g. for DDL
+        rows = max(cursor.rowcount, 0)
+        for origin in get_origins(statement):
+            query_seconds.observe(origin, seconds)
+            query_rows.observe(origin, rows)
+
+    @event.listens_for(engine, 'handle_error')
+    def _handle_error(context):
+        # No `after_cursor_execute` for a failed statement, its start time is popped here so it
+        # does not stay on the pooled connection
+        try:
+            start_times = context.connection.info.get('query_start_times')
+        except Exception:
+            # Failed to connect, or the connection is already gone and its start times with it
+            start_times = None
+        seconds = time.perf_counter() - start_times.pop() if start_times else None
+        for origin in get_origins(context.statement or ''):
+            query_errors.inc(origin)
+            if seconds is not None:
+                query_seconds.observe(origin, seconds)
+
+
+def timed_callback(function):
+    """Times every call of a Dash callback into `callback_seconds`, errors included."""
+    @functools.wraps(function)
+    def _timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            callback_seconds.observe(function.__name__, time.perf_counter() - start)
+    return _timed
+
+
+def render_gauges(name, help_text, values, label_name=None):
+    """Prometheus lines for a dict of gauges, one metric per key unless `label_name` is given."""
+    if label_name is None:
+        lines = []
+        for key, value in sorted(values.items()):
+            lines.extend([
+                f'# HELP {name}_{key} {help_text}',
+                f'# TYPE {name}_{key} gauge',
+                f'{name}_{key} {value}',
+            ])
+        return lines
+
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} gauge']
+    for key, value in sorted(values.items()):
+        lines.append(f'{name}{{{label_name}="{key}"}} {value}')
+    return lines
+
+
+def render_counters(name, help_text, values, label_name=None):
+    """Prometheus lines for a dict of counters, named like `render_gauges` with `_total` added.
+    """
+    if label_name is None:
+        lines = []
+        for key, value in sorted(values.items()):
+            lines.extend([
+                f'# HELP {name}_{key}_total {help_text}',
+                f'# TYPE {name}_{key}_total counter',
+                f'{name}_{key}_total {value}',
+            ])
+        return lines
+
+    lines = [f'# HELP {name}_total {help_text}', f'# TYPE {name}_total counter']
+    for key, value in sorted(values.items()):
+        lines.append(f'{name}_total{{{label_name}="{key}"}} {value}')
+    return lines
+
+
+def render_metrics(*extra_lines):
+    lines = []
+    for metric in (query_seconds, query_rows, callback_seconds, query_errors):
+        lines.extend(metric.render())
+    for extra in extra_lines:
+        lines.extend(extra)
+    return '\n'.join(lines) + '\n'
+
+
+def write_process_metrics(text, directory=METRICS_DIR):
+    """Writes the `render_metrics` output of this process to `directory` for
+    `merge_process_metrics`.
+    """
+    path = os.path.join(directory, f'{os.getpid()}.prom')
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    # Atomic so a scrape never reads a half written file
+    os.replace(tmp_path, path)
+
+
+def merge_process_metrics(directory=METRICS_DIR):
+    """The metrics every process wrote to `directory` as one Prometheus text.
+
+    Counters and histograms are summed over every process, including the ones that have exited
+    so totals do not drop when a worker is replaced. Gauges only make sense per process, they get
+    a `pid` label and are only reported for processes still running.
+    """
+    # name -> [help line, type line, type, {sample without value: value}]
+    families = {}
+    for file_name in sorted(os.listdir(directory)):
+        pid, extension = os.path.splitext(file_name)
+        if extension != '.prom' or not pid.isdigit():
+            continue
+        try:
+            with open(os.path.join(directory, file_name)) as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            continue
+        running = _is_running(int(pid))
+
+        family = help_line = None
+        for line in lines:
+            if line.startswith('# HELP '):
+                help_line = line
+            elif line.startswith('# TYPE '):
+                _, _, name, metric_type = line.split(' ', 3)
+                if name not in families:
+                    families[name] = [help_line, line, metric_type, {}]
+                family = families[name]
+            elif family is not None:
+                match = METRICS_SAMPLE_PATTERN.match(line)
+                if match is None:
+                    continue
+                name, labels, value = match.groups()
+                samples = family[3]
+                if family[2] == 'gauge':
+                    if running:
+                        labels = f'{labels},pid="{pid}"' if labels else f'pid="{pid}"'
+                        samples[f'{name}{{{labels}}}'] = value
+                else:
+                    sample = f'{name}{{{labels}}}' if labels else name
+                    samples[sample] = _add(samples.get(sample), value)
+
+    lines = []
+    for help_line, type_line, _, samples in families.values():
+        lines.extend([help_line, type_line])
+        lines.extend(f'{sample} {value}' for sample, value in samples.items())
+    return '\n'.join(lines) + '\n'
+
+
+def start_metrics_writer(render, directory=METRICS_DIR, interval=METRICS_WRITE_INTERVAL):
+    """Writes `render()` to `directory` every `interval` seconds from a daemon thread, so a
+    worker's metrics are merged even when the scrapes go to other workers. Call in every worker
+    after the fork.
+    """
+    def _write():
+        while True:
+            time.sleep(interval)
+            try:
+                write_process_metrics(render(), directory)
+            except Exception as ex:
+                print(f'Writing metrics failed: {ex}')
+
+    thread = threading.Thread(target=_write, name='write-metrics', daemon=True)
+    thread.start()
+    return thread
+
+
+def _add(total, value):
+    if total is None:
+        return value
+    total, value = float(total), float(value)
+    return int(total + value) if (total + value).is_integer() else total + value
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Running as someone else
+        return True
+    return True
@@ -1,19 +1,27 @@
 from .models import (
     Appointment,
     Congress,
+    CongressWaitTime,
     Court,
+    CourtYearPartyCount,
+    DirtySummaryCourt,
     Education,
     Judge,
     UnsuccessfulNomination,
+    UnsuccessfulNominationCount,
     YearParty,
 )
 
 __all__ = (
     "Appointment",
     "Congress",
+    "CongressWaitTime",
     "Court",
+    "CourtYearPartyCount",
+    "DirtySummaryCourt",
     "Education",
     "Judge",
     "UnsuccessfulNomination",
+    "UnsuccessfulNominationCount",
     "YearParty"
 )
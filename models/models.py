@@ -1,4 +1,5 @@
 from sqlalchemy import Boolean, Column, Date, Float, ForeignKey, Integer, String
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
 from sqlalchemy_utils import generic_repr
 
@@ -27,6 +28,8 @@ class Judge(Base):
     death_state = Column(String)
     gender = Column(String)
     race_or_ethnicity = Column(String)
+    # Hash of the source row in the FJC export, see `scripts/load_data.py`
+    source_hash = Column(String)
 
     appointments = relationship('Appointment', back_populates='judge', uselist=True)
     educations = relationship('Education', back_populates='judge', uselist=True)
@@ -50,6 +53,9 @@ class Appointment(Base):
     statute_authorizing_new_seat = Column(String)
     recess_appointment_date = Column(Date)
     nomination_date = Column(Date)
+    # Resolved by `scripts/load_data.py` so wait times join `congress` on an indexed key
+    nomination_year = Column(Integer, index=True)
+    congress_title = Column(String, ForeignKey('congress.title'), index=True)
     committee_referral_date = Column(Date)
     hearing_date = Column(Date)
     judiciary_committee_action = Column(String)
@@ -140,3 +146,69 @@ class UnsuccessfulNomination(Base):
     nomination_date = Column(Date, nullable=False, primary_key=True)
     recess_appointment = Column(Boolean, nullable=False, primary_key=True)
     outcome = Column(String, nullable=False, primary_key=True)
+    # Resolved when loading, see `scripts/load_data.py`
+    party = Column(String, nullable=True)
+    court_type = Column(String, nullable=True)
+    # Name of the court in the FJC export, the CSV uses short names like `Ninth Circuit`
+    fjc_court_name = Column(String, nullable=True)
+
+
+@generic_repr
+class CourtYearPartyCount(Base):
+    """Serving / appointed / terminated counts per `year_party` bucket and court, built by
+    `scripts.summary_tables` so the Party tab does not aggregate `appointment` per request.
+    """
+    __tablename__ = 'court_year_party_count'
+
+    year = Column(Integer, primary_key=True)
+    party = Column(String, primary_key=True)
+    court_type = Column(String, primary_key=True, index=True)
+    court_name = Column(String, primary_key=True, index=True)
+    n_judges = Column(Integer, nullable=False)
+    n_appointed = Column(Integer, nullable=False)
+    n_terminated = Column(Integer, nullable=False)
+
+
+@generic_repr
+class CongressWaitTime(Base):
+    """Days to confirmation per congress and court, built by `scripts.summary_tables`."""
+    __tablename__ = 'congress_wait_time'
+
+    congress_start_year = Column(Integer, primary_key=True)
+    court_type = Column(String, primary_key=True, index=True)
+    court_name = Column(String, primary_key=True, index=True)
+    president = Column(String, nullable=False)
+    party = Column(String, nullable=False)
+    n_confirmed = Column(Integer, nullable=False)
+    min_days_to_confirm = Column(Integer, nullable=False)
+    max_days_to_confirm = Column(Integer, nullable=False)
+    mean_days_to_confirm = Column(Float, nullable=False)
+    days_to_confirm = Column(ARRAY(Integer), nullable=False)
+
+
+@generic_repr
+class DirtySummaryCourt(Base):
+    """Courts whose appointments changed since the summary tables were last refreshed. Filled by a
+    trigger on `appointment`.
+    """
+    __tablename__ = 'dirty_summary_court'
+
+    court_type = Column(String, primary_key=True)
+    court_name = Column(String, primary_key=True)
+
+
+@generic_repr
+class UnsuccessfulNominationCount(Base):
+    """Unsuccessful nominations per president, congress and court, built by
+    `scripts.summary_tables` for the Unconfirmed tab. Courts missing from the FJC export have no
+    `court_type` and only show up unfiltered.
+    """
+    __tablename__ = 'unsuccessful_nomination_count'
+
+    id = Column(Integer, primary_key=True)
+    congress_start_year = Column(Integer, nullable=False, index=True)
+    president = Column(String, nullable=False)
+    party = Column(String, nullable=True)
+    court_type = Column(String, nullable=True, index=True)
+    court_name = Column(String, nullable=False, index=True)
+    n_nominations = Column(Integer, nullable=False)
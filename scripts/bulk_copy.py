@@ -0,0 +1,81 @@
+import csv
+import io
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class CopyStats:
+    """Rows and seconds spent writing into each table, with `COPY` or flushed from the ORM,
+    across however many chunks.
+    """
+
+    def __init__(self):
+        self.rows = defaultdict(int)
+        self.seconds = defaultdict(float)
+
+    def add(self, table_name, n_rows, seconds):
+        self.rows[table_name] += n_rows
+        self.seconds[table_name] += seconds
+
+    @contextmanager
+    def timing(self, table_name, n_rows):
+        start = time.perf_counter()
+        yield
+        self.add(table_name, n_rows, time.perf_counter() - start)
+
+    def report(self):
+        for table_name, n_rows in self.rows.items():
+            seconds = self.seconds[table_name]
+            print(
+                f'{table_name}: copied {n_rows} rows in {seconds:.2f}s '
+                f'({n_rows / seconds if seconds else 0:.0f} rows/sec)'
+            )
+
+
+def copy_table(session, model, rows, stats):
+    """Streams dicts of column values into the table of `model` with `COPY FROM STDIN`. Serial `id`
+    columns are left to the database.
+    """
+    columns = [column.name for column in model.__table__.columns if column.name != 'id']
+
+    start = time.perf_counter()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    n_rows = 0
+    for row in rows:
+        writer.writerow([_copy_value(row.get(column)) for column in columns])
+        n_rows += 1
+    buffer.seek(0)
+
+    cursor = session.connection().connection.cursor()
+    cursor.copy_expert(
+        f'COPY {model.__tablename__} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)',
+        buffer,
+    )
+    stats.add(model.__tablename__, n_rows, time.perf_counter() - start)
+    return n_rows
+
+
+def _copy_value(value):
+    # An unquoted empty field is NULL in the csv format, which is what the writer emits for None
+    if value is None:
+        return None
+    return str(value)
+
+
+def drop_secondary_indexes(session, models):
+    """Drops the declared indexes of `models`, returning them for `create_indexes`."""
+    connection = session.connection()
+    indexes = [index for model in models for index in model.__table__.indexes]
+    for index in indexes:
+        index.drop(bind=connection)
+    return indexes
+
+
+def create_indexes(session, indexes):
+    connection = session.connection()
+    start = time.perf_counter()
+    for index in indexes:
+        index.create(bind=connection)
+    print(f'Built {len(indexes)} indexes in {time.perf_counter() - start:.2f}s')
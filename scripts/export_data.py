@@ -0,0 +1,373 @@
+"""Regenerates the JSON datasets of `js-ui` and `data` from the database, replacing the exports
+in the `Export Data for D3` and `Flat Data for Svelte Line Graph` notebooks.
+
+    PYTHONPATH=.:app:scripts python scripts/export_data.py [--compact] [--force]
+
+Every dataset is written partitioned by year into a directory next to its combined file, e.g.
+`js-ui/education_counts_by_year/1901.json`, so the browser can fetch only the years it shows.
+The sha1 of the rows that went into each partition is kept in the directory's `manifest.json`,
+and partitions whose rows have not changed since the last export are neither rebuilt nor
+written. The combined file is stitched together from the partition files, and only when any of
+them changed.
+
+With `--compact` lists of records are written column-wise instead:
+
+    {"rows": 2, "data": {"party": [0, 1], "nid_serving_in_year": [[1377016, 100, 35]]},
+     "dictionaries": {"party": ["Democratic", "Republican"]}}
+
+String columns hold indices into their dictionary, lists of `nid`s are sorted and delta encoded
+(first value, then differences), and `{"id": ..., "count": ...}` lists become `[index, count]`
+pairs with the ids in the column's dictionary. The combined file of a compact export maps
+every partition to its encoded records.
+"""
+import argparse
+import hashlib
+import json
+import os
+from collections import defaultdict
+
+from sqlalchemy import sql
+
+from database_utils import get_session
+from education_matrix import EducationMatrix
+from models import Appointment, Congress, CourtYearPartyCount, Judge
+from summary_tables import UNKNOWN_COURT
+
+
+FLAT_COUNTS_PATH = './data/flat_court_party_judge_counts.json'
+APPEALS_COUNTS_PATH = './data/partitioned_appeals_counts.json'
+EDUCATION_COUNTS_PATH = './js-ui/education_counts_by_year.json'
+JUDGES_WAIT_PATH = './js-ui/joined_judges_wait.json'
+
+APPEALS_COURT_TYPE = 'U.S. Court of Appeals'
+JD_DEGREE = 'j.d.'
+YIELD_PER = 1000
+
+
+class PartitionedExport:
+    """Writes one dataset partition by partition. Rows must be added grouped by partition, which
+    the export queries get from their `ORDER BY`.
+
+    `build(partition, rows)` turns the rows of one partition into its JSON value, and is only
+    called when the partition's rows changed since the last export.
+    """
+
+    def __init__(self, path, build, combine='list', compact=False, force=False):
+        self.path = path
+        self.directory = os.path.splitext(path)[0]
+        self.build = build
+        # How the combined file joins the partitions, concatenated `list`s or a `dict` by partition
+        self.combine = combine
+        self.encoding = 'compact' if compact and combine == 'list' else 'plain'
+
+        self.manifest_path = os.path.join(self.directory, 'manifest.json')
+        old_encoding, self.old_hashes = self._read_manifest()
+        # Partitions dropped since the last export are removed even when everything is rewritten
+        self.old_partitions = set(self.old_hashes)
+        if force or old_encoding != self.encoding:
+            self.old_hashes = {}
+        self.hashes = {}
+        self.n_written = 0
+
+        self._partition = None
+        self._rows = []
+        self._hash = None
+
+    def add(self, partition, row):
+        if partition != self._partition:
+            self._flush()
+            self._partition = partition
+            self._hash = hashlib.sha1(self.encoding.encode())
+        self._rows.append(row)
+        self._hash.update(repr(row).encode())
+
+    def close(self):
+        self._flush()
+        removed = self.old_partitions - set(self.hashes)
+        for partition in removed:
+            try:
+                os.remove(self._partition_path(partition))
+            except FileNotFoundError:
+                pass
+
+        if self.n_written or removed or not os.path.exists(self.path):
+            self._write_combined()
+        _write_atomic(
+            self.manifest_path,
+            json.dumps({'encoding': self.encoding, 'partitions': self.hashes}, sort_keys=True),
+        )
+        print(
+            f'{os.path.basename(self.path)}: {len(self.hashes)} partitions, '
+            f'{self.n_written} written, {len(self.hashes) - self.n_written} unchanged, '
+            f'{len(removed)} removed'
+        )
+
+    def _flush(self):
+        if self._partition is None:
+            return
+        partition = str(self._partition)
+        digest = self._hash.hexdigest()
+        self.hashes[partition] = digest
+
+        partition_path = self._partition_path(partition)
+        if self.old_hashes.get(partition) != digest or not os.path.exists(partition_path):
+            value = self.build(self._partition, self._rows)
+            if self.encoding == 'compact':
+                value = encode_compact(value)
+            os.makedirs(self.directory, exist_ok=True)
+            _write_atomic(partition_path, json.dumps(value))
+            self.n_written += 1
+
+        self._partition = None
+        self._rows = []
+
+    def _partition_path(self, partition):
+        return os.path.join(self.directory, f'{partition}.json')
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None, {}
+        return manifest['encoding'], manifest['partitions']
+
+    def _write_combined(self):
+        # The partition files are already serialized, so they are stitched together as text
+        partitions = sorted(self.hashes, key=int)
+        parts = []
+        for partition in partitions:
+            with open(self._partition_path(partition)) as f:
+                text = f.read()
+            if self.combine == 'list' and self.encoding == 'plain':
+                text = text[1:-1]
+                if text:
+                    parts.append(text)
+            else:
+                parts.append(f'{json.dumps(partition)}: {text}')
+
+        if self.combine == 'list' and self.encoding == 'plain':
+            _write_atomic(self.path, f'[{", ".join(parts)}]')
+        else:
+            _write_atomic(self.path, f'{{{", ".join(parts)}}}')
+
+
+def _write_atomic(path, text):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def encode_compact(records):
+    """Column-wise encoding of a list of dicts with dictionary encoded strings, see the module
+    docstring.
+    """
+    columns = list(records[0]) if records else []
+    data = {}
+    dictionaries = {}
+    for column in columns:
+        values = [record[column] for record in records]
+        present = [value for value in values if value is not None]
+
+        if present and all(isinstance(value, str) for value in present):
+            indices = _DictionaryEncoder()
+            data[column] = [None if value is None else indices[value] for value in values]
+            dictionaries[column] = indices.values
+        elif present and all(_is_int_list(value) for value in present):
+            data[column] = [None if value is None else _delta_encode(value) for value in values]
+        elif present and all(_is_id_counts(value) for value in present):
+            indices = _DictionaryEncoder()
+            data[column] = [
+                None if value is None else [[indices[x['id']], x['count']] for x in value]
+                for value in values
+            ]
+            dictionaries[column] = indices.values
+        else:
+            data[column] = values
+    return {'rows': len(records), 'data': data, 'dictionaries': dictionaries}
+
+
+class _DictionaryEncoder(dict):
+    def __init__(self):
+        super().__init__()
+        self.values = []
+
+    def __missing__(self, value):
+        self[value] = len(self.values)
+        self.values.append(value)
+        return self[value]
+
+
+def _is_int_list(value):
+    return isinstance(value, list) and all(isinstance(x, int) for x in value)
+
+
+def _is_id_counts(value):
+    return isinstance(value, list) and all(
+        isinstance(x, dict) and x.keys() == {'id', 'count'} for x in value)
+
+
+def _delta_encode(values):
+    values = sorted(values)
+    return values[:1] + [b - a for a, b in zip(values, values[1:])]
+
+
+def export_counts(session, compact, force):
+    """`flat_court_party_judge_counts.json` and `partitioned_appeals_counts.json` in one pass over
+    the court summary table. Appointments without a court type or court name only count towards
+    every court in the app, they have no court of their own to export.
+    """
+    def _build_flat(year, rows):
+        return [
+            {
+                'year': year,
+                'court_name': court_name,
+                'court_type': court_type,
+                'party': party,
+                'n_terminated': n_terminated,
+                'n_appointed': n_appointed,
+                'n_judges': n_judges,
+            }
+            for court_type, court_name, party, n_judges, n_appointed, n_terminated in rows
+        ]
+
+    def _build_appeals(year, rows):
+        court_counts = defaultdict(dict)
+        for court_name, party, n_judges in rows:
+            court_counts[court_name][party] = n_judges
+        return court_counts
+
+    flat = PartitionedExport(FLAT_COUNTS_PATH, _build_flat, compact=compact, force=force)
+    appeals = PartitionedExport(APPEALS_COUNTS_PATH, _build_appeals, combine='dict', force=force)
+
+    counts = (
+        session
+        .query(
+            CourtYearPartyCount.year,
+            CourtYearPartyCount.court_type,
+            CourtYearPartyCount.court_name,
+            CourtYearPartyCount.party,
+            CourtYearPartyCount.n_judges,
+            CourtYearPartyCount.n_appointed,
+            CourtYearPartyCount.n_terminated,
+        )
+        .filter(
+            CourtYearPartyCount.court_type != UNKNOWN_COURT,
+            CourtYearPartyCount.court_name != UNKNOWN_COURT,
+        )
+        .order_by(
+            CourtYearPartyCount.year,
+            CourtYearPartyCount.court_type,
+            CourtYearPartyCount.court_name,
+            CourtYearPartyCount.party,
+        )
+        .yield_per(YIELD_PER)
+    )
+    for year, court_type, court_name, party, n_judges, n_appointed, n_terminated in counts:
+        flat.add(year, (court_type, court_name, party, n_judges, n_appointed, n_terminated))
+        if court_type == APPEALS_COURT_TYPE and n_judges:
+            appeals.add(year, (court_name, party, n_judges))
+    flat.close()
+    appeals.close()
+
+
+def export_education_counts(session, compact, force):
+    """`education_counts_by_year.json`, the schools of every judge serving in each two year
+    `year_party` bucket, with a count of 0 for buckets nobody served in.
+    """
+    matrix = EducationMatrix.from_session(session)
+    school_count_all = matrix.school_counts_by_year()
+    school_count_jd = matrix.school_counts_by_year(degree=JD_DEGREE)
+
+    def _build(year, rows):
+        [(nids, school_counts_all, school_counts_jd)] = rows
+        return [{
+            'year': year,
+            'count': len(nids),
+            'nid_serving_in_year': nids,
+            'school_count_all': [{'id': k, 'count': v} for k, v in school_counts_all],
+            'school_count_jd': [{'id': k, 'count': v} for k, v in school_counts_jd],
+        }]
+
+    export = PartitionedExport(EDUCATION_COUNTS_PATH, _build, compact=compact, force=force)
+    # A single row per year holding everything its partition is built from, which is then also
+    # what tells whether it changed
+    for year in matrix.years:
+        export.add(
+            year, (matrix.serving_nids(year), school_count_all[year], school_count_jd[year]))
+    export.close()
+
+
+def export_judges_wait(session, compact, force):
+    """`joined_judges_wait.json`, every confirmed appointment with its judge and the congress it
+    was nominated in.
+    """
+    judge_columns = [
+        column for column in Judge.__table__.columns if column.name != 'source_hash'
+    ]
+    columns = judge_columns + [
+        Congress.start_year.label('congress_start_year'),
+        # Misspelled in the original export, which the UI reads
+        Appointment.start_year.label('appointent_year'),
+        Appointment.nomination_date,
+        Appointment.days_to_confirm,
+        Appointment.court_name,
+        Congress.president_party_senate_majority_perc,
+        Congress.president_party_senate_majority,
+        Congress.party_of_president,
+        Congress.president,
+    ]
+    keys = [column.name for column in columns]
+    nomination_date_index = keys.index('nomination_date')
+
+    def _build(congress_start_year, rows):
+        records = []
+        for row in rows:
+            record = dict(zip(keys, row))
+            record['nomination_date'] = str(row[nomination_date_index])
+            records.append(record)
+        return records
+
+    export = PartitionedExport(JUDGES_WAIT_PATH, _build, compact=compact, force=force)
+    rows = (
+        session
+        .query(*columns)
+        .select_from(Appointment)
+        .join(Congress, Congress.title == Appointment.congress_title)
+        .join(Judge, Judge.nid == Appointment.nid)
+        .filter(Appointment.days_to_confirm.isnot(None))
+        .order_by(Congress.start_year, Appointment.nid, Appointment.id)
+        .yield_per(YIELD_PER)
+    )
+    for row in rows:
+        export.add(row.congress_start_year, tuple(row))
+    export.close()
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        '--compact', action='store_true', dest='compact',
+        help="Write lists of records column-wise with dictionary encoded strings")
+
+    parser.add_argument(
+        '--force', action='store_true', dest='force',
+        help="Rewrite every partition even if its rows have not changed")
+
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    with get_session() as session:
+        # One snapshot for every dataset, so they agree with each other
+        session.execute(sql.text('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ'))
+        export_counts(session, args.compact, args.force)
+        export_education_counts(session, args.compact, args.force)
+        export_judges_wait(session, args.compact, args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,87 @@
 import argparse
 import csv
+import hashlib
 import os
 import re
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from sqlalchemy import sql
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 import column_name_maps
 from database_utils import get_session, recreate_db
 from models import Appointment, Congress, Court, Education, Judge, UnsuccessfulNomination
-from scripts.congress_pres_data import main as get_congress_pres_data
+from scripts.bulk_copy import CopyStats, copy_table, create_indexes, drop_secondary_indexes
+from scripts.summary_tables import (
+    create_summary_triggers,
+    refresh_summaries,
+    refresh_unsuccessful_counts,
+)
+from snapshot import publish_data_version
 
 
 DATE_FORMAT = '%Y-%m-%d'
+# The CSV has presidents as `XXXXX XXXX (STARTYEAR - ENDYEAR)`, everything from ` (` is dropped
+PRESIDENT_PATTERN = re.compile(r'(\w.*)\W\(')
 MAX_DUP_COLS = 6
 
+# Creates a table of year, party mapping for easier joins
+INSERT_YEAR_PARTY = """
+    INSERT INTO year_party(year, party) (
+        SELECT year, party
+        FROM (SELECT generate_series(1901, 2019, 2) AS year) as year_sq
+        JOIN (SELECT party FROM (VALUES
+            ('Democratic'),
+            ('Republican')) AS party_table (party)) as party_sq_party
+        ON 1 = 1)
+    ON CONFLICT DO NOTHING
+"""
+
 
 def get_models(row):
     """
     """
-    judge_row = Judge(**{
+    return build_models(*get_row_dicts(row))
+
+
+def build_models(judge_dict, appointment_dicts, education_dicts):
+    judge_row = Judge(**judge_dict)
+    judge_row.appointments.extend(
+        Appointment(**appointment_dict) for appointment_dict in appointment_dicts)
+    judge_row.educations.extend(
+        Education(**education_dict) for education_dict in education_dicts)
+    return judge_row
+
+
+def get_row_dicts(row, column_plan=None):
+    """Splits a row of the FJC export into the column values of its judge, appointments and
+    educations. Pass the `get_column_plan` of the file's header when transforming many rows.
+    """
+    if column_plan is None:
+        column_plan = get_column_plan(tuple(row))
+    appointment_slots, education_slots = column_plan
+
+    judge_dict = {
         slug_col: clean_data(slug_col, row[col])
         for col, slug_col in column_name_maps.demographic_col_map.items()
-    })
+    }
+    # Lets an incremental load skip judges whose source row has not changed
+    judge_dict['source_hash'] = hashlib.sha1(
+        '\x1f'.join(str(value) for value in row.values()).encode()).hexdigest()
+    appointment_dicts = []
+    education_dicts = []
 
     # A judge can have multiple appointments. There are a lot of columns associated with an appointment
     # and they are in the data as "<Column Description (N)>", go through and link all of these
     # together. There is no way of knowning how many (N) a judge may have and it's not sufficient to
     # just look for one column that has data, so loop through and look if _any_ of the appointment
     # pattern columns have data up to the MAX_DUP_COLS appointment.
-    for i in range(1, MAX_DUP_COLS):
+    for appointment_slot in appointment_slots:
         appointment_dict = {}
-        for col, slug_col in column_name_maps.appt_col_map.items():
-            appt_row_val = row.get(_get_column_pattern(col, i))
+        for col, slug_col in appointment_slot:
+            appt_row_val = row[col]
             if appt_row_val:
                 appointment_dict[slug_col] = clean_data(slug_col, appt_row_val)
         if len(appointment_dict) == 0:
@@ -44,8 +93,13 @@ def get_models(row):
             for date_col in column_name_maps.START_DATE_COLUMNS_TO_PARSE
             if appointment_dict.get(date_col))
 
-        appointment_dict['start_year'] = datetime.strptime(
-            appointment_dict['start_date'], DATE_FORMAT).year
+        appointment_dict['start_year'] = _parse_date(appointment_dict['start_date']).year
+
+        if appointment_dict.get('nomination_date'):
+            appointment_dict['nomination_year'] = _parse_date(
+                appointment_dict['nomination_date']).year
+        else:
+            appointment_dict['nomination_year'] = None
 
         # Multiple columns indicate a judgeship ending, take the min of them if duplicates.
         potential_end_dates = [
@@ -60,34 +114,100 @@ def get_models(row):
             appointment_dict['end_date'] = min(potential_end_dates)
 
         if appointment_dict['end_date']:
-            appointment_dict['end_year'] = datetime.strptime(
-                appointment_dict['end_date'], DATE_FORMAT).year
+            appointment_dict['end_year'] = _parse_date(appointment_dict['end_date']).year
         else:
             appointment_dict['end_year'] = None
 
         if appointment_dict.get('confirmation_date') and appointment_dict.get('nomination_date'):
             timedelta_to_confirm = (
-                datetime.strptime(appointment_dict['confirmation_date'], DATE_FORMAT) -
-                datetime.strptime(appointment_dict['nomination_date'], DATE_FORMAT)
+                _parse_date(appointment_dict['confirmation_date']) -
+                _parse_date(appointment_dict['nomination_date'])
             )
             appointment_dict['days_to_confirm'] = timedelta_to_confirm.days
         else:
             appointment_dict['days_to_confirm'] = None
 
-        judge_row.appointments.append(Appointment(**appointment_dict))
+        appointment_dict['nid'] = judge_dict['nid']
+        appointment_dicts.append(appointment_dict)
 
     education_dict = defaultdict(dict)
-    for i in range(1, MAX_DUP_COLS):
-        for col, slug_col in column_name_maps.edu_col_map.items():
-            edu_row_val = row.get(_get_column_pattern(col, i))
+    for i, education_slot in enumerate(education_slots, 1):
+        for col, slug_col in education_slot:
+            edu_row_val = row[col]
             if edu_row_val:
                 education_dict[i][slug_col] = clean_data(slug_col, edu_row_val)
         if len(education_dict[i]) == 0:
             education_dict.pop(i)
             continue
-        judge_row.educations.append(Education(**education_dict[i]))
+        education_dict[i]['nid'] = judge_dict['nid']
+        education_dicts.append(education_dict[i])
 
-    return judge_row
+    return judge_dict, appointment_dicts, education_dicts
+
+
+@lru_cache(maxsize=None)
+def get_column_plan(fieldnames):
+    """The `(column, slug_col)` pairs of every appointment and education slot present in a header,
+    so the `<Column Description (N)>` names are only built once per file.
+    """
+    fieldnames = set(fieldnames)
+
+    def _slots(col_map):
+        return [
+            [
+                (_get_column_pattern(col, i), slug_col)
+                for col, slug_col in col_map.items()
+                if _get_column_pattern(col, i) in fieldnames
+            ]
+            for i in range(1, MAX_DUP_COLS)
+        ]
+
+    return _slots(column_name_maps.appt_col_map), _slots(column_name_maps.edu_col_map)
+
+
+def iter_row_dict_chunks(f, chunk_size, workers=1):
+    """Lazily transforms an open FJC export into lists of up to `chunk_size` `get_row_dicts`
+    results, in the order of the file. With several `workers` the chunks are transformed in a
+    process pool, with only a couple of chunks per worker in flight at a time.
+    """
+    reader = csv.DictReader(f, quoting=csv.QUOTE_NONNUMERIC)
+    column_plan = get_column_plan(tuple(reader.fieldnames))
+    chunks = chunked(reader, chunk_size)
+
+    if workers <= 1:
+        for chunk in chunks:
+            yield transform_chunk(chunk, column_plan)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(transform_chunk, chunk, column_plan))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def transform_chunk(rows, column_plan):
+    return [get_row_dicts(row, column_plan) for row in rows]
+
+
+def chunked(iterable, chunk_size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@lru_cache(maxsize=None)
+def _parse_date(value):
+    # The same dates repeat across columns and judges, only parse each distinct one once
+    return datetime.strptime(value, DATE_FORMAT)
 
 
 def clean_data(column_name, value):
@@ -121,7 +241,14 @@ def _clean_year(value):
 
 
 def insert_court_types(session):
-    select_stmnt = (
+    session.execute(
+        Court.__table__.insert()
+        .from_select([Court.court_type, Court.court_name], _court_types_select())
+    )
+
+
+def _court_types_select():
+    return (
         sql.select([Appointment.court_type, Appointment.court_name])
         .where(
             sql.and_(
@@ -134,9 +261,39 @@ def insert_court_types(session):
         .group_by(Appointment.court_type, Appointment.court_name)
     )
 
+
+def resolve_congress(session):
+    """Points every appointment at the congress it was nominated in."""
+    table = Appointment.__table__
     session.execute(
-        Court.__table__.insert()
-        .from_select([Court.court_type, Court.court_name], select_stmnt)
+        table.update()
+        .where(
+            sql.and_(
+                Appointment.nomination_year >= Congress.start_year,
+                Appointment.nomination_year < Congress.end_year,
+                Appointment.congress_title.is_distinct_from(Congress.title),
+            )
+        )
+        .values(congress_title=Congress.title)
+    )
+    # Nominations outside of every congress in `congress_data.csv`
+    session.execute(
+        table.update()
+        .where(
+            sql.and_(
+                Appointment.congress_title.isnot(None),
+                sql.or_(
+                    Appointment.nomination_year.is_(None),
+                    ~sql.exists().where(
+                        sql.and_(
+                            Appointment.nomination_year >= Congress.start_year,
+                            Appointment.nomination_year < Congress.end_year,
+                        )
+                    )
+                )
+            )
+        )
+        .values(congress_title=None)
     )
 
 
@@ -157,28 +314,82 @@ def insert_year_party(session):
     )
 
 
-def insert_congress(session):
+def insert_congress(session, copy_stats):
+    congresses = [Congress(**row) for row in read_congress()]
+    with copy_stats.timing(Congress.__tablename__, len(congresses)):
+        session.add_all(congresses)
+        session.flush()
+
+
+def read_congress():
     with open('./data/congress_data.csv') as f:
-        reader = csv.DictReader(f)
-        all_row_objs = [Congress(**row) for row in reader]
-        session.add_all(all_row_objs)
+        return list(csv.DictReader(f))
 
 
-def insert_unsuccessful(session):
+def insert_unsuccessful(session, copy_stats):
+    nominations = [
+        UnsuccessfulNomination(**row)
+        for row in resolve_unsuccessful(session, read_unsuccessful())
+    ]
+    with copy_stats.timing(UnsuccessfulNomination.__tablename__, len(nominations)):
+        session.add_all(nominations)
+        session.flush()
+
+
+def resolve_unsuccessful(session, rows):
+    """Adds the party of the nominating president and the court as the FJC export names it to
+    every unsuccessful nomination, once here instead of in every query. Needs the judges and
+    congresses loaded.
+    """
+    # The party a president appointed most judges for, some switched parties
+    party_counts = defaultdict(lambda: defaultdict(int))
+    for president, party, count in (
+        session
+        .query(
+            Appointment.appointing_president,
+            Appointment.party_of_appointing_president,
+            sql.func.count(),
+        )
+        .group_by(Appointment.appointing_president, Appointment.party_of_appointing_president)
+    ):
+        party_counts[president][party] = count
+    president_party = {
+        president: max(counts, key=counts.get) for president, counts in party_counts.items()
+    }
+    congress_party = dict(session.query(Congress.start_year, Congress.party_of_president))
+    court_types = dict(
+        session.query(Appointment.court_name, Appointment.court_type).distinct())
+
+    for row in rows:
+        row['party'] = president_party.get(
+            row['president'], congress_party.get(int(row['congress_start_year'])))
+        row['fjc_court_name'] = next(
+            (name for name in _fjc_court_names(row['court_name']) if name in court_types), None)
+        row['court_type'] = court_types.get(row['fjc_court_name'])
+    return rows
+
+
+def _fjc_court_names(court_name):
+    # The CSV drops the court type from the name, `Ninth Circuit` or `Southern District of Ohio`
+    return [
+        court_name,
+        f'U.S. Court of Appeals for the {court_name}',
+        f'U.S. District Court for the {court_name}',
+        f'{court_name} of the United States',
+    ]
+
+
+def read_unsuccessful():
     with open('./data/unsuccessful_nominations.csv') as f:
         def _parse_clean_data(row):
             row['recess_appointment'] = True if row['recess_appointment'] == 'True' else False
             # Convert '' into None
             if not row['congress_end_year']:
                 row['congress_end_year'] = None
-            # This data represented president names as XXXXX XXXX (STARTYEAR - ENDYEAR)
-            # Strip of everything starting at ` (`
-            regex_match = re.compile(r'(\w.*)\W\(')
-            row['president'] = re.findall(regex_match, row['president'])[0]
+            row['president'] = PRESIDENT_PATTERN.findall(row['president'])[0]
             return row
         reader = csv.DictReader(f)
-        rows = [_parse_clean_data(row) for row in reader]
-        session.add_all([UnsuccessfulNomination(**row) for row in rows])
+        return [_parse_clean_data(row) for row in reader]
 
 
 def _parse_args():
@@ -192,44 +403,278 @@ def _parse_args():
         '--file_name', '-f', type=str, dest='file_name', required=True,
         help="File name to use")
 
+    parser.add_argument(
+        '--bulk', action='store_true', dest='bulk',
+        help="Stream the rows in with COPY and build the indexes afterwards")
+
+    parser.add_argument(
+        '--chunk-size', type=int, dest='chunk_size', default=1000,
+        help="Number of judges written to the database at a time")
+
+    parser.add_argument(
+        '--workers', type=int, dest='workers', default=1,
+        help="Number of processes transforming the rows")
+
+    parser.add_argument(
+        '--incremental', action='store_true', dest='incremental',
+        help="Upsert only what changed into the existing database instead of recreating it")
+
     return parser.parse_args()
 
 
+def insert_judges(session, file_path, chunk_size, copy_stats, workers=1):
+    with open(file_path) as f:
+        for chunk in iter_row_dict_chunks(f, chunk_size, workers):
+            # Adds all the tables from the base dataset of appointed judges
+            judges = [build_models(*row_dicts) for row_dicts in chunk]
+            # Their appointments and educations are flushed along with them
+            with copy_stats.timing(Judge.__tablename__, len(judges)):
+                session.add_all(judges)
+                session.flush()
+            # Nothing reads the judges back, keeps the identity map from growing with the file
+            session.expunge_all()
+
+
+def bulk_insert_judges(session, file_path, chunk_size, copy_stats, workers=1):
+    with open(file_path) as f:
+        for chunk in iter_row_dict_chunks(f, chunk_size, workers):
+            # Parents first for the foreign keys
+            copy_table(session, Judge, (judge_dict for judge_dict, _, _ in chunk), copy_stats)
+            copy_table(
+                session, Appointment,
+                (appt_dict for _, appt_dicts, _ in chunk for appt_dict in appt_dicts),
+                copy_stats)
+            copy_table(
+                session, Education,
+                (edu_dict for _, _, edu_dicts in chunk for edu_dict in edu_dicts),
+                copy_stats)
+
+
+def full_load(session, file_path, chunk_size, workers=1, bulk=False, copy_stats=None):
+    """Fills a freshly created database from the export and reference CSVs. The time spent
+    writing the rows of every table adds up in `copy_stats`.
+    """
+    copy_stats = CopyStats() if copy_stats is None else copy_stats
+    if bulk:
+        # Maintaining the indexes row by row is slower than building them once at the end
+        bulk_tables = [Judge, Appointment, Education, Congress, UnsuccessfulNomination]
+        indexes = drop_secondary_indexes(session, bulk_tables)
+        bulk_insert_judges(session, file_path, chunk_size, copy_stats, workers)
+    else:
+        insert_judges(session, file_path, chunk_size, copy_stats, workers)
+
+    session.execute(INSERT_YEAR_PARTY)
+
+    session.flush()
+    # Creates a table with all the unique court types for faster filtering
+    insert_court_types(session)
+
+    if bulk:
+        copy_table(session, Congress, read_congress(), copy_stats)
+        copy_table(
+            session, UnsuccessfulNomination,
+            resolve_unsuccessful(session, read_unsuccessful()), copy_stats)
+        copy_stats.report()
+        create_indexes(session, indexes)
+    else:
+        # Creates a table with stats on each congress (num per party, etc.)
+        insert_congress(session, copy_stats)
+        # Creates a table with all the unconfirmed judges by each president
+        insert_unsuccessful(session, copy_stats)
+
+    session.flush()
+    resolve_congress(session)
+    # Pre-aggregates the dashboard counts and wait times, later appointment changes only
+    # refresh the courts they touch (see `scripts/summary_tables.py`)
+    refresh_summaries(session, full=True)
+    refresh_unsuccessful_counts(session)
+    create_summary_triggers(session)
+
+
+def incremental_load(session, file_path, chunk_size, workers=1):
+    """Brings an existing database in line with the export and reference CSVs in the current
+    transaction. Only judges whose source row hash changed are rewritten, the summary tables are
+    refreshed for the courts those changes touched.
+    """
+    existing_hashes = dict(session.query(Judge.nid, Judge.source_hash))
+    seen_nids = set()
+    n_changed = 0
+
+    with open(file_path) as f:
+        for chunk in iter_row_dict_chunks(f, chunk_size, workers):
+            changed = []
+            for row_dicts in chunk:
+                nid = int(row_dicts[0]['nid'])
+                seen_nids.add(nid)
+                if existing_hashes.get(nid) != row_dicts[0]['source_hash']:
+                    changed.append(row_dicts)
+            if changed:
+                upsert_judges(session, changed)
+                n_changed += len(changed)
+
+    removed_nids = list(existing_hashes.keys() - seen_nids)
+    if removed_nids:
+        _delete_judge_children(session, removed_nids)
+        session.execute(Judge.__table__.delete().where(Judge.nid.in_(removed_nids)))
+    print(f'Upserted {n_changed} changed judges, deleted {len(removed_nids)} removed judges')
+
+    session.execute(INSERT_YEAR_PARTY)
+    sync_court_types(session)
+    n_congress_changed = upsert_congress(session)
+    upsert_unsuccessful(session)
+    resolve_congress(session)
+
+    # Congress boundaries change the wait times of every court
+    refresh_summaries(session, full=n_congress_changed > 0)
+    refresh_unsuccessful_counts(session)
+
+
+def upsert_judges(session, row_dicts_list):
+    """Replaces the judges, with all their appointments and educations."""
+    judge_rows = _column_rows(Judge, [judge_dict for judge_dict, _, _ in row_dicts_list])
+    _delete_judge_children(session, [judge_row['nid'] for judge_row in judge_rows])
+
+    upsert_stmnt = pg_insert(Judge.__table__)
+    upsert_stmnt = upsert_stmnt.on_conflict_do_update(
+        index_elements=[Judge.nid],
+        set_={
+            column.name: upsert_stmnt.excluded[column.name]
+            for column in Judge.__table__.columns if column.name != 'nid'
+        }
+    )
+    session.execute(upsert_stmnt, judge_rows)
+
+    appointment_rows = _column_rows(
+        Appointment, [appt for _, appts, _ in row_dicts_list for appt in appts])
+    if appointment_rows:
+        session.execute(Appointment.__table__.insert(), appointment_rows)
+    education_rows = _column_rows(
+        Education, [edu for _, _, edus in row_dicts_list for edu in edus])
+    if education_rows:
+        session.execute(Education.__table__.insert(), education_rows)
+
+
+def _delete_judge_children(session, nids):
+    session.execute(Appointment.__table__.delete().where(Appointment.nid.in_(nids)))
+    session.execute(Education.__table__.delete().where(Education.nid.in_(nids)))
+
+
+def _column_rows(model, dicts):
+    # executemany needs every row to have the same keys, the transform leaves out empty columns
+    columns = [column.name for column in model.__table__.columns if column.name != 'id']
+    rows = [{column: row_dict.get(column) for column in columns} for row_dict in dicts]
+    if 'nid' in columns:
+        for row in rows:
+            row['nid'] = int(row['nid'])
+    return rows
+
+
+def sync_court_types(session):
+    court_key = sql.tuple_(Court.court_type, Court.court_name)
+    session.execute(Court.__table__.delete().where(~court_key.in_(_court_types_select())))
+    session.execute(
+        Court.__table__.insert()
+        .from_select(
+            [Court.court_type, Court.court_name],
+            _court_types_select().except_(sql.select([Court.court_type, Court.court_name]))
+        )
+    )
+
+
+def upsert_congress(session):
+    """Returns the number of congresses inserted, updated or deleted."""
+    congress_rows = read_congress()
+    table = Congress.__table__
+
+    upsert_stmnt = pg_insert(table)
+    upsert_stmnt = upsert_stmnt.on_conflict_do_update(
+        index_elements=[Congress.title],
+        set_={column.name: upsert_stmnt.excluded[column.name] for column in table.columns},
+        # Leaves unchanged rows alone so the rowcount only has the changes
+        where=sql.or_(*[
+            table.c[column.name].is_distinct_from(upsert_stmnt.excluded[column.name])
+            for column in table.columns
+        ])
+    )
+    n_changed = 0
+    for row in congress_rows:
+        n_changed += session.execute(upsert_stmnt, row).rowcount
+
+    titles = [row['title'] for row in congress_rows]
+    # Let go of the removed congresses first, `resolve_congress` re-points the appointments after
+    session.execute(
+        Appointment.__table__.update()
+        .where(Appointment.congress_title.notin_(titles))
+        .values(congress_title=None)
+    )
+    n_changed += session.execute(table.delete().where(Congress.title.notin_(titles))).rowcount
+    return n_changed
+
+
+def upsert_unsuccessful(session):
+    table = UnsuccessfulNomination.__table__
+    key_columns = [column.name for column in table.primary_key.columns]
+    rows = resolve_unsuccessful(session, read_unsuccessful())
+
+    def _key(row):
+        key = dict(row)
+        # '1789-09-24 00:00:00' in the CSV
+        key['nomination_date'] = datetime.strptime(
+            str(key['nomination_date'])[:10], DATE_FORMAT).date()
+        return tuple(key[column] for column in key_columns)
+
+    existing_keys = {
+        tuple(key) for key in session.query(*[table.c[column] for column in key_columns])}
+    source_keys = {_key(row) for row in rows}
+    stale_keys = list(existing_keys - source_keys)
+    if stale_keys:
+        session.execute(
+            table.delete()
+            .where(sql.tuple_(*[table.c[column] for column in key_columns]).in_(stale_keys))
+        )
+
+    new_rows = [row for row in rows if _key(row) not in existing_keys]
+    if new_rows:
+        session.execute(table.insert(), new_rows)
+
+    update_stmnt = pg_insert(table)
+    update_stmnt = update_stmnt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={
+            'congress_start_year': update_stmnt.excluded.congress_start_year,
+            'congress_end_year': update_stmnt.excluded.congress_end_year,
+            'party': update_stmnt.excluded.party,
+            'court_type': update_stmnt.excluded.court_type,
+            'fjc_court_name': update_stmnt.excluded.fjc_court_name,
+        }
+    )
+    existing_rows = [row for row in rows if _key(row) in existing_keys]
+    if existing_rows:
+        session.execute(update_stmnt, existing_rows)
+
+
 def main():
     args = _parse_args()
     file_name = args.file_name
     directory = args.directory
 
+    if args.incremental:
+        # Stays up for the dashboard, everything changes in one transaction
+        with get_session() as session:
+            incremental_load(
+                session, os.path.join(directory, file_name), args.chunk_size, args.workers)
+        publish_data_version()
+        return
+
     recreate_db()
     with get_session() as session:
-        with open(os.path.join(directory, file_name)) as f:
-            row_objs = []
-            for row in csv.DictReader(f, quoting=csv.QUOTE_NONNUMERIC):
-                # Adds all the tables from the base dataset of appointed judges
-                row_objs.append(get_models(row))
-        session.add_all(row_objs)
-
-        # Creates a table of year, party mapping for easier joins
-        session.execute(
-            """
-            INSERT INTO year_party(year, party) (
-                SELECT year, party
-                FROM (SELECT generate_series(1901, 2019, 2) AS year) as year_sq
-                JOIN (SELECT party FROM (VALUES
-                    ('Democratic'),
-                    ('Republican')) AS party_table (party)) as party_sq_party
-                ON 1 = 1)
-            """
-        )
-
-        session.flush()
-        # Creates a table with all the unique court types for faster filtering
-        insert_court_types(session)
+        full_load(
+            session, os.path.join(directory, file_name), args.chunk_size, args.workers,
+            bulk=args.bulk)
 
-        # Creates a table with stats on each congress (num per party, etc.)
-        insert_congress(session)
-        # Creates a table with all the unconfirmed judges by each president
-        insert_unsuccessful(session)
+    # Only after the commit, tells running apps to drop their cached figures and starting ones
+    # where to find their snapshot
+    publish_data_version()
 
 
 if __name__ == "__main__":
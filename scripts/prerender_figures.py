@@ -0,0 +1,115 @@
+"""Renders the graphs of every court type and court name selection into the figure store, so
+the app answers them with a lookup instead of queries and drawing. Run after `load_data`:
+
+    PYTHONPATH=.:app:scripts python scripts/prerender_figures.py [--workers 4]
+
+Combinations are rendered in parallel processes, each with its own database connections. The
+figures are stored under the data version `load_data` last published, and the figures of older
+versions are dropped once they are all written. Multi-select combinations are not rendered, the
+app renders those when asked. Figures are keyed by the settings they are drawn with, e.g.
+`PRECOMPUTE_WAIT_TIME_BOXES`, and the app renders them itself until they are prerendered again
+with its settings.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from config import app_cfg
+from data_version import read_data_version
+from figure_store import FigureStore, figure_key
+from snapshot import read_snapshot
+
+# Set in every worker process by `_init_worker`
+_count_cube = None
+
+
+def get_combinations(court_type_name):
+    """Every `(court_type_select, court_name_select)` with at most one of each, a court name only
+    with its own court type since any other pair selects nothing.
+    """
+    combinations = {(None, None): None}
+    for court_type, court_names in court_type_name.items():
+        combinations[(court_type, None)] = None
+        for court_name in court_names:
+            combinations[(None, court_name)] = None
+            combinations[(court_type, court_name)] = None
+    return list(combinations)
+
+
+def _init_worker(count_cube):
+    global _count_cube
+    _count_cube = count_cube
+
+
+def render_combination(court_type_select, court_name_select):
+    """`(figure_key, figure_json)` of every graph the app would render for the selection."""
+    from database_utils import get_request_session
+    from tabs.counts_tab import update_line_graph
+    from tabs.unconfirmed_tab import update_unconfirmed_graph
+    from tabs.wait_time_tab import update_wait_time_graph
+
+    figures = {
+        'party-counts': update_line_graph(
+            None, court_type_select, court_name_select, _count_cube),
+    }
+    # No statement timeout, nobody is waiting on these
+    with get_request_session(statement_timeout_ms=0) as session:
+        figures['wait-time'] = update_wait_time_graph(
+            session, court_type_select, court_name_select,
+            precompute_boxes=app_cfg['precompute_wait_time_boxes'],
+        )
+        figures['unconfirmed'] = update_unconfirmed_graph(
+            session,
+            [court_type_select] if court_type_select else [],
+            [court_name_select] if court_name_select else [],
+        )
+    return [
+        (figure_key(graph, court_type_select, court_name_select), figure.to_json())
+        for graph, figure in figures.items()
+    ]
+
+
+def prerender(workers, figure_store):
+    data_version = read_data_version()
+    snapshot = read_snapshot()
+    if snapshot is None or snapshot['data_version'] != data_version:
+        raise SystemExit(f'No snapshot for data version {data_version}, run load_data first')
+
+    combinations = get_combinations(snapshot['court_type_name'])
+    start = time.perf_counter()
+    figures = []
+    with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(snapshot['count_cube'],)) as executor:
+        futures = [
+            executor.submit(render_combination, court_type_select, court_name_select)
+            for court_type_select, court_name_select in combinations
+        ]
+        for future in as_completed(futures):
+            figures.extend(future.result())
+
+    figure_store.write(data_version, figures)
+    print(
+        f'Rendered {len(figures)} figures of {len(combinations)} combinations for data version '
+        f'{data_version} in {time.perf_counter() - start:.1f}s'
+    )
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        '--workers', type=int, default=os.cpu_count(), dest='workers',
+        help="Processes rendering combinations, each holds a database connection")
+
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    prerender(args.workers, FigureStore())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""Builds the reference CSVs `load_data` reads from HTML snapshots kept in `data/`:
+
+    data/congress_divisions.html        -> data/congress_data.csv
+    data/unsuccessful_nominations.html  -> data/unsuccessful_nominations.csv
+
+    PYTHONPATH=.:app:scripts python scripts/scrapers.py [--fetch]
+
+Nothing is downloaded unless `--fetch` is given, which refreshes the Wikipedia snapshot of the
+congress divisions. The FJC page of unsuccessful nominations has a robot detection, so its
+snapshot has to be saved from a browser. Snapshots are parsed with `lxml` in a single pass, and
+not at all when their sha1 matches the one recorded when their CSV was last written. Those sha1s
+are local to a checkout and not committed.
+
+`tests/test_scrapers.py` checks that every snapshot still parses into its committed CSV, and
+fails when one is missing. Only the snapshot of unsuccessful nominations is committed so far, its
+congress case is marked as expected to fail: after `--fetch`, commit the congress snapshot and
+remove that mark.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+from csv import DictWriter
+from datetime import datetime
+
+from lxml import etree
+
+
+CONGRESS_URL = 'https://en.wikipedia.org/wiki/Party_divisions_of_United_States_Congresses'
+CONGRESS_SNAPSHOT_PATH = './data/congress_divisions.html'
+CONGRESS_CSV_PATH = './data/congress_data.csv'
+
+UNSUCCESSFUL_URL = 'https://www.fjc.gov/node/7511'
+UNSUCCESSFUL_SNAPSHOT_PATH = './data/unsuccessful_nominations.html'
+UNSUCCESSFUL_CSV_PATH = './data/unsuccessful_nominations.csv'
+
+# sha1 of the snapshot every CSV was last written from
+SNAPSHOT_HASHES_PATH = './data/scraper_snapshots.json'
+
+# character for '-'
+WIKI_DASH = chr(8211)
+CONGRESS_FIRST_YEAR = '1901'
+CONGRESS_LAST_YEAR = '2019'
+PARTY_COLORS = {
+    '#FFB6B6': 'Republican',
+    '#B0CEFF': 'Democratic',
+}
+# Updates the data from wikipedia when there is a split in the number of senators in the term.
+# Chosen values are based on reading the citations and choosing the most appropriate (i.e. value)
+# that is most representative of the Congression term.
+CONGRESS_HAND_FILL = {
+    '115th': {
+        'senate_democrats': 47,
+        'senate_republicans': 51,
+    },
+    '111th': {
+        'senate_democrats': 57,
+        'senate_republicans': 41,
+    },
+    '107th': {
+        'senate_republicans': 49,
+        'senate_independents': 1,
+    },
+}
+
+NOMINATION_DATE_FORMATS = ('%B %d, %Y', '%B, %d, %Y')
+RECESS_APPOINTMENT_PATTERN = re.compile(r'.*(\(recess appointment\))')
+
+
+def iter_tables(snapshot_path):
+    """Every `<table>` of the snapshot, each yielded once it has been parsed, nested ones before
+    the table around them. Outermost tables are cleared after, so the document is never held in
+    memory as a whole.
+    """
+    # Snapshots are saved as UTF-8, whether or not the page declares it
+    tables = etree.iterparse(
+        snapshot_path, events=('start', 'end'), tag='table', html=True, encoding='utf-8')
+    depth = 0
+    for event, table in tables:
+        if event == 'start':
+            depth += 1
+            continue
+        depth -= 1
+        yield table
+        # A nested table is still part of the one around it, yielded later
+        if depth == 0:
+            table.clear()
+
+
+def text(element):
+    # Text content of the element and its descendants, like BeautifulSoup's `.text`
+    return ''.join(element.itertext(tag=etree.Element))
+
+
+def scrape_congress(snapshot_path=CONGRESS_SNAPSHOT_PATH):
+    table = next(
+        table for table in iter_tables(snapshot_path)
+        if 'wikitable' in table.get('class', '').split()
+    )
+
+    data = []
+    president = party_president = None
+    in_range = False
+    for row in table.iter('tr'):
+        columns = list(row.iter('td'))
+        if len(columns) < 2:
+            continue
+        time_span = clean_col(columns[1])
+        first_year = time_span.split(WIKI_DASH)[0]
+        if first_year == CONGRESS_FIRST_YEAR:
+            in_range = True
+        if not in_range:
+            continue
+
+        # The president cell spans all the congresses of a term
+        if len(columns) == 13:
+            president = clean_col(columns[12])
+            party_president = PARTY_COLORS[get_color(columns[12])]
+        data.append(get_congress_row(columns, time_span, president, party_president))
+
+        if first_year == CONGRESS_LAST_YEAR:
+            break
+    return data
+
+
+def get_congress_row(columns, time_span, president, party_president):
+    start_year, end_year = [int(x) for x in time_span.split(WIKI_DASH)]
+    row_dict = {
+        'title': clean_col(columns[0]),
+        'time_span': time_span,
+        'start_year': start_year,
+        'end_year': end_year,
+        'total_senators': mk_int(clean_col(columns[2])),
+        'senate_democrats': mk_int(clean_col(columns[3])),
+        'senate_republicans': mk_int(clean_col(columns[4])),
+        'total_house': mk_int(clean_col(columns[7])),
+        'house_democrats': mk_int(clean_col(columns[8])),
+        'house_republicans': mk_int(clean_col(columns[9])),
+        'president': president,
+        'party_of_president': party_president,
+        'senate_independents': mk_int(clean_col(columns[5])),
+        'house_independents': mk_int(clean_col(columns[10])),
+    }
+    row_dict.update(CONGRESS_HAND_FILL.get(row_dict['title'], {}))
+
+    senate_independents = row_dict['senate_independents']
+    senate_independents_color = get_color(columns[5])
+    row_dict['senate_dem_caucus'] = row_dict['senate_democrats']
+    row_dict['senate_rep_caucus'] = row_dict['senate_republicans']
+    if senate_independents_color:
+        if PARTY_COLORS[senate_independents_color] == 'Democratic':
+            row_dict['senate_dem_caucus'] += senate_independents
+        elif PARTY_COLORS[senate_independents_color] == 'Republican':
+            row_dict['senate_rep_caucus'] += senate_independents
+
+    if row_dict['senate_rep_caucus'] > row_dict['senate_dem_caucus']:
+        row_dict['senate_majority_party'] = 'Republican'
+    elif row_dict['senate_rep_caucus'] < row_dict['senate_dem_caucus']:
+        row_dict['senate_majority_party'] = 'Democratic'
+    else:
+        row_dict['senate_majority_party'] = row_dict['party_of_president']
+
+    if row_dict['party_of_president'] == 'Republican':
+        row_dict['president_party_senate_majority'] = \
+            row_dict['senate_rep_caucus'] - row_dict['senate_dem_caucus']
+    else:
+        row_dict['president_party_senate_majority'] = \
+            row_dict['senate_dem_caucus'] - row_dict['senate_rep_caucus']
+
+    row_dict['president_party_senate_majority_perc'] = \
+        row_dict['president_party_senate_majority'] / row_dict['total_senators']
+    return row_dict
+
+
+def clean_col(col):
+    return text(col).strip().split('[')[0]
+
+
+def mk_int(v):
+    if v.isdigit():
+        return int(v)
+    else:
+        return 0
+
+
+def get_color(col):
+    if col.get('style'):
+        return col.get('style').split(':')[1]
+    else:
+        return None
+
+
+def scrape_unsuccessful(snapshot_path=UNSUCCESSFUL_SNAPSHOT_PATH):
+    # A table per president, the first row is the president and the second the headers:
+    # Congress, Nominee, Court, Nomination Date, Outcome
+    data = []
+    for table in iter_tables(snapshot_path):
+        rows = list(table.iter('tr'))
+        president = text(rows[0])
+        for row in rows[2:]:
+            columns = [text(column) for column in row.iter('td')]
+            # congress column is blank for the rows after the first time mentioned
+            # look for a value, otherwise use the previous.
+            if columns[0].strip('\xa0'):
+                congress, yearspan = columns[0].strip('\xa0').split()  # 1st (1789-1791)
+                congress_start_year, congress_end_year = yearspan[1:-1].split('-')
+                congress_end_year = None if congress_end_year == 'present' else congress_end_year
+
+            raw_nomination_date = columns[3]
+            data.append({
+                'president': president,
+                'congress': congress,
+                'congress_start_year': congress_start_year,
+                'congress_end_year': congress_end_year,
+                'nominee': columns[1],
+                'court_name': columns[2],
+                'nomination_date': parse_nomination_date(raw_nomination_date),
+                'recess_appointment': bool(RECESS_APPOINTMENT_PATTERN.search(raw_nomination_date)),
+                'outcome': columns[4],
+            })
+    return data
+
+
+def parse_nomination_date(raw_nomination_date):
+    # Strips characters, not the suffix, kept from the original scraper so the dates match
+    str_nomination_date = raw_nomination_date.strip(' (recess appointment)')
+    for date_format in NOMINATION_DATE_FORMATS:
+        try:
+            return datetime.strptime(str_nomination_date, date_format)
+        except ValueError:
+            pass
+    raise ValueError(f'Unknown nomination date {raw_nomination_date!r}')
+
+
+def write_csv(path, data):
+    with open(path, 'w') as f:
+        writer = DictWriter(f, fieldnames=data[0].keys())
+        writer.writeheader()
+        writer.writerows(data)
+
+
+def fetch_snapshot(url, snapshot_path):
+    import requests
+
+    response = requests.get(url)
+    response.raise_for_status()
+    with open(snapshot_path, 'wb') as f:
+        f.write(response.content)
+
+
+def get_snapshot_hash(snapshot_path):
+    with open(snapshot_path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def refresh(scrape, snapshot_path, csv_path, hashes, force=False):
+    """Rewrites `csv_path` from the snapshot unless it was already written from the same one.
+    Returns whether it was rewritten.
+    """
+    snapshot_hash = get_snapshot_hash(snapshot_path)
+    if not force and hashes.get(csv_path) == snapshot_hash and os.path.exists(csv_path):
+        return False
+    write_csv(csv_path, scrape(snapshot_path))
+    hashes[csv_path] = snapshot_hash
+    return True
+
+
+def read_snapshot_hashes(path=SNAPSHOT_HASHES_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        '--fetch', action='store_true', dest='fetch',
+        help="Download a new snapshot of the congress divisions before parsing")
+
+    parser.add_argument(
+        '--force', action='store_true', dest='force',
+        help="Parse the snapshots even if they have not changed")
+
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    if args.fetch:
+        fetch_snapshot(CONGRESS_URL, CONGRESS_SNAPSHOT_PATH)
+
+    old_hashes = read_snapshot_hashes()
+    hashes = dict(old_hashes)
+    scrapers = [
+        (scrape_congress, CONGRESS_SNAPSHOT_PATH, CONGRESS_CSV_PATH),
+        (scrape_unsuccessful, UNSUCCESSFUL_SNAPSHOT_PATH, UNSUCCESSFUL_CSV_PATH),
+    ]
+    for scrape, snapshot_path, csv_path in scrapers:
+        if not os.path.exists(snapshot_path):
+            print(f'No snapshot at {snapshot_path}, keeping {csv_path}')
+            continue
+        refreshed = refresh(scrape, snapshot_path, csv_path, hashes, force=args.force)
+        print(f'{csv_path}: {"rewritten" if refreshed else "unchanged"}')
+
+    if hashes != old_hashes:
+        with open(SNAPSHOT_HASHES_PATH, 'w') as f:
+            json.dump(hashes, f, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+import argparse
+
+from sqlalchemy import sql
+
+from database_utils import get_session
+from models import (
+    Appointment,
+    Congress,
+    CongressWaitTime,
+    CourtYearPartyCount,
+    DirtySummaryCourt,
+    UnsuccessfulNomination,
+    UnsuccessfulNominationCount,
+    YearParty,
+)
+from snapshot import publish_data_version
+
+
+# Summary key of appointments missing their court type or name. They are never selected by a
+# court filter but still count towards every court, as they do when `appointment` is aggregated
+UNKNOWN_COURT = ''
+
+# Queues the old and new court of every changed appointment for `refresh_summaries`
+DIRTY_COURT_TRIGGER = """
+    CREATE OR REPLACE FUNCTION mark_dirty_summary_court() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            INSERT INTO dirty_summary_court(court_type, court_name)
+            VALUES (COALESCE(OLD.court_type, ''), COALESCE(OLD.court_name, ''))
+            ON CONFLICT DO NOTHING;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO dirty_summary_court(court_type, court_name)
+            VALUES (COALESCE(NEW.court_type, ''), COALESCE(NEW.court_name, ''))
+            ON CONFLICT DO NOTHING;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS appointment_dirty_summary_court ON appointment;
+    CREATE TRIGGER appointment_dirty_summary_court
+        AFTER INSERT OR UPDATE OR DELETE ON appointment
+        FOR EACH ROW EXECUTE PROCEDURE mark_dirty_summary_court();
+"""
+
+
+def create_summary_triggers(session):
+    session.execute(DIRTY_COURT_TRIGGER)
+
+
+def refresh_summaries(session, full=False):
+    """Rebuild the summary tables for the courts queued in `dirty_summary_court`, or for every
+    court if `full`. Returns the number of courts refreshed, `None` for a full refresh.
+    """
+    if full:
+        court_keys = None
+        session.execute(CourtYearPartyCount.__table__.delete())
+        session.execute(CongressWaitTime.__table__.delete())
+    else:
+        court_keys = [
+            tuple(court_key) for court_key in
+            session.query(DirtySummaryCourt.court_type, DirtySummaryCourt.court_name)
+        ]
+        if not court_keys:
+            return 0
+        for table in (CourtYearPartyCount, CongressWaitTime):
+            session.execute(
+                table.__table__.delete()
+                .where(sql.tuple_(table.court_type, table.court_name).in_(court_keys))
+            )
+
+    session.execute(
+        CourtYearPartyCount.__table__.insert()
+        .from_select(
+            [
+                CourtYearPartyCount.year,
+                CourtYearPartyCount.party,
+                CourtYearPartyCount.court_type,
+                CourtYearPartyCount.court_name,
+                CourtYearPartyCount.n_judges,
+                CourtYearPartyCount.n_appointed,
+                CourtYearPartyCount.n_terminated,
+            ],
+            _court_year_party_count_select(court_keys)
+        )
+    )
+    session.execute(
+        CongressWaitTime.__table__.insert()
+        .from_select(
+            [
+                CongressWaitTime.congress_start_year,
+                CongressWaitTime.president,
+                CongressWaitTime.party,
+                CongressWaitTime.court_type,
+                CongressWaitTime.court_name,
+                CongressWaitTime.n_confirmed,
+                CongressWaitTime.min_days_to_confirm,
+                CongressWaitTime.max_days_to_confirm,
+                CongressWaitTime.mean_days_to_confirm,
+                CongressWaitTime.days_to_confirm,
+            ],
+            _congress_wait_time_select(court_keys)
+        )
+    )
+    session.execute(DirtySummaryCourt.__table__.delete())
+    return None if full else len(court_keys)
+
+
+def refresh_unsuccessful_counts(session):
+    """Rebuilds `unsuccessful_nomination_count`, small enough to always rebuild in full."""
+    court_name = sql.func.coalesce(
+        UnsuccessfulNomination.fjc_court_name, UnsuccessfulNomination.court_name)
+    session.execute(UnsuccessfulNominationCount.__table__.delete())
+    session.execute(
+        UnsuccessfulNominationCount.__table__.insert()
+        .from_select(
+            [
+                UnsuccessfulNominationCount.congress_start_year,
+                UnsuccessfulNominationCount.president,
+                UnsuccessfulNominationCount.party,
+                UnsuccessfulNominationCount.court_type,
+                UnsuccessfulNominationCount.court_name,
+                UnsuccessfulNominationCount.n_nominations,
+            ],
+            sql.select([
+                UnsuccessfulNomination.congress_start_year,
+                UnsuccessfulNomination.president,
+                UnsuccessfulNomination.party,
+                UnsuccessfulNomination.court_type,
+                court_name,
+                sql.func.count(),
+            ])
+            .group_by(
+                UnsuccessfulNomination.congress_start_year,
+                UnsuccessfulNomination.president,
+                UnsuccessfulNomination.party,
+                UnsuccessfulNomination.court_type,
+                court_name,
+            )
+        )
+    )
+
+
+def _court_type():
+    return sql.func.coalesce(Appointment.court_type, UNKNOWN_COURT)
+
+
+def _court_name():
+    return sql.func.coalesce(Appointment.court_name, UNKNOWN_COURT)
+
+
+def _court_filter(court_keys):
+    if court_keys is None:
+        return []
+    return [sql.tuple_(_court_type(), _court_name()).in_(court_keys)]
+
+
+def _court_year_party_count_select(court_keys=None):
+    # Same conditions as `tabs.counts_tab`, evaluated once per court instead of per request
+    serving = sql.and_(
+        Appointment.start_year < YearParty.year + 2,
+        sql.or_(Appointment.end_year >= YearParty.year, Appointment.end_year.is_(None)),
+    )
+    appointed = sql.and_(
+        Appointment.start_year >= YearParty.year,
+        Appointment.start_year < YearParty.year + 2,
+    )
+    terminated = sql.and_(
+        Appointment.end_year >= YearParty.year - 2,
+        Appointment.end_year < YearParty.year,
+    )
+
+    return (
+        sql.select([
+            YearParty.year,
+            YearParty.party,
+            _court_type(),
+            _court_name(),
+            sql.func.count(Appointment.start_year).filter(serving),
+            sql.func.count(Appointment.start_year).filter(appointed),
+            sql.func.count(Appointment.start_year).filter(terminated),
+        ])
+        .select_from(
+            YearParty.__table__.join(
+                Appointment.__table__,
+                sql.and_(
+                    YearParty.party == Appointment.party_of_appointing_president,
+                    sql.or_(serving, appointed, terminated),
+                )
+            )
+        )
+        .where(sql.and_(*_court_filter(court_keys)))
+        .group_by(YearParty.year, YearParty.party, _court_type(), _court_name())
+    )
+
+
+def _congress_wait_time_select(court_keys=None):
+    return (
+        sql.select([
+            Congress.start_year,
+            Congress.president,
+            Congress.party_of_president,
+            _court_type(),
+            _court_name(),
+            sql.func.count(Appointment.days_to_confirm),
+            sql.func.min(Appointment.days_to_confirm),
+            sql.func.max(Appointment.days_to_confirm),
+            sql.func.avg(Appointment.days_to_confirm),
+            sql.func.array_agg(Appointment.days_to_confirm),
+        ])
+        .select_from(
+            Congress.__table__.join(
+                Appointment.__table__, Congress.title == Appointment.congress_title)
+        )
+        .where(sql.and_(Appointment.days_to_confirm.isnot(None), *_court_filter(court_keys)))
+        .group_by(
+            Congress.start_year,
+            Congress.president,
+            Congress.party_of_president,
+            _court_type(),
+            _court_name(),
+        )
+    )
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        '--full', action='store_true', dest='full',
+        help="Rebuild the summaries for every court instead of only the changed ones")
+
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    with get_session() as session:
+        n_courts = refresh_summaries(session, full=args.full)
+        if args.full:
+            refresh_unsuccessful_counts(session)
+    if n_courts != 0:
+        publish_data_version()
+    if n_courts is None:
+        print('Refreshed summaries for all courts')
+    else:
+        print(f'Refreshed summaries for {n_courts} changed courts')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Same imports as `PYTHONPATH=.:app:scripts`
+for path in (os.path.join(ROOT, 'scripts'), os.path.join(ROOT, 'app'), ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Database tests drop and recreate this database, like `benchmarks` does `courts_bench`
+os.environ.setdefault('POSTGRES_DB', 'courts_test')
+
+COURTS = [
+    ('U.S. District Court', 'District of Columbia'),
+    ('U.S. District Court', 'Southern District of New York'),
+    ('U.S. Court of Appeals', 'Ninth Circuit'),
+    ('U.S. Court of Appeals', None),
+    (None, 'Court of Claims'),
+]
+PARTIES = ['Democratic', 'Republican', 'Whig', None]
+# The `year_party` grid `load_data.INSERT_YEAR_PARTY` inserts
+YEARS = range(1901, 2020, 2)
+YEAR_PARTIES = ['Democratic', 'Republican']
+
+
+def random_appointments(rng, n):
+    """Appointment rows as dicts, with the bad data the loaders let through: missing courts,
+    parties outside `year_party`, years before 1901 and appointments ending before they start.
+    """
+    appointments = []
+    for i in range(n):
+        court_type, court_name = rng.choice(COURTS)
+        start_year = rng.choice([None] + list(range(1880, 2021)))
+        end_year = rng.choice([None, None] + list(range(1880, 2021)))
+        appointments.append({
+            'id': i + 1,
+            'nid': i + 1,
+            'court_type': court_type,
+            'court_name': court_name,
+            'party_of_appointing_president': rng.choice(PARTIES),
+            'start_year': start_year,
+            'end_year': end_year,
+            'days_to_confirm': rng.choice([None, 5, 30, 90, 365]),
+        })
+    return appointments
+
+
+def brute_force_counts(appointments, years, parties, court_type_select, court_name_select):
+    """`get_line_graph_data` worked out one bucket and appointment at a time, with the join
+    conditions of `tabs.counts_tab`.
+    """
+    party_counts_dict = {}
+    for party in sorted(parties):
+        counts_dict = party_counts_dict[party] = {
+            'n_judges': [], 'n_appointed': [], 'n_terminated': []}
+        selected = [
+            row for row in appointments
+            if row['party_of_appointing_president'] == party
+            and row['start_year'] is not None
+            and (not court_type_select or row['court_type'] == court_type_select)
+            and (not court_name_select or row['court_name'] == court_name_select)
+        ]
+        for year in sorted(years):
+            counts_dict['n_judges'].append(sum(
+                row['start_year'] < year + 2
+                and (row['end_year'] is None or row['end_year'] >= year)
+                for row in selected
+            ))
+            counts_dict['n_appointed'].append(sum(
+                year <= row['start_year'] < year + 2 for row in selected))
+            counts_dict['n_terminated'].append(sum(
+                row['end_year'] is not None and year - 2 <= row['end_year'] < year
+                for row in selected
+            ))
+    return party_counts_dict, sorted(years)
+
+
+@pytest.fixture(scope='session')
+def database():
+    """An empty database with the schema, the test is skipped when there is no Postgres."""
+    pytest.importorskip('sqlalchemy')
+    from sqlalchemy.exc import OperationalError
+    from database_utils import db_cfg, engine, recreate_db
+
+    if db_cfg['database'] == 'courts':
+        pytest.skip('Refusing to drop the `courts` database, set POSTGRES_DB to a throwaway one')
+    try:
+        recreate_db()
+    except OperationalError:
+        pytest.skip('No Postgres to test against')
+    return engine
+
+
+@pytest.fixture
+def session(database):
+    """Session rolled back after the test."""
+    from database_utils import Session
+
+    session = Session()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+@pytest.fixture
+def appointments(session):
+    """Random appointments inserted with their judges and the `year_party` grid."""
+    from models import Appointment, Judge
+    from load_data import INSERT_YEAR_PARTY
+
+    rows = random_appointments(random.Random(0), 500)
+    session.execute(INSERT_YEAR_PARTY)
+    session.bulk_insert_mappings(Judge, [{'nid': row['nid']} for row in rows])
+    session.bulk_insert_mappings(Appointment, rows)
+    session.flush()
+    return rows
@@ -0,0 +1,115 @@
+import random
+
+import pytest
+
+pytest.importorskip('pyroaring')
+
+from bitmap_index import AppointmentBitmaps, AppointmentRow, BitmapIndex, to_bitset  # noqa: E402
+from conftest import YEAR_PARTIES, YEARS, brute_force_counts, random_appointments  # noqa: E402
+
+SELECTIONS = [
+    {},
+    {'court_type': ['U.S. District Court']},
+    {'court_type': ['U.S. District Court', 'U.S. Court of Appeals'], 'party': ['Democratic']},
+    {'court_name': ['Ninth Circuit', 'Court of Claims'], 'gender': ['Female']},
+    {'race_or_ethnicity': ['White', 'Hispanic'], 'aba_rating': ['Well Qualified', None]},
+    {'court_type': ['U.S. District Court'], 'court_name': ['Ninth Circuit']},
+    {'court_type': ['Nonexistent Court']},
+    {'court_type': [], 'party': []},
+]
+
+
+@pytest.fixture(scope='module')
+def rows():
+    rng = random.Random(4)
+    rows = []
+    for row in random_appointments(rng, 400):
+        congress_start_year = rng.choice([None, 1961, 1963, 1965, 1967])
+        rows.append(AppointmentRow(
+            court_type=row['court_type'],
+            court_name=row['court_name'],
+            party=row['party_of_appointing_president'],
+            gender=rng.choice(['Male', 'Female']),
+            race_or_ethnicity=rng.choice(['White', 'African American', 'Hispanic', None]),
+            aba_rating=rng.choice(['Well Qualified', 'Qualified', None]),
+            start_year=row['start_year'],
+            end_year=row['end_year'],
+            days_to_confirm=row['days_to_confirm'],
+            congress_start_year=congress_start_year,
+            congress_president=None if congress_start_year is None else (
+                'Kennedy' if congress_start_year < 1965 else 'Johnson'),
+            congress_party=None if congress_start_year is None else 'Democratic',
+        ))
+    return rows
+
+
+@pytest.fixture(scope='module')
+def bitmaps(rows):
+    return AppointmentBitmaps(YEARS, YEAR_PARTIES, rows)
+
+
+def _selected(rows, selection):
+    return [
+        i for i, row in enumerate(rows)
+        if all(not values or getattr(row, column) in values
+               for column, values in selection.items())
+    ]
+
+
+@pytest.mark.parametrize('indices', [[], [0], [7, 8, 9, 64, 1000], list(range(0, 300, 3))])
+def test_bitsets_round_trip(indices):
+    bitset = to_bitset(indices)
+    assert list(bitset) == indices
+    assert len(bitset) == len(indices)
+
+
+@pytest.mark.parametrize('selection', SELECTIONS)
+def test_select_ors_values_and_ands_columns(rows, selection):
+    index = BitmapIndex(rows, tuple(selection) or ('court_type',))
+    assert list(index.select(selection)) == _selected(rows, selection)
+
+
+def test_values_leave_out_none(bitmaps):
+    assert bitmaps.values('court_type') == ['U.S. Court of Appeals', 'U.S. District Court']
+
+
+@pytest.mark.parametrize('selection', SELECTIONS)
+def test_line_graph_data_matches_brute_force(bitmaps, rows, selection):
+    selected = [rows[i] for i in _selected(rows, selection)]
+    party_counts_dict, years = bitmaps.line_graph_data(bitmaps.select(**selection))
+    assert (
+        {party: dict(counts_dict) for party, counts_dict in party_counts_dict.items()}, years
+    ) == brute_force_counts(
+        [
+            {
+                'party_of_appointing_president': row.party,
+                'start_year': row.start_year,
+                'end_year': row.end_year,
+                'court_type': row.court_type,
+                'court_name': row.court_name,
+            }
+            for row in selected
+        ],
+        YEARS, YEAR_PARTIES, None, None,
+    )
+
+
+@pytest.mark.parametrize('selection', SELECTIONS)
+def test_wait_time_data_matches_brute_force(bitmaps, rows, selection):
+    expected = {}
+    for i in _selected(rows, selection):
+        row = rows[i]
+        if row.days_to_confirm is None or row.congress_start_year is None:
+            continue
+        _, start_years, days_to_confirm = expected.setdefault(
+            row.congress_president, (row.congress_party, [], []))
+        start_years.append(row.congress_start_year)
+        days_to_confirm.append(row.days_to_confirm)
+
+    wait_time_rows = bitmaps.wait_time_data(bitmaps.select(**selection))
+    assert {
+        president: (party, start_years, days_to_confirm)
+        for president, party, start_years, days_to_confirm in wait_time_rows
+    } == expected
+    first_nominations = [min(start_years) for _, _, start_years, _ in wait_time_rows]
+    assert first_nominations == sorted(first_nominations)
@@ -0,0 +1,49 @@
+import json
+
+from conftest import COURTS
+
+FILTERS = [(None, None)] + [
+    (court_type, court_name) for court_type, court_name in COURTS
+] + [(court_type, None) for court_type, _ in COURTS if court_type] + [
+    (None, court_name) for _, court_name in COURTS if court_name]
+COUNTS = ('n_judges', 'n_appointed', 'n_terminated')
+
+
+def clientside_line_graph_data(data, court_type_select, court_name_select):
+    """`updateLineGraph` of `assets/clientside.js`, as `{party: {count: [...]}}`."""
+    court_types = [court_type_select] if court_type_select else []
+    court_names = [court_name_select] if court_name_select else []
+    matches = [
+        (not court_types or data['court_types'][court_type] in court_types)
+        and (not court_names or data['court_names'][court_name] in court_names)
+        for court_type, court_name in zip(
+            data['courts']['court_type'], data['courts']['court_name'])
+    ]
+
+    totals = {
+        party: {count: [0] * len(data['years']) for count in COUNTS} for party in data['parties']}
+    counts = data['counts']
+    for i, court in enumerate(counts['court']):
+        if not matches[court]:
+            continue
+        party_totals = totals[data['parties'][counts['party'][i]]]
+        for count in COUNTS:
+            party_totals[count][counts['year'][i]] += counts[count][i]
+    return totals
+
+
+def test_clientside_totals_match_the_server(session, appointments):
+    from clientside_data import get_clientside_data
+    from count_cube import CountCube
+
+    count_cube = CountCube.from_session(session)
+    # As the browser gets it, courts missing their type or name have a null one
+    data = json.loads(json.dumps(get_clientside_data(session, count_cube, {})))
+    assert None in data['court_types'] and None in data['court_names']
+
+    for court_type_select, court_name_select in FILTERS:
+        party_counts_dict, years = count_cube.line_graph_data(
+            court_type_select, court_name_select)
+        assert data['years'] == years
+        assert clientside_line_graph_data(data, court_type_select, court_name_select) == {
+            party: dict(counts_dict) for party, counts_dict in party_counts_dict.items()}
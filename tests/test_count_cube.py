@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from conftest import COURTS, YEAR_PARTIES, YEARS, brute_force_counts, random_appointments
+from count_cube import CountCube
+
+FILTERS = sorted({
+    (court_type_select, court_name_select)
+    for court_type, court_name in COURTS
+    for court_type_select in (None, court_type)
+    for court_name_select in (None, court_name)
+}, key=repr) + [('U.S. District Court', 'Ninth Circuit'), ('Nonexistent Court', None)]
+
+
+@pytest.fixture(scope='module')
+def rows():
+    return random_appointments(random.Random(1), 400)
+
+
+@pytest.fixture(scope='module')
+def count_cube(rows):
+    return CountCube(YEARS, YEAR_PARTIES, [
+        (
+            row['court_type'], row['court_name'], row['party_of_appointing_president'],
+            row['start_year'], row['end_year'],
+        )
+        # As `CountCube.from_session` selects them
+        for row in rows if row['start_year'] is not None
+    ])
+
+
+@pytest.mark.parametrize('court_type_select,court_name_select', FILTERS)
+def test_line_graph_data_matches_brute_force(
+        count_cube, rows, court_type_select, court_name_select):
+    party_counts_dict, years = count_cube.line_graph_data(court_type_select, court_name_select)
+    assert (
+        {party: dict(counts_dict) for party, counts_dict in party_counts_dict.items()}, years
+    ) == brute_force_counts(
+        rows, YEARS, YEAR_PARTIES, court_type_select, court_name_select)
+
+
+def test_empty_selection_is_all_courts(count_cube):
+    assert count_cube.line_graph_data('', '') == count_cube.line_graph_data(None, None)
+
+
+def test_court_counts_are_the_non_zero_single_court_counts(count_cube, rows):
+    expected = set()
+    for court_type, court_name in COURTS:
+        # Only the court itself, where the brute force would take None for every court
+        court_rows = [
+            row for row in rows
+            if (row['court_type'], row['court_name']) == (court_type, court_name)]
+        party_counts_dict, years = brute_force_counts(
+            court_rows, YEARS, YEAR_PARTIES, None, None)
+        for party, counts_dict in party_counts_dict.items():
+            for i, year in enumerate(years):
+                counts = tuple(
+                    counts_dict[count][i] for count in ('n_judges', 'n_appointed', 'n_terminated'))
+                if any(counts):
+                    expected.add((court_type, court_name, party, year) + counts)
+    assert set(count_cube.court_counts()) == expected
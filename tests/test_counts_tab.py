@@ -0,0 +1,24 @@
+import pytest
+
+pytest.importorskip('plotly')
+
+from conftest import COURTS, YEAR_PARTIES, YEARS, brute_force_counts  # noqa: E402
+
+FILTERS = [(None, None), ('U.S. Court of Appeals', None), (None, 'Court of Claims')] + [
+    court for court in COURTS if court[0] and court[1]
+] + [('U.S. District Court', 'Ninth Circuit')]
+
+
+def _plain(line_graph_data):
+    party_counts_dict, years = line_graph_data
+    return {party: dict(counts_dict) for party, counts_dict in party_counts_dict.items()}, years
+
+
+@pytest.mark.parametrize('court_type_select,court_name_select', FILTERS)
+def test_window_counts_match_joins(session, appointments, court_type_select, court_name_select):
+    from tabs.counts_tab import get_line_graph_data
+
+    joins = get_line_graph_data(session, court_type_select, court_name_select, 'joins')
+    assert get_line_graph_data(session, court_type_select, court_name_select, 'window') == joins
+    assert _plain(joins) == brute_force_counts(
+        appointments, YEARS, YEAR_PARTIES, court_type_select, court_name_select)
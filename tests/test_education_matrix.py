@@ -0,0 +1,100 @@
+import random
+from collections import Counter
+
+import pytest
+
+pytest.importorskip('scipy')
+
+from conftest import (  # noqa: E402
+    COURTS, YEAR_PARTIES, YEARS, brute_force_counts, random_appointments)
+from education_matrix import EducationMatrix  # noqa: E402
+
+SCHOOLS = ['Harvard', 'Yale', 'Columbia', 'Michigan']
+DEGREES = ['J.D.', 'j.d.', 'LL.B.', 'B.A.', None]
+FILTERS = [(None, None, None), ('U.S. District Court', None, None),
+           (None, 'Ninth Circuit', 'Democratic'), ('U.S. Court of Appeals', None, 'Republican')]
+
+
+@pytest.fixture(scope='module')
+def rows():
+    rng = random.Random(2)
+    rows = random_appointments(rng, 300)
+    for row in rows:
+        # Judges with more than one appointment
+        row['nid'] = rng.randint(1, 150)
+    return rows
+
+
+@pytest.fixture(scope='module')
+def educations():
+    rng = random.Random(3)
+    # Judges without any education and educations of judges without appointments
+    return [
+        (rng.randint(1, 180), rng.choice(SCHOOLS), rng.choice(DEGREES)) for _ in range(250)]
+
+
+@pytest.fixture(scope='module')
+def matrix(rows, educations):
+    return EducationMatrix(YEARS, YEAR_PARTIES, [
+        (
+            row['nid'], row['court_type'], row['court_name'],
+            row['party_of_appointing_president'], row['start_year'], row['end_year'],
+        )
+        for row in rows
+    ], educations)
+
+
+def _serving(rows, year, court_type, court_name, party):
+    return [
+        row for row in rows
+        if row['party_of_appointing_president'] in YEAR_PARTIES
+        and row['start_year'] is not None
+        and row['start_year'] < year + 2
+        and (row['end_year'] is None or row['end_year'] >= year)
+        and (not court_type or row['court_type'] == court_type)
+        and (not court_name or row['court_name'] == court_name)
+        and (not party or row['party_of_appointing_president'] == party)
+    ]
+
+
+@pytest.mark.parametrize('court_type,court_name', [
+    (None, None), COURTS[0], ('U.S. Court of Appeals', None), (None, 'Court of Claims')])
+def test_serving_counts_match_n_judges(matrix, rows, court_type, court_name):
+    party_counts_dict, _ = brute_force_counts(rows, YEARS, YEAR_PARTIES, court_type, court_name)
+    for party in YEAR_PARTIES:
+        assert matrix.serving_counts(court_type, court_name, party).tolist() == (
+            party_counts_dict[party]['n_judges'])
+
+
+@pytest.mark.parametrize('court_type,court_name,party', FILTERS)
+def test_serving_nids(matrix, rows, court_type, court_name, party):
+    for year in YEARS:
+        assert matrix.serving_nids(year, court_type, court_name, party) == sorted(
+            row['nid'] for row in _serving(rows, year, court_type, court_name, party))
+
+
+@pytest.mark.parametrize('degree', [None, 'j.d.', 'J.D.', 'Ph.D.'])
+@pytest.mark.parametrize('court_type,court_name,party', FILTERS)
+def test_school_counts_by_year(matrix, rows, educations, court_type, court_name, party, degree):
+    school_counts_by_year = matrix.school_counts_by_year(court_type, court_name, party, degree)
+    for year in YEARS:
+        expected = Counter()
+        for row in _serving(rows, year, court_type, court_name, party):
+            for nid, school, judge_degree in educations:
+                if nid == row['nid'] and (
+                        degree is None or (judge_degree or '').lower() == degree.lower()):
+                    expected[school] += 1
+        assert dict(school_counts_by_year[year]) == expected
+
+
+def test_degree_counts(matrix, rows, educations):
+    degree_counts = matrix.degree_counts().toarray()
+    for i, year in enumerate(YEARS):
+        expected = Counter()
+        for row in _serving(rows, year, None, None, None):
+            for nid, _, degree in educations:
+                if nid == row['nid']:
+                    expected[degree.lower() if degree else degree] += 1
+        assert {
+            degree: count for degree, count in zip(matrix.degrees, degree_counts[i]) if count
+        } == expected
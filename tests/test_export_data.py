@@ -0,0 +1,166 @@
+import itertools
+import json
+
+import pytest
+
+pytest.importorskip('sqlalchemy')
+
+from export_data import PartitionedExport, encode_compact  # noqa: E402
+
+
+def decode_compact(encoded):
+    """The records `encode_compact` encoded, the way the browser reads them back."""
+    records = [{} for _ in range(encoded['rows'])]
+    for column, values in encoded['data'].items():
+        dictionary = encoded['dictionaries'].get(column)
+        for record, value in zip(records, values):
+            if value is None:
+                pass
+            elif dictionary is not None and isinstance(value, int):
+                value = dictionary[value]
+            elif dictionary is not None:
+                value = [{'id': dictionary[i], 'count': count} for i, count in value]
+            elif isinstance(value, list):
+                value = list(itertools.accumulate(value))
+            record[column] = value
+    return records
+
+
+RECORDS = [
+    {
+        'year': 1901,
+        'party': 'Democratic',
+        'nid_serving_in_year': [1377016, 1377151, 1377116],
+        'school_count_all': [{'id': 'Yale', 'count': 3}, {'id': 'Harvard', 'count': 1}],
+        'mean': 10.5,
+    },
+    {
+        'year': 1903,
+        'party': None,
+        'nid_serving_in_year': [],
+        'school_count_all': [{'id': 'Harvard', 'count': 2}],
+        'mean': None,
+    },
+    {
+        'year': 1905,
+        'party': 'Republican',
+        'nid_serving_in_year': None,
+        'school_count_all': None,
+        'mean': 3,
+    },
+]
+
+
+def test_encode_compact_round_trips():
+    encoded = json.loads(json.dumps(encode_compact(RECORDS)))
+    expected = [
+        dict(record, nid_serving_in_year=sorted(record['nid_serving_in_year']))
+        if record['nid_serving_in_year'] else record
+        for record in RECORDS
+    ]
+    assert decode_compact(encoded) == expected
+
+
+def test_encode_compact_columns():
+    encoded = encode_compact(RECORDS)
+    assert encoded['rows'] == 3
+    assert encoded['data']['party'] == [0, None, 1]
+    assert encoded['dictionaries']['party'] == ['Democratic', 'Republican']
+    assert encoded['data']['nid_serving_in_year'] == [[1377016, 100, 35], [], None]
+    assert encoded['data']['school_count_all'] == [[[0, 3], [1, 1]], [[1, 2]], None]
+    assert encoded['dictionaries']['school_count_all'] == ['Yale', 'Harvard']
+    assert encoded['data']['mean'] == [10.5, None, 3]
+    assert encode_compact([]) == {'rows': 0, 'data': {}, 'dictionaries': {}}
+
+
+def _export(path, partitions, compact=False, force=False):
+    built = []
+
+    def build(partition, rows):
+        built.append(partition)
+        return [{'year': partition, 'party': party} for party in rows]
+
+    export = PartitionedExport(str(path), build, compact=compact, force=force)
+    for partition, rows in partitions.items():
+        for row in rows:
+            export.add(partition, row)
+    export.close()
+    return built
+
+
+def test_partitioned_export_rebuilds_only_changed_partitions(tmp_path):
+    path = tmp_path / 'counts.json'
+    partitions = {1901: ['Democratic'], 1903: ['Republican', 'Whig']}
+    assert _export(path, partitions) == [1901, 1903]
+    assert _export(path, partitions) == []
+
+    partitions[1903] = ['Republican']
+    del partitions[1901]
+    partitions[1905] = ['Democratic']
+    assert _export(path, partitions) == [1903, 1905]
+    assert not (tmp_path / 'counts' / '1901.json').exists()
+    assert json.loads(path.read_text()) == [
+        {'year': 1903, 'party': 'Republican'}, {'year': 1905, 'party': 'Democratic'}]
+
+    assert _export(path, partitions, force=True) == [1903, 1905]
+
+
+def test_partitioned_export_compact(tmp_path):
+    path = tmp_path / 'counts.json'
+    partitions = {1901: ['Democratic'], 1903: ['Republican', 'Democratic']}
+    _export(path, partitions)
+    # A change of encoding rewrites every partition
+    assert _export(path, partitions, compact=True) == [1901, 1903]
+
+    combined = json.loads(path.read_text())
+    assert {
+        partition: decode_compact(encoded) for partition, encoded in combined.items()
+    } == {
+        '1901': [{'year': 1901, 'party': 'Democratic'}],
+        '1903': [{'year': 1903, 'party': 'Republican'}, {'year': 1903, 'party': 'Democratic'}],
+    }
+
+
+@pytest.fixture
+def export_paths(tmp_path, monkeypatch):
+    import export_data
+
+    for name in ('FLAT_COUNTS_PATH', 'APPEALS_COUNTS_PATH', 'EDUCATION_COUNTS_PATH'):
+        monkeypatch.setattr(export_data, name, str(tmp_path / f'{name.lower()}.json'))
+    return export_data
+
+
+def test_export_counts_leaves_out_unknown_courts(session, appointments, export_paths):
+    from summary_tables import UNKNOWN_COURT, refresh_summaries
+
+    refresh_summaries(session, full=True)
+    export_paths.export_counts(session, compact=False, force=False)
+
+    with open(export_paths.FLAT_COUNTS_PATH) as f:
+        flat = json.load(f)
+    assert flat
+    assert not [
+        row for row in flat
+        if row['court_type'] == UNKNOWN_COURT or row['court_name'] == UNKNOWN_COURT]
+    with open(export_paths.APPEALS_COUNTS_PATH) as f:
+        appeals = json.load(f)
+    assert UNKNOWN_COURT not in {court for counts in appeals.values() for court in counts}
+
+
+def test_export_education_counts_has_every_year(session, appointments, export_paths):
+    pytest.importorskip('scipy')
+    from education_matrix import EducationMatrix
+    from models import Appointment
+
+    # Nobody serves in the first bucket
+    session.query(Appointment).filter(Appointment.start_year < 1903).delete()
+    matrix = EducationMatrix.from_session(session)
+    export_paths.export_education_counts(session, compact=False, force=False)
+
+    with open(export_paths.EDUCATION_COUNTS_PATH) as f:
+        records = json.load(f)
+    assert [record['year'] for record in records] == matrix.years
+    for record in records:
+        assert record['nid_serving_in_year'] == matrix.serving_nids(record['year'])
+        assert record['count'] == len(record['nid_serving_in_year'])
+    assert records[0]['count'] == 0
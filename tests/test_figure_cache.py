@@ -0,0 +1,69 @@
+import figure_cache
+from figure_cache import FigureCache
+
+
+class Renderer:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, key):
+        def render():
+            self.calls.append(key)
+            return f'figure {key}'
+        return render
+
+
+def test_renders_once_per_key():
+    cache, render = FigureCache(), Renderer()
+    assert cache.get_or_render('a', render('a')) == 'figure a'
+    assert cache.get_or_render('a', render('a')) == 'figure a'
+    assert render.calls == ['a']
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_evicts_least_recently_used():
+    cache, render = FigureCache(maxsize=2), Renderer()
+    cache.get_or_render('a', render('a'))
+    cache.get_or_render('b', render('b'))
+    cache.get_or_render('a', render('a'))
+    cache.get_or_render('c', render('c'))
+    cache.get_or_render('a', render('a'))
+    cache.get_or_render('b', render('b'))
+    assert render.calls == ['a', 'b', 'c', 'b']
+
+
+def test_expires_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(figure_cache.time, 'monotonic', lambda: now[0])
+    cache, render = FigureCache(ttl=10), Renderer()
+    cache.get_or_render('a', render('a'))
+    now[0] += 10
+    cache.get_or_render('a', render('a'))
+    now[0] += 1
+    cache.get_or_render('a', render('a'))
+    assert render.calls == ['a', 'a']
+
+
+def test_dropped_when_the_data_version_changes():
+    version = ['1']
+    cache, render = FigureCache(version_getter=lambda: version[0]), Renderer()
+    cache.get_or_render('a', render('a'))
+    version[0] = '2'
+    cache.get_or_render('a', render('a'))
+    cache.get_or_render('a', render('a'))
+    assert render.calls == ['a', 'a']
+
+
+def test_render_of_a_replaced_version_is_not_cached():
+    version = ['1']
+    cache, render = FigureCache(version_getter=lambda: version[0]), Renderer()
+
+    def render_during_reload():
+        # Another thread sees the new version while this one renders with the old data
+        version[0] = '2'
+        cache.get_or_render('b', render('b'))
+        return 'stale figure a'
+
+    assert cache.get_or_render('a', render_during_reload) == 'stale figure a'
+    assert cache.get_or_render('a', render('a')) == 'figure a'
+    assert render.calls == ['b', 'a']
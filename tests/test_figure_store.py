@@ -0,0 +1,27 @@
+import json
+
+import figure_store
+from figure_store import FigureStore, figure_key
+
+
+def test_get_written_figures(tmp_path):
+    store = FigureStore(str(tmp_path / 'figures.sqlite'))
+    assert store.get('v1', figure_key('party-counts')) is None
+
+    store.write('v1', [(figure_key('party-counts', 'U.S. District Court'), json.dumps({'a': 1}))])
+    assert store.get('v1', figure_key('party-counts', 'U.S. District Court', '')) == {'a': 1}
+    assert store.get('v1', figure_key('party-counts')) is None
+
+    store.write('v2', [(figure_key('party-counts'), json.dumps({'b': 2}))])
+    assert store.get('v2', figure_key('party-counts')) == {'b': 2}
+    assert store.get('v1', figure_key('party-counts', 'U.S. District Court')) is None
+
+
+def test_key_of_wait_time_follows_box_setting(monkeypatch):
+    monkeypatch.setitem(figure_store.app_cfg, 'precompute_wait_time_boxes', True)
+    with_boxes = figure_key('wait-time', 'U.S. District Court')
+    party_counts = figure_key('party-counts', 'U.S. District Court')
+
+    monkeypatch.setitem(figure_store.app_cfg, 'precompute_wait_time_boxes', False)
+    assert figure_key('wait-time', 'U.S. District Court') != with_boxes
+    assert figure_key('party-counts', 'U.S. District Court') == party_counts
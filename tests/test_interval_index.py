@@ -0,0 +1,119 @@
+import datetime
+import random
+
+import pytest
+
+from conftest import COURTS, PARTIES
+from interval_index import AppointmentIntervalIndex, IntervalTree
+
+FILTERS = [(None, None), ('U.S. District Court', None), (None, 'Ninth Circuit'),
+           ('U.S. Court of Appeals', 'Ninth Circuit'), ('U.S. District Court', 'Ninth Circuit')]
+
+
+def _random_date(rng):
+    return datetime.date(1900, 1, 1) + datetime.timedelta(days=rng.randint(0, 365 * 120))
+
+
+@pytest.fixture(scope='module')
+def appointments():
+    rng = random.Random(5)
+    appointments = []
+    for nid in range(1, 301):
+        court_type, court_name = rng.choice(COURTS)
+        start_date = _random_date(rng)
+        # Still serving, and bad data ending before it starts
+        end_date = rng.choice([None, _random_date(rng), start_date + datetime.timedelta(
+            days=rng.randint(0, 365 * 30))])
+        appointments.append(
+            (nid, court_type, court_name, rng.choice(PARTIES), start_date, end_date))
+    return appointments
+
+
+@pytest.fixture(scope='module')
+def index(appointments):
+    return AppointmentIntervalIndex(appointments, congress_start_years=range(1901, 2021, 2))
+
+
+def _serving(appointments, date, court_type, court_name):
+    return sorted(
+        appointment for appointment in appointments
+        if appointment[4] <= date and (appointment[5] is None or date < appointment[5])
+        and (not court_type or appointment[1] == court_type)
+        and (not court_name or appointment[2] == court_name)
+    )
+
+
+def test_interval_tree_matches_brute_force(index, appointments):
+    tree = IntervalTree(index._intervals[(None, None)])
+    rng = random.Random(6)
+    dates = [_random_date(rng) for _ in range(200)] + [
+        appointment[4] for appointment in appointments[:50]]
+    for date in dates:
+        assert sorted(tree.at(date)) == _serving(appointments, date, None, None)
+
+
+@pytest.mark.parametrize('court_type_select,court_name_select', FILTERS)
+def test_composition_at(index, appointments, court_type_select, court_name_select):
+    rng = random.Random(7)
+    for date in [_random_date(rng) for _ in range(50)]:
+        assert sorted(
+            tuple(interval)
+            for interval in index.composition_at(date, court_type_select, court_name_select)
+        ) == _serving(appointments, date, court_type_select, court_name_select)
+
+
+@pytest.mark.parametrize('granularity', ['year', 'month', 'congress'])
+@pytest.mark.parametrize('court_type_select,court_name_select', FILTERS)
+def test_series(index, appointments, granularity, court_type_select, court_name_select):
+    party_counts_dict, dates = index.series(granularity, court_type_select, court_name_select)
+    assert dates == sorted(dates) and len(dates) > 0
+    for i, date in enumerate(dates[::7]):
+        serving = _serving(appointments, date, court_type_select, court_name_select)
+        for party in index.parties:
+            assert party_counts_dict[party]['n_judges'][i * 7] == sum(
+                appointment[3] == party for appointment in serving)
+
+
+def test_unknown_granularity(index):
+    with pytest.raises(ValueError):
+        index.dates('week')
+
+
+def test_trees_and_sweeps_are_built_up_front(index):
+    # Request threads share the index, so queries must only ever read it
+    trees, sweeps = dict(index._trees), dict(index._sweeps)
+    assert set(trees) == set(sweeps) == set(index._intervals)
+    for court_type_select, court_name_select in FILTERS + [('Nonexistent Court', None)]:
+        index.composition_at(datetime.date(1975, 6, 1), court_type_select, court_name_select)
+        index.series('year', court_type_select, court_name_select)
+    assert index._trees == trees and index._sweeps == sweeps
+
+
+def test_composition_tab_sums_selected_courts(index, appointments):
+    pytest.importorskip('plotly')
+    from tabs.composition_tab import (
+        get_composition_at, get_composition_series, update_composition_graph)
+
+    court_type_select = ('U.S. Court of Appeals', 'U.S. District Court')
+    court_name_select = ('Ninth Circuit', 'District of Columbia')
+    date = datetime.date(1975, 6, 1)
+
+    party_counts = get_composition_at(index, date, court_type_select, court_name_select)
+    assert sum(party_counts.values()) == len(
+        _serving_in(appointments, date, court_type_select, court_name_select)) > 0
+
+    party_counts_dict, dates = get_composition_series(
+        index, 'year', court_type_select, court_name_select)
+    i = dates.index(datetime.date(1975, 1, 1))
+    assert sum(counts_dict['n_judges'][i] for counts_dict in party_counts_dict.values()) == len(
+        _serving_in(appointments, datetime.date(1975, 1, 1), court_type_select, court_name_select))
+
+    figure = update_composition_graph(index, date, 'year', court_type_select, court_name_select)
+    assert len(figure.data) == len(party_counts_dict)
+
+
+def _serving_in(appointments, date, court_type_select, court_name_select):
+    return [
+        appointment for appointment in _serving(appointments, date, None, None)
+        if appointment[1] in court_type_select and appointment[2] in court_name_select
+    ]
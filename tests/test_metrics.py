@@ -0,0 +1,97 @@
+import pytest
+
+import metrics
+from metrics import Counter, render_counters, render_gauges
+
+
+@pytest.fixture
+def engine():
+    sqlalchemy = pytest.importorskip('sqlalchemy')
+    from sqlalchemy.pool import StaticPool
+
+    # One connection, so the start times left on it are the ones the test looks at
+    engine = sqlalchemy.create_engine('sqlite://', poolclass=StaticPool)
+    metrics.instrument_engine(engine)
+    return engine
+
+
+def _sample(lines, prefix):
+    return [float(line.rsplit(' ', 1)[1]) for line in lines if line.startswith(prefix)]
+
+
+def test_failed_statements_are_timed_and_counted(engine):
+    origin = 'test_failed_statements'
+    errors_sample = f'courts_query_errors_total{{origin="{origin}"}}'
+    errors = _sample(metrics.query_errors.render(), errors_sample)
+    with engine.connect() as connection:
+        connection.execute(f'SELECT 1 /* origin:{origin} */')
+        with pytest.raises(Exception):
+            connection.execute(f'SELECT * FROM missing /* origin:{origin} */')
+        assert connection.info['query_start_times'] == []
+
+    assert _sample(metrics.query_errors.render(), errors_sample) == [
+        (errors[0] if errors else 0) + 1]
+    assert _sample(
+        metrics.query_seconds.render(), f'courts_query_seconds_count{{origin="{origin}"}}') == [2]
+
+
+def test_counters_are_rendered_with_total():
+    counter = Counter('courts_things', 'Things.', 'kind')
+    counter.inc('a')
+    counter.inc('a', 2)
+    assert counter.render() == [
+        '# HELP courts_things_total Things.',
+        '# TYPE courts_things_total counter',
+        'courts_things_total{kind="a"} 3',
+    ]
+    assert render_counters('courts_pool', 'Pool.', {'checkouts': 4}) == [
+        '# HELP courts_pool_checkouts_total Pool.',
+        '# TYPE courts_pool_checkouts_total counter',
+        'courts_pool_checkouts_total 4',
+    ]
+    assert render_gauges('courts_pool', 'Pool.', {'size': 5}) == [
+        '# HELP courts_pool_size Pool.',
+        '# TYPE courts_pool_size gauge',
+        'courts_pool_size 5',
+    ]
+
+
+def test_merge_process_metrics(tmp_path):
+    dead_pid = 2 ** 22 + 1
+    worker = '\n'.join([
+        *metrics.Histogram('courts_seconds', 'Latency.', 'origin', (0.1, 1.0)).render(),
+        *render_counters('courts_pool', 'Pool.', {'checkouts': 3}),
+        *render_gauges('courts_pool', 'Pool.', {'checked_out': 2}),
+        *render_gauges('courts_startup_seconds', 'Startup.', {'import': 0.5}, 'phase'),
+    ]) + '\n'
+    histogram = metrics.Histogram('courts_seconds', 'Latency.', 'origin', (0.1, 1.0))
+    histogram.observe('counts', 0.05)
+    histogram.observe('counts', 2.0)
+    exited = '\n'.join([
+        *histogram.render(),
+        *render_counters('courts_pool', 'Pool.', {'checkouts': 4}),
+        *render_gauges('courts_pool', 'Pool.', {'checked_out': 7}),
+    ]) + '\n'
+    metrics.write_process_metrics(worker, str(tmp_path))
+    (tmp_path / f'{dead_pid}.prom').write_text(exited)
+    (tmp_path / 'notes.txt').write_text('not metrics')
+
+    pid = metrics.os.getpid()
+    assert metrics.merge_process_metrics(str(tmp_path)).splitlines() == [
+        '# HELP courts_seconds Latency.',
+        '# TYPE courts_seconds histogram',
+        'courts_seconds_bucket{origin="counts",le="0.1"} 1',
+        'courts_seconds_bucket{origin="counts",le="1.0"} 1',
+        'courts_seconds_bucket{origin="counts",le="+Inf"} 2',
+        'courts_seconds_sum{origin="counts"} 2.05',
+        'courts_seconds_count{origin="counts"} 2',
+        '# HELP courts_pool_checkouts_total Pool.',
+        '# TYPE courts_pool_checkouts_total counter',
+        'courts_pool_checkouts_total 7',
+        '# HELP courts_pool_checked_out Pool.',
+        '# TYPE courts_pool_checked_out gauge',
+        f'courts_pool_checked_out{{pid="{pid}"}} 2',
+        '# HELP courts_startup_seconds Startup.',
+        '# TYPE courts_startup_seconds gauge',
+        f'courts_startup_seconds{{phase="import",pid="{pid}"}} 0.5',
+    ]
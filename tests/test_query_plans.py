@@ -0,0 +1,120 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('plotly')
+
+from benchmarks.query_plans import (  # noqa: E402
+    QUERIES, check_plan, check_queries, get_compared_columns, suggest_indexes)
+
+PLANS_DIR = os.path.join(os.path.dirname(__file__), 'data', 'query_plans')
+
+
+def load_plan(name):
+    """`EXPLAIN (ANALYZE, BUFFERS, VERBOSE, FORMAT JSON)` of a dashboard query, recorded against a
+    `--scale 1` synthetic database. The `_no_index` plans were recorded with index scans, hash
+    and merge joins turned off.
+    """
+    with open(os.path.join(PLANS_DIR, f'{name}.json')) as f:
+        return json.load(f)
+
+
+def _check(name, query, court_type, court_name, scale=1):
+    problems = check_plan(
+        query, court_type, court_name, load_plan(name), scale,
+        max_loop_rows=10000, max_misestimate=10.0)
+    return sorted({problem.split(':')[0] for problem in problems}), problems
+
+
+def test_court_type_read_by_a_hash_join_is_fine():
+    assert _check(
+        'judge_count_district_court', 'get_judge_count_query', 'U.S. District Court', None
+    ) == ([], [])
+
+
+def test_seq_scan_repeated_in_a_nested_loop():
+    kinds, problems = _check(
+        'judge_count_district_court_nested_loop', 'get_judge_count_query',
+        'U.S. District Court', None, scale=10)
+    assert kinds == ['seq loop']
+    assert 'appointment scanned 120 times, 546480 rows under Nested Loop' in problems[0]
+
+
+def test_court_name_read_without_an_index():
+    kinds, problems = _check(
+        'start_count_trade_court_no_index', 'get_start_count_query',
+        'Other', 'U.S. Court of International Trade')
+    assert 'index' in kinds
+    assert 'index: appointment is read without an index for a court name filter' in problems
+
+
+def test_selective_court_type_read_without_an_index():
+    kinds, problems = _check(
+        'wait_time_supreme_court_no_index', 'get_wait_time_query', 'Supreme Court', None)
+    assert kinds == ['index']
+    assert problems == ['index: appointment is read without an index for a court type filter']
+
+
+def test_misestimate_and_budget():
+    kinds, problems = _check(
+        'start_count_trade_court', 'get_start_count_query',
+        'Other', 'U.S. Court of International Trade', scale=0.001)
+    assert kinds == ['budget', 'estimate']
+    assert 'estimate: Bitmap Heap Scan on appointment planned 1 rows, got 45' in problems
+
+
+@pytest.mark.parametrize('name,expected', [
+    ('judge_count_district_court', []),
+    ('start_count_trade_court', []),
+    ('judge_count_district_court_nested_loop', [
+        'CREATE INDEX ON appointment '
+        '(court_type, party_of_appointing_president, end_year, start_year);',
+    ]),
+    ('start_count_trade_court_no_index', [
+        'CREATE INDEX ON appointment (court_type, court_name) '
+        'INCLUDE (start_year, party_of_appointing_president);',
+    ]),
+    ('wait_time_supreme_court_no_index', [
+        'CREATE INDEX ON appointment (court_type, days_to_confirm) INCLUDE (congress_title);',
+        'CREATE INDEX ON congress (title) INCLUDE (start_year, president, party_of_president);',
+    ]),
+])
+def test_suggest_indexes(name, expected):
+    assert suggest_indexes(load_plan(name)) == expected
+
+
+@pytest.mark.parametrize('expression,expected', [
+    ("((appointment.court_type)::text = 'Supreme Court'::text)", ['court_type']),
+    (
+        "((appointment.start_year >= year_party.year) AND "
+        "((year_party.party)::text = (appointment.party_of_appointing_president)::text) AND "
+        "(appointment.start_year < (year_party.year + 2)))",
+        ['party_of_appointing_president', 'start_year'],
+    ),
+    (
+        "(((appointment.end_year >= year_party.year) OR (appointment.end_year IS NULL)) AND "
+        "((appointment.court_name)::text = ANY ('{a,b}'::text[])))",
+        ['court_name', 'end_year'],
+    ),
+    ("(appointment.days_to_confirm IS NOT NULL)", ['days_to_confirm']),
+    ("((judge.nid = appointment.nid) AND (year_party.year > 1900))", ['nid']),
+])
+def test_get_compared_columns(expression, expected):
+    assert get_compared_columns('appointment', expression) == expected
+
+
+def test_check_queries_on_the_database(session, appointments):
+    from conftest import COURTS
+    from models import Court
+
+    session.bulk_insert_mappings(Court, [
+        {'court_type': court_type, 'court_name': court_name}
+        for court_type, court_name in COURTS if court_type and court_name
+    ])
+    results = check_queries(session, scale=1, max_loop_rows=10000, max_misestimate=10.0)
+    assert {result['query'] for result in results} == set(QUERIES)
+    for result in results:
+        assert result['plan']['Node Type']
+        assert all(isinstance(problem, str) for problem in result['problems'])
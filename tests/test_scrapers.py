@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+pytest.importorskip('lxml')
+
+import scrapers  # noqa: E402
+from conftest import ROOT  # noqa: E402
+
+
+def _in_repo(path):
+    return os.path.join(ROOT, path)
+
+
+@pytest.mark.parametrize('scrape,snapshot_path,csv_path', [
+    pytest.param(
+        scrapers.scrape_congress, scrapers.CONGRESS_SNAPSHOT_PATH, scrapers.CONGRESS_CSV_PATH,
+        # Passing once the snapshot is committed fails the suite until this mark is removed
+        marks=pytest.mark.xfail(
+            strict=True, reason='congress snapshot not committed yet, see scripts/scrapers.py'),
+    ),
+    (
+        scrapers.scrape_unsuccessful, scrapers.UNSUCCESSFUL_SNAPSHOT_PATH,
+        scrapers.UNSUCCESSFUL_CSV_PATH,
+    ),
+])
+def test_snapshot_reproduces_csv(tmp_path, scrape, snapshot_path, csv_path):
+    assert os.path.exists(_in_repo(snapshot_path)), \
+        f'No snapshot at {snapshot_path}, save it with `scripts/scrapers.py --fetch`'
+    written_path = tmp_path / os.path.basename(csv_path)
+    scrapers.write_csv(str(written_path), scrape(_in_repo(snapshot_path)))
+    with open(_in_repo(csv_path)) as f:
+        assert written_path.read_text() == f.read()
+
+
+def test_refresh_skips_unchanged_snapshots(tmp_path):
+    snapshot_path = tmp_path / 'snapshot.html'
+    csv_path = str(tmp_path / 'data.csv')
+    snapshot_path.write_text('<table></table>')
+    calls = []
+
+    def scrape(path):
+        calls.append(path)
+        return [{'value': len(calls)}]
+
+    hashes = {}
+    assert scrapers.refresh(scrape, str(snapshot_path), csv_path, hashes)
+    assert not scrapers.refresh(scrape, str(snapshot_path), csv_path, hashes)
+    assert scrapers.refresh(scrape, str(snapshot_path), csv_path, hashes, force=True)
+    snapshot_path.write_text('<table><tr></tr></table>')
+    assert scrapers.refresh(scrape, str(snapshot_path), csv_path, hashes)
+    assert len(calls) == 3
+
+
+def test_iter_tables_keeps_nested_tables_until_the_outer_one(tmp_path):
+    snapshot_path = tmp_path / 'snapshot.html'
+    snapshot_path.write_text(
+        '<html><body>'
+        '<table id="outer"><tr><td>a</td><td><table id="inner"><tr><td>b</td></tr></table>'
+        '</td></tr></table>'
+        '<table id="next"><tr><td>c</td></tr></table>'
+        '</body></html>'
+    )
+    tables = scrapers.iter_tables(str(snapshot_path))
+    texts = [(table.get('id'), scrapers.text(table)) for table in tables]
+    assert texts == [('inner', 'b'), ('outer', 'ab'), ('next', 'c')]
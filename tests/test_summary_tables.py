@@ -0,0 +1,53 @@
+import pytest
+
+pytest.importorskip('plotly')
+
+from conftest import COURTS  # noqa: E402
+
+
+FILTERS = [(None, None)] + [
+    (court_type, court_name) for court_type, court_name in COURTS
+] + [(court_type, None) for court_type, _ in COURTS if court_type]
+
+
+@pytest.mark.parametrize('court_type_select,court_name_select', FILTERS)
+def test_summary_counts_match_joins(session, appointments, court_type_select, court_name_select):
+    from summary_tables import refresh_summaries
+    from tabs.counts_tab import get_line_graph_data
+
+    refresh_summaries(session, full=True)
+    assert (
+        get_line_graph_data(session, court_type_select, court_name_select, 'summary')
+        == get_line_graph_data(session, court_type_select, court_name_select, 'joins')
+    )
+
+
+def test_unknown_courts_count_towards_every_court(session, appointments):
+    from summary_tables import refresh_summaries
+    from tabs.counts_tab import get_line_graph_data
+
+    refresh_summaries(session, full=True)
+    party_counts_dict, _ = get_line_graph_data(session, None, None, 'summary')
+    known_counts_dict, _ = get_line_graph_data(session, 'U.S. District Court', None, 'summary')
+    assert sum(party_counts_dict['Democratic']['n_judges']) > sum(
+        known_counts_dict['Democratic']['n_judges'])
+
+
+def test_refresh_changed_courts_with_unknown_court(session, appointments):
+    from models import Appointment
+    from summary_tables import create_summary_triggers, refresh_summaries
+    from tabs.counts_tab import get_line_graph_data
+
+    create_summary_triggers(session)
+    refresh_summaries(session, full=True)
+    session.query(Appointment).filter(Appointment.court_name.is_(None)).update(
+        {Appointment.court_name: 'Ninth Circuit'}, synchronize_session=False)
+    session.query(Appointment).filter(Appointment.id <= 50).update(
+        {Appointment.court_type: None}, synchronize_session=False)
+
+    assert refresh_summaries(session) > 0
+    for court_type_select, court_name_select in FILTERS:
+        assert (
+            get_line_graph_data(session, court_type_select, court_name_select, 'summary')
+            == get_line_graph_data(session, court_type_select, court_name_select, 'joins')
+        )
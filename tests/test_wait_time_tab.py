@@ -0,0 +1,92 @@
+import math
+import random
+
+import pytest
+
+pytest.importorskip('plotly')
+pytest.importorskip('sqlalchemy')
+
+from tabs.wait_time_tab import get_box_stats  # noqa: E402
+
+
+def plotly_box_stats(values):
+    """Box statistics as plotly.js 1.54 computes them with the default 'linear' quartile method,
+    transcribed from `Lib.interp` and the fences in `traces/box/calc.js`.
+    """
+    values = sorted(values)
+
+    def interp(q):
+        position = q * len(values) - 0.5
+        if position < 0:
+            return values[0]
+        if position > len(values) - 1:
+            return values[-1]
+        fraction = position % 1
+        return (
+            fraction * values[math.ceil(position)]
+            + (1 - fraction) * values[math.floor(position)]
+        )
+
+    q1, median, q3 = interp(0.25), interp(0.5), interp(0.75)
+    lowerfence = min(q1, min(value for value in values if value >= 2.5 * q1 - 1.5 * q3))
+    upperfence = max(q3, max(value for value in values if value <= 2.5 * q3 - 1.5 * q1))
+    return {
+        'q1': q1,
+        'median': median,
+        'q3': q3,
+        'lowerfence': lowerfence,
+        'upperfence': upperfence,
+        'mean': sum(values) / len(values),
+        'outliers': [value for value in values if value < lowerfence or value > upperfence],
+    }
+
+
+def test_box_stats_of_known_values():
+    assert get_box_stats([1901] * 4, [4, 2, 3, 1]) == {
+        'x': [1901],
+        'q1': [1.5],
+        'median': [2.5],
+        'q3': [3.5],
+        'lowerfence': [1],
+        'upperfence': [4],
+        'mean': [2.5],
+        'outlier_x': [],
+        'outliers': [],
+    }
+    stats = get_box_stats([1903] * 5, [1, 2, 3, 4, 100])
+    assert (stats['q1'], stats['median'], stats['q3']) == ([1.75], [3], [28])
+    # The upper fence is never inside the box, even when every value above it is an outlier
+    assert (stats['lowerfence'], stats['upperfence']) == ([1], [28])
+    assert (stats['outlier_x'], stats['outliers']) == ([1903], [100])
+
+
+def test_box_stats_of_a_single_value():
+    stats = get_box_stats([1901], [30])
+    assert (stats['q1'], stats['median'], stats['q3']) == ([30], [30], [30])
+    assert (stats['lowerfence'], stats['upperfence'], stats['outliers']) == ([30], [30], [])
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_box_stats_match_plotly(seed):
+    rng = random.Random(seed)
+    years = []
+    values = []
+    for year in rng.sample(range(1901, 2020, 2), 6):
+        year_values = [rng.randint(0, 400) for _ in range(rng.randint(1, 40))]
+        if rng.random() < 0.5:
+            year_values.append(rng.choice([-2000, 2000]))
+        years += [year] * len(year_values)
+        values += year_values
+    shuffled = list(zip(years, values))
+    rng.shuffle(shuffled)
+    stats = get_box_stats(*zip(*shuffled))
+
+    assert stats['x'] == sorted(set(years))
+    outliers = []
+    for i, year in enumerate(stats['x']):
+        expected = plotly_box_stats(
+            [value for value_year, value in zip(years, values) if value_year == year])
+        for key in ('q1', 'median', 'q3', 'lowerfence', 'upperfence', 'mean'):
+            assert stats[key][i] == pytest.approx(expected[key])
+        outliers += [(year, outlier) for outlier in expected['outliers']]
+    assert list(zip(stats['outlier_x'], stats['outliers'])) == outliers